@@ -0,0 +1,279 @@
+"""通知処理全体のベンチマークスクリプト
+
+ローカルの合成フィードサーバーとSlack APIスタブを起動し、
+N件の情報源・M件の記事で NotificationService.run() を実行して
+実行時間・DBクエリ数・HTTPリクエスト数・最大メモリ使用量を計測する。
+
+1回目（全フィード取得）と2回目（条件付きGETで304）を別々に計測し、
+保存済みのベースライン（benchmarks/baselines.json）と比較して劣化を検出する。
+実行時間・メモリは環境に依存するため、計測するマシンで --save-baseline し直すこと。
+
+Usage:
+    python scripts/benchmark.py                       # 全シナリオを実行してベースラインと比較
+    python scripts/benchmark.py --scenario small      # 指定したシナリオのみ
+    python scripts/benchmark.py --sources 100 --entries 50 --feed-latency 0.1
+    python scripts/benchmark.py --save-baseline       # 計測結果をベースラインとして保存
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+BASELINE_PATH = os.path.join(BACKEND_DIR, "benchmarks", "baselines.json")
+
+# シナリオ名 → パラメータ
+SCENARIOS = {
+    "small": {"sources": 10, "entries": 20, "entry_bytes": 200, "feed_latency": 0.0,
+              "slack_latency": 0.0, "slack_429_ratio": 0.0},
+    "medium": {"sources": 30, "entries": 20, "entry_bytes": 2000, "feed_latency": 0.05,
+               "slack_latency": 0.01, "slack_429_ratio": 0.0},
+    "large": {"sources": 200, "entries": 50, "entry_bytes": 2000, "feed_latency": 0.05,
+              "slack_latency": 0.0, "slack_429_ratio": 0.0},
+    "rate_limited": {"sources": 10, "entries": 20, "entry_bytes": 200, "feed_latency": 0.0,
+                     "slack_latency": 0.01, "slack_429_ratio": 0.1},
+    "digest": {"sources": 30, "entries": 20, "entry_bytes": 2000, "feed_latency": 0.05,
+               "slack_latency": 0.01, "slack_429_ratio": 0.0, "message_mode": "digest"},
+    # Slack側の障害（5xx / ok:false / タイムアウト）。送信できなかったメッセージはアウトボックスに残る
+    "slack_faults": {"sources": 10, "entries": 20, "entry_bytes": 200, "feed_latency": 0.0,
+                     "slack_latency": 0.01, "slack_429_ratio": 0.05, "slack_5xx_ratio": 0.02,
+                     "slack_error_ratio": 0.01, "slack_timeout_ratio": 0.01, "allow_undelivered": True},
+}
+
+# 件数系の指標はベースラインから10%を超えて増えたら劣化とみなす
+COUNT_METRICS = ("db_queries", "feed_requests", "slack_requests")
+COUNT_TOLERANCE = 0.1
+
+
+def peak_rss_mb() -> float:
+    """プロセスの最大常駐メモリ（MB、Linuxのru_maxrssはKB単位）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_scenario(params: dict) -> dict:
+    """
+    1つのシナリオを現在のプロセスで実行
+
+    設定値はインポート時に読み込まれるため、環境変数を設定してからsrcをインポートする。
+    """
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file.name}"
+    os.environ.setdefault("SLACK_BOT_TOKEN", "xoxb-benchmark")
+    os.environ.setdefault("SLACK_CHANNEL_ID", "CBENCHMARK")
+    os.environ["POLLING_MODE"] = "daily"
+    os.environ["FEED_CACHE_MODE"] = "off"
+    os.environ["DRY_RUN"] = "false"
+    os.environ["ARTICLE_AGE_LIMIT_DAYS"] = "3650"
+    os.environ["SLACK_MESSAGE_MODE"] = params.get("message_mode", "unfurl")
+    # Slack側のレート制限（1秒1件）で待つ時間ではなく処理自体を計測するため、送信間隔の制御は緩める
+    # （429の再送はスタブのrate_limit_ratioで計測する）
+    os.environ["SLACK_POST_MESSAGE_PER_SECOND"] = "10000"
+    os.environ["SLACK_POST_MESSAGE_BURST"] = "10000"
+    # タイムアウトを注入するシナリオで待ちすぎないよう短くする
+    os.environ["SLACK_TIMEOUT_SECONDS"] = "0.5"
+
+    sys.path.insert(0, BACKEND_DIR)
+
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+
+    from sqlalchemy import event
+    from src.config.settings import settings
+    from src.config.database import SessionLocal, engine, init_db
+    from src.devtools.fake_slack import FakeSlackServer
+    from src.devtools.stub_feed_server import StubFeedServer
+    from src.models import RSSSource
+    from src.services import NotificationService
+
+    query_count = [0]
+
+    def count_query(*args):
+        query_count[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count_query)
+
+    feed_server = StubFeedServer(
+        feed_count=params["sources"],
+        entries_per_feed=params["entries"],
+        entry_body_bytes=params["entry_bytes"],
+        latency_seconds=params["feed_latency"]
+    ).start()
+    slack_server = FakeSlackServer(
+        latency_seconds=params["slack_latency"],
+        rate_limit_ratio=params["slack_429_ratio"],
+        server_error_ratio=params.get("slack_5xx_ratio", 0.0),
+        error_ratio=params.get("slack_error_ratio", 0.0),
+        timeout_ratio=params.get("slack_timeout_ratio", 0.0),
+        timeout_seconds=1.0
+    ).start()
+    settings.SLACK_API_BASE_URL = slack_server.base_url
+
+    def slack_fault_count() -> int:
+        """429以外に注入した障害の回数"""
+        return sum(count for kind, count in slack_server.fault_counts.items() if kind != "ratelimited")
+
+    try:
+        init_db()
+        db = SessionLocal()
+        for i, url in enumerate(feed_server.feed_urls()):
+            db.add(RSSSource(name=f"stub-{i}", url=url))
+        db.commit()
+
+        results = {}
+        for phase in ("cold", "warm"):
+            query_count[0] = 0
+            feed_requests_before = feed_server.request_count
+            slack_requests_before = slack_server.request_count
+            messages_before = len(slack_server.messages)
+            faults_before = slack_fault_count()
+
+            started = time.perf_counter()
+            success = NotificationService(db).run()
+            wall_time = time.perf_counter() - started
+
+            results[phase] = {
+                "success": success,
+                "wall_time_seconds": round(wall_time, 3),
+                "db_queries": query_count[0],
+                "feed_requests": feed_server.request_count - feed_requests_before,
+                "slack_requests": slack_server.request_count - slack_requests_before,
+                "slack_messages": len(slack_server.messages) - messages_before,
+                "slack_faults": slack_fault_count() - faults_before,
+            }
+
+        results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        results["slack_rate_limited"] = slack_server.rate_limited_count
+        db.close()
+        return results
+    finally:
+        feed_server.stop()
+        slack_server.stop()
+        os.unlink(db_file.name)
+
+
+def run_in_subprocess(name: str) -> dict:
+    """メモリ使用量を独立して計測するため、シナリオごとに別プロセスで実行"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--scenario", name, "--json"],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+
+def compare(name: str, params: dict, result: dict, baseline: dict, tolerance: float) -> list:
+    """ベースラインと比較して劣化した指標のリストを返す"""
+    regressions = []
+
+    for phase in ("cold", "warm"):
+        current = result[phase]
+        base = baseline.get(phase, {})
+
+        if not current["success"] and not params.get("allow_undelivered"):
+            regressions.append(f"{name}/{phase}: run failed")
+
+        if "wall_time_seconds" in base and current["wall_time_seconds"] > base["wall_time_seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{name}/{phase}: wall time {current['wall_time_seconds']}s "
+                f"> baseline {base['wall_time_seconds']}s (+{tolerance:.0%})"
+            )
+
+        for metric in COUNT_METRICS:
+            if metric in base and current[metric] > base[metric] * (1 + COUNT_TOLERANCE):
+                regressions.append(f"{name}/{phase}: {metric} {current[metric]} > baseline {base[metric]}")
+
+    if "peak_rss_mb" in baseline and result["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"{name}: peak RSS {result['peak_rss_mb']}MB > baseline {baseline['peak_rss_mb']}MB")
+
+    return regressions
+
+
+def print_result(name: str, params: dict, result: dict) -> None:
+    print(f"\n[{name}] sources={params['sources']} entries={params['entries']} "
+          f"feed_latency={params['feed_latency']}s slack_latency={params['slack_latency']}s "
+          f"slack_429={params['slack_429_ratio']:.0%} mode={params.get('message_mode', 'unfurl')}")
+    print(f"  {'phase':<6} {'wall(s)':>8} {'db':>6} {'feeds':>6} {'slack':>6} {'posted':>7}")
+    for phase in ("cold", "warm"):
+        r = result[phase]
+        print(f"  {phase:<6} {r['wall_time_seconds']:>8} {r['db_queries']:>6} "
+              f"{r['feed_requests']:>6} {r['slack_requests']:>6} {r['slack_messages']:>7}")
+    faults = sum(result[phase].get("slack_faults", 0) for phase in ("cold", "warm"))
+    print(f"  peak RSS: {result['peak_rss_mb']}MB, slack 429s: {result['slack_rate_limited']}, "
+          f"slack faults (5xx / ok:false / timeout): {faults}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NotificationService end-to-end benchmark")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="実行するシナリオ（複数指定可）")
+    parser.add_argument("--sources", type=int, help="情報源の数（カスタムシナリオ）")
+    parser.add_argument("--entries", type=int, default=20, help="フィードあたりの記事数")
+    parser.add_argument("--entry-bytes", type=int, default=200, help="記事本文のバイト数")
+    parser.add_argument("--feed-latency", type=float, default=0.0, help="フィード応答の遅延（秒）")
+    parser.add_argument("--slack-latency", type=float, default=0.0, help="Slack API応答の遅延（秒）")
+    parser.add_argument("--slack-429-ratio", type=float, default=0.0, help="Slack APIが429を返す割合")
+    parser.add_argument("--message-mode", choices=["unfurl", "digest"], default="unfurl", help="Slackの投稿形式")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="実行時間・メモリの許容劣化率")
+    parser.add_argument("--save-baseline", action="store_true", help="計測結果をベースラインとして保存")
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # カスタムシナリオ（ベースライン比較なし）
+    if args.sources:
+        params = {
+            "sources": args.sources, "entries": args.entries, "entry_bytes": args.entry_bytes,
+            "feed_latency": args.feed_latency, "slack_latency": args.slack_latency,
+            "slack_429_ratio": args.slack_429_ratio, "message_mode": args.message_mode,
+        }
+        print_result("custom", params, run_scenario(params))
+        return
+
+    # サブプロセスとして1シナリオを実行し、結果をJSONで出力
+    if args.json:
+        print(json.dumps(run_scenario(SCENARIOS[args.scenario[0]])))
+        return
+
+    names = args.scenario or list(SCENARIOS)
+    baselines = load_baselines()
+    regressions = []
+    results = {}
+
+    for name in names:
+        result = run_in_subprocess(name)
+        results[name] = result
+        print_result(name, SCENARIOS[name], result)
+        if name in baselines and not args.save_baseline:
+            regressions.extend(compare(name, SCENARIOS[name], result, baselines[name], args.tolerance))
+
+    if args.save_baseline:
+        baselines.update(results)
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ ベースラインを保存しました: {BASELINE_PATH}")
+        return
+
+    if regressions:
+        print("\n❌ ベースラインから劣化しています:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+
+    print("\n✅ ベースラインからの劣化はありません")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""チャンネル別の配信ルートを管理するスクリプト"""
+import argparse
+import sys
+import os
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config.database import SessionLocal, init_db
+from src.models import ChannelRoute, RSSSource
+
+
+def list_routes():
+    """配信ルートの一覧を表示"""
+    db = SessionLocal()
+
+    try:
+        routes = db.query(ChannelRoute).order_by(ChannelRoute.id).all()
+        if not routes:
+            print("配信ルートはありません（SLACK_CHANNEL_IDに全記事を通知します）。")
+            return
+
+        for route in routes:
+            status = "有効" if route.is_active else "無効"
+            sources = ", ".join(s.name for s in route.sources) or "全ての情報源"
+            print(f"[{route.id}] {route.name} ({route.channel_id}) {status}")
+            print(f"    情報源: {sources}")
+            print(f"    許可キーワード: {route.include_keywords if route.include_keywords is not None else '（設定値）'}")
+            print(f"    除外キーワード: {route.exclude_keywords if route.exclude_keywords is not None else '（設定値）'}")
+    finally:
+        db.close()
+
+
+def add_route(name: str, channel_id: str, source_names: list, include: str, exclude: str):
+    """配信ルートを追加（同じチャンネルのルートがあれば更新）"""
+    db = SessionLocal()
+
+    try:
+        sources = []
+        for source_name in source_names:
+            source = db.query(RSSSource).filter(RSSSource.name == source_name).first()
+            if source is None:
+                print(f"❌ '{source_name}' が見つかりませんでした。")
+                return
+            sources.append(source)
+
+        route = db.query(ChannelRoute).filter(ChannelRoute.channel_id == channel_id).first()
+        if route is None:
+            route = ChannelRoute(channel_id=channel_id)
+            db.add(route)
+
+        route.name = name
+        route.is_active = True
+        route.sources = sources
+        route.include_keywords = include
+        route.exclude_keywords = exclude
+        db.commit()
+        print(f"✅ '{name}' ({channel_id}) の配信ルートを保存しました。")
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ エラーが発生しました: {str(e)}")
+    finally:
+        db.close()
+
+
+def remove_route(channel_id: str):
+    """配信ルートを削除"""
+    db = SessionLocal()
+
+    try:
+        route = db.query(ChannelRoute).filter(ChannelRoute.channel_id == channel_id).first()
+        if route:
+            db.delete(route)
+            db.commit()
+            print(f"✅ {channel_id} の配信ルートを削除しました。")
+        else:
+            print(f"❌ {channel_id} の配信ルートが見つかりませんでした。")
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ エラーが発生しました: {str(e)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="チャンネル別の配信ルートを管理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="配信ルートの一覧")
+
+    add_parser = subparsers.add_parser("add", help="配信ルートを追加・更新")
+    add_parser.add_argument("name", help="ルート名（チーム名など）")
+    add_parser.add_argument("channel_id", help="通知先チャンネルID")
+    add_parser.add_argument("--source", action="append", default=[], help="対象の情報源名（複数指定可、省略時は全て）")
+    add_parser.add_argument("--include", help="許可キーワード（カンマ区切り、省略時は設定値、空文字で無し）")
+    add_parser.add_argument("--exclude", help="除外キーワード（カンマ区切り、省略時は設定値、空文字で無し）")
+
+    remove_parser = subparsers.add_parser("remove", help="配信ルートを削除")
+    remove_parser.add_argument("channel_id", help="通知先チャンネルID")
+
+    args = parser.parse_args()
+    init_db()
+
+    if args.command == "list":
+        list_routes()
+    elif args.command == "add":
+        add_route(args.name, args.channel_id, args.source, args.include, args.exclude)
+    else:
+        remove_route(args.channel_id)
@@ -0,0 +1,55 @@
+"""作業キュー（FETCH_MODE=queue）のフィード取得タスクを処理するワーカー"""
+import argparse
+import logging
+import signal
+import sys
+import os
+import threading
+from prometheus_client import start_http_server
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.config.database import SessionLocal, init_db
+from src.services import FetchQueueService
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def run_worker(once: bool = False):
+    """停止（SIGINT / SIGTERM）されるまでタスクを取り出して処理"""
+    db = SessionLocal()
+
+    try:
+        service = FetchQueueService(db)
+        if once:
+            processed = 0
+            while True:
+                count = service.work_once()
+                if not count:
+                    break
+                processed += count
+            print(f"✅ {processed} 件のタスクを処理しました。")
+            return
+
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        service.work(stop)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="フィード取得タスクを処理するワーカー（複数のプロセス・マシンで起動可）")
+    parser.add_argument("--once", action="store_true", help="取得待ちのタスクを処理したら終了")
+    parser.add_argument("--metrics-port", type=int, help="指定した場合、このポートでPrometheusのメトリクスを公開")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    init_db()
+    run_worker(once=args.once)
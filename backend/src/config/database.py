@@ -1,14 +1,38 @@
 """Database connection and session management"""
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from src.utils.metrics import DB_POOL_CHECKOUT_SECONDS
 from .settings import settings
 
+
+class MeteredQueuePool(QueuePool):
+    """接続の取り出し（空きを待つ時間・新規接続を含む）にかかった時間を計測するQueuePool"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _engine_options() -> dict:
+    """インメモリのSQLite以外はMeteredQueuePoolを使う（インメモリは接続ごとに別のDBになるため）"""
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {"poolclass": MeteredQueuePool}
+
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    **_engine_options()
 )
 
 # Create session factory
@@ -36,4 +60,7 @@ def get_db():
 
 def init_db():
     """Initialize database tables"""
+    from .migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
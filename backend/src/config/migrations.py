@@ -0,0 +1,166 @@
+"""Lightweight schema migrations
+
+create_all()は既存テーブルにカラムを追加しないため、
+後から追加したカラムはここでALTER TABLEする。
+各マイグレーションは冪等で、init_db()から毎回呼び出される。
+PostgreSQLでは複数プロセスが同時に起動しても競合しないよう、
+全体を1トランザクションにまとめてアドバイザリロックで直列化する。
+"""
+import logging
+from typing import List, Tuple
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from src.utils.url import url_hash
+
+logger = logging.getLogger(__name__)
+
+
+# (テーブル名, カラム名, カラム定義)
+COLUMN_MIGRATIONS: List[Tuple[str, str, str]] = [
+    ("rss_sources", "etag", "TEXT"),
+    ("rss_sources", "last_modified", "TEXT"),
+    ("rss_sources", "last_http_status", "INTEGER"),
+    ("rss_sources", "last_fetched_at", "TIMESTAMP"),
+    ("rss_sources", "watermark_published_at", "TIMESTAMP"),
+    ("rss_sources", "watermark_guid", "TEXT"),
+    ("rss_sources", "poll_interval_minutes", "INTEGER"),
+    ("rss_sources", "next_poll_at", "TIMESTAMP"),
+    ("rss_sources", "consecutive_failures", "INTEGER NOT NULL DEFAULT 0"),
+    ("rss_sources", "retry_after", "TIMESTAMP"),
+    ("notified_articles", "url_hash", "BIGINT"),
+    ("notification_jobs", "active_key", "VARCHAR(30)"),
+    ("slack_outbox", "delivery_unknown", "BOOLEAN NOT NULL DEFAULT FALSE"),
+]
+
+# url_hashのバックフィル1回あたりの件数
+BACKFILL_BATCH_SIZE = 1000
+
+# マイグレーションを直列化するpg_advisory_xact_lockのキー
+MIGRATION_LOCK_KEY = 73450001
+
+
+def add_missing_columns(conn: Connection) -> None:
+    """未作成のカラムを追加"""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+
+    for table, column, ddl in COLUMN_MIGRATIONS:
+        if table not in existing_tables:
+            continue
+
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if column in columns:
+            continue
+
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        logger.info(f"Added column {table}.{column}")
+
+
+def migrate_notified_articles_url_hash(conn: Connection) -> None:
+    """
+    notified_articles.url_hashのバックフィルとインデックス付け替え
+
+    1. url_hashが未設定の行を正規化URLのハッシュで埋める
+    2. 正規化により同一記事となった重複行を削除（最も古い行を残す）
+    3. url_hashにユニークインデックスを作成
+    4. article_urlのユニーク制約・インデックスを削除（PostgreSQLのみ）
+
+    PostgreSQLのALTER TABLE / DROPはACCESS EXCLUSIVEロックを取るため、
+    移行済みのスキーマでは実行しない。
+    """
+    inspector = inspect(conn)
+    if "notified_articles" not in inspector.get_table_names():
+        return
+
+    # 1. バックフィル
+    select_stmt = text(
+        "SELECT id, article_url FROM notified_articles WHERE url_hash IS NULL LIMIT :limit"
+    )
+    update_stmt = text(
+        "UPDATE notified_articles SET url_hash = :hash WHERE id = :row_id"
+    ).bindparams(bindparam("hash"), bindparam("row_id"))
+
+    backfilled = 0
+    while True:
+        rows = conn.execute(select_stmt, {"limit": BACKFILL_BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            update_stmt,
+            [{"hash": url_hash(row.article_url), "row_id": row.id} for row in rows]
+        )
+        backfilled += len(rows)
+
+    if backfilled:
+        logger.info(f"Backfilled url_hash for {backfilled} notified articles")
+
+    index_names = {ix["name"] for ix in inspector.get_indexes("notified_articles")}
+
+    if "ix_notified_articles_url_hash" not in index_names:
+        # 2. 正規化で重複した行を削除
+        result = conn.execute(text(
+            "DELETE FROM notified_articles WHERE id IN ("
+            " SELECT a.id FROM notified_articles a"
+            " JOIN notified_articles b ON a.url_hash = b.url_hash AND a.id > b.id"
+            ")"
+        ))
+        if result.rowcount:
+            logger.info(f"Removed {result.rowcount} duplicate notified articles after URL canonicalization")
+
+        # 3. ユニークインデックス作成
+        conn.execute(text(
+            "CREATE UNIQUE INDEX ix_notified_articles_url_hash ON notified_articles (url_hash)"
+        ))
+        logger.info("Created unique index ix_notified_articles_url_hash")
+
+    if conn.dialect.name != "postgresql":
+        return
+
+    url_hash_column = next(c for c in inspector.get_columns("notified_articles") if c["name"] == "url_hash")
+    if url_hash_column["nullable"]:
+        conn.execute(text("ALTER TABLE notified_articles ALTER COLUMN url_hash SET NOT NULL"))
+        logger.info("Set notified_articles.url_hash NOT NULL")
+
+    # 4. 旧インデックス・制約を削除
+    if "ix_notified_articles_article_url" in index_names:
+        conn.execute(text("DROP INDEX ix_notified_articles_article_url"))
+        logger.info("Dropped index ix_notified_articles_article_url")
+
+    constraint_names = {uc["name"] for uc in inspector.get_unique_constraints("notified_articles")}
+    if "notified_articles_article_url_key" in constraint_names:
+        conn.execute(text(
+            "ALTER TABLE notified_articles DROP CONSTRAINT notified_articles_article_url_key"
+        ))
+        logger.info("Dropped constraint notified_articles_article_url_key")
+
+
+def create_notification_jobs_active_key_index(conn: Connection) -> None:
+    """notification_jobs.active_key（同時実行の排他）のユニークインデックスを作成"""
+    inspector = inspect(conn)
+    if "notification_jobs" not in inspector.get_table_names():
+        return
+
+    index_names = {ix["name"] for ix in inspector.get_indexes("notification_jobs")}
+    if "ix_notification_jobs_active_key" in index_names:
+        return
+
+    conn.execute(text(
+        "CREATE UNIQUE INDEX ix_notification_jobs_active_key ON notification_jobs (active_key)"
+    ))
+    logger.info("Created unique index ix_notification_jobs_active_key")
+
+
+def run_migrations(engine: Engine) -> None:
+    """
+    全マイグレーションを1トランザクションで実行
+
+    PostgreSQLではトランザクション単位のアドバイザリロックを取り、
+    複数プロセスが同時に起動しても1つずつ実行する（後続は移行済みのスキーマを見て何もしない）。
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+        add_missing_columns(conn)
+        migrate_notified_articles_url_hash(conn)
+        create_notification_jobs_active_key_index(conn)
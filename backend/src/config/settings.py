@@ -31,9 +31,113 @@ class Settings:
     SLACK_WEBHOOK_URL: Optional[str] = os.getenv("SLACK_WEBHOOK_URL")
     SLACK_BOT_TOKEN: Optional[str] = os.getenv("SLACK_BOT_TOKEN")
     SLACK_CHANNEL_ID: Optional[str] = os.getenv("SLACK_CHANNEL_ID")
+    # ローカルのSlack APIスタブなどに向ける場合に変更
+    SLACK_API_BASE_URL: str = os.getenv("SLACK_API_BASE_URL", "https://slack.com/api").rstrip("/")
+    SLACK_TIMEOUT_SECONDS: float = float(os.getenv("SLACK_TIMEOUT_SECONDS", "10"))
+    # 429（Retry-After）を受けた場合の最大再送回数
+    SLACK_MAX_RETRIES: int = int(os.getenv("SLACK_MAX_RETRIES", "3"))
+    # chat.postMessageの送信レート（Slackの制限はチャンネルごとに1秒1件、短いバーストは許容）
+    SLACK_POST_MESSAGE_PER_SECOND: float = float(os.getenv("SLACK_POST_MESSAGE_PER_SECOND", "1"))
+    SLACK_POST_MESSAGE_BURST: int = int(os.getenv("SLACK_POST_MESSAGE_BURST", "3"))
+
+    # Slack outbox
+    # 通知はアウトボックスに登録してから送信し、失敗したメッセージは配信ジョブが再送する
+    # （この回数失敗したらエラーログ・メトリクスで知らせ、以降も最大1日間隔で再送を続ける）
+    SLACK_OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("SLACK_OUTBOX_MAX_ATTEMPTS", "5"))
+    # 再送間隔（失敗ごとに倍増）
+    SLACK_OUTBOX_RETRY_BASE_SECONDS: int = int(os.getenv("SLACK_OUTBOX_RETRY_BASE_SECONDS", "60"))
+    SLACK_OUTBOX_DELIVERY_INTERVAL_SECONDS: int = int(os.getenv("SLACK_OUTBOX_DELIVERY_INTERVAL_SECONDS", "60"))
+    # 送信中のまま、この時間が過ぎたメッセージは送信が中断されたとみなす
+    SLACK_OUTBOX_STALE_SECONDS: int = int(os.getenv("SLACK_OUTBOX_STALE_SECONDS", "300"))
+    # 送信済みのメッセージを保持する日数
+    SLACK_OUTBOX_RETENTION_DAYS: int = int(os.getenv("SLACK_OUTBOX_RETENTION_DAYS", "7"))
 
     # Notification
     NOTIFICATION_TIME: str = os.getenv("NOTIFICATION_TIME", "09:00")
+    # unfurl: 記事ごとに1メッセージ（URLプレビュー付き）
+    # digest: 情報源ごとにまとめたBlock Kitメッセージ（1メッセージ最大50ブロック、API呼び出しが少ない）
+    SLACK_MESSAGE_MODE: str = os.getenv("SLACK_MESSAGE_MODE", "unfurl").lower()
+    # 手動実行（/trigger-notification）を処理するワーカー数と、実行履歴を保持する日数
+    NOTIFICATION_JOB_WORKERS: int = int(os.getenv("NOTIFICATION_JOB_WORKERS", "1"))
+    NOTIFICATION_JOB_RETENTION_DAYS: int = int(os.getenv("NOTIFICATION_JOB_RETENTION_DAYS", "7"))
+    # 通知処理は同時に1つだけ実行し、実行中の呼び出しはその結果を待つ。
+    # 成功してからこの秒数以内の呼び出しは、新たに実行せず直前の結果を返す（0で無効）
+    NOTIFICATION_COOLDOWN_SECONDS: int = int(os.getenv("NOTIFICATION_COOLDOWN_SECONDS", "300"))
+    # 実行中のジョブの更新がこの秒数途絶えたら、停止したとみなして新たに実行する
+    NOTIFICATION_JOB_STALE_SECONDS: int = int(os.getenv("NOTIFICATION_JOB_STALE_SECONDS", "300"))
+
+    # Scheduler
+    # auto: PostgreSQLではアドバイザリロックで選出した1プロセスだけがスケジューラーを実行
+    # local: 常にこのプロセスで実行（単一プロセスでの運用向け、PostgreSQL以外のDBでも同様）
+    SCHEDULER_LEADER_ELECTION: str = os.getenv("SCHEDULER_LEADER_ELECTION", "auto").lower()
+    # 同じDBを使う別のアプリと重ならないロックID
+    SCHEDULER_ADVISORY_LOCK_ID: int = int(os.getenv("SCHEDULER_ADVISORY_LOCK_ID", "726417"))
+    # ロックの取得を試みる間隔（リーダーが停止してから引き継ぐまでの最大時間）
+    SCHEDULER_LEADER_CHECK_SECONDS: float = float(os.getenv("SCHEDULER_LEADER_CHECK_SECONDS", "15"))
+
+    # Polling
+    # daily: 通知時刻に全情報源を一括取得
+    # adaptive: 情報源ごとに更新頻度に応じた間隔で巡回し、通知時刻に取得済み記事をまとめて通知
+    POLLING_MODE: str = os.getenv("POLLING_MODE", "daily").lower()
+    POLL_CHECK_INTERVAL_MINUTES: int = int(os.getenv("POLL_CHECK_INTERVAL_MINUTES", "5"))
+    POLL_MIN_INTERVAL_MINUTES: int = int(os.getenv("POLL_MIN_INTERVAL_MINUTES", "60"))
+    POLL_MAX_INTERVAL_MINUTES: int = int(os.getenv("POLL_MAX_INTERVAL_MINUTES", str(7 * 24 * 60)))
+    POLL_DEFAULT_INTERVAL_MINUTES: int = int(os.getenv("POLL_DEFAULT_INTERVAL_MINUTES", str(24 * 60)))
+
+    # WebSub (PubSubHubbub)
+    # ハブを公開している情報源に購読を申し込み、更新をプッシュで受け取る（POLLING_MODE=adaptiveが必要）
+    ENABLE_WEBSUB: bool = os.getenv("ENABLE_WEBSUB", "false").lower() == "true"
+    # ハブから到達できるこのアプリの公開URL（例: https://example.herokuapp.com）
+    WEBSUB_CALLBACK_BASE_URL: str = os.getenv("WEBSUB_CALLBACK_BASE_URL", "").rstrip("/")
+    WEBSUB_LEASE_SECONDS: int = int(os.getenv("WEBSUB_LEASE_SECONDS", str(10 * 24 * 60 * 60)))
+    # 購読期限の残りがこの時間を切ったら更新を申し込む
+    WEBSUB_RENEW_BEFORE_MINUTES: int = int(os.getenv("WEBSUB_RENEW_BEFORE_MINUTES", str(24 * 60)))
+    WEBSUB_RENEW_CHECK_INTERVAL_MINUTES: int = int(os.getenv("WEBSUB_RENEW_CHECK_INTERVAL_MINUTES", "60"))
+
+    # Feed fetching
+    FETCH_MAX_WORKERS: int = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+    FETCH_TIMEOUT_SECONDS: float = float(os.getenv("FETCH_TIMEOUT_SECONDS", "15"))
+    FETCH_POOL_CONNECTIONS: int = int(os.getenv("FETCH_POOL_CONNECTIONS", "50"))
+    # ホストごとに保持する接続数（FETCH_MAX_WORKERS未満の場合はFETCH_MAX_WORKERSまで増やす）
+    FETCH_POOL_MAXSIZE: int = int(os.getenv("FETCH_POOL_MAXSIZE", os.getenv("FETCH_MAX_WORKERS", "8")))
+    FETCH_MAX_BYTES: int = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+    FETCH_USER_AGENT: str = os.getenv("FETCH_USER_AGENT", "TechBlogBot/1.0")
+    # local: 通知処理のプロセスで全情報源を取得
+    # queue: 情報源ごとのタスクを作業キュー（fetch_tasks）に登録し、
+    #        ワーカープロセス（scripts/fetch_worker.py）と分担して取得（POLLING_MODE=daily）
+    FETCH_MODE: str = os.getenv("FETCH_MODE", "local").lower()
+    # ワーカーが1回に取り出すタスク数
+    FETCH_QUEUE_CLAIM_SIZE: int = int(os.getenv("FETCH_QUEUE_CLAIM_SIZE", "10"))
+    # 取得中のままこの時間が過ぎたタスクは、ワーカーが停止したとみなして取得待ちに戻す
+    FETCH_QUEUE_CLAIM_TIMEOUT_SECONDS: int = int(os.getenv("FETCH_QUEUE_CLAIM_TIMEOUT_SECONDS", "300"))
+    # 通知処理が全タスクの終了を待つ最大時間（過ぎたら取得済みの分だけで通知）
+    FETCH_QUEUE_TIMEOUT_SECONDS: int = int(os.getenv("FETCH_QUEUE_TIMEOUT_SECONDS", "900"))
+
+    # Feed parsing
+    # 0より大きい場合、PARSE_PROCESS_MIN_BYTES以上のフィードをプロセスプールでパースする
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", "0"))
+    PARSE_PROCESS_MIN_BYTES: int = int(os.getenv("PARSE_PROCESS_MIN_BYTES", str(256 * 1024)))
+    # 必要な項目だけを読む高速パーサーを使う（扱えないフィードはfeedparserで処理）
+    ENABLE_FAST_PARSER: bool = os.getenv("ENABLE_FAST_PARSER", "true").lower() == "true"
+    # 高速パーサーで、期間外の記事がこの件数続いたらパースを打ち切る
+    FAST_PARSE_STOP_AFTER_OLD: int = int(os.getenv("FAST_PARSE_STOP_AFTER_OLD", "3"))
+
+    # Feed cache
+    # record: 取得したフィードをディスクに保存 / replay: 保存済みのフィードのみで実行（ネットワーク不使用）
+    FEED_CACHE_MODE: str = os.getenv("FEED_CACHE_MODE", "off").lower()
+    FEED_CACHE_DIR: str = os.getenv("FEED_CACHE_DIR", ".feed_cache")
+    FEED_CACHE_MAX_BYTES: int = int(os.getenv("FEED_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    FEED_CACHE_MAX_AGE_DAYS: int = int(os.getenv("FEED_CACHE_MAX_AGE_DAYS", "30"))
+
+    # Circuit breaker
+    # 連続でCIRCUIT_BREAKER_THRESHOLD回失敗した情報源は、
+    # BASE分と取得間隔（dailyでは1日）の長い方から倍々に（最大MAX分）取得を停止し、期限後に再試行する
+    CIRCUIT_BREAKER_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_THRESHOLD", "3"))
+    CIRCUIT_BREAKER_BASE_MINUTES: int = int(os.getenv("CIRCUIT_BREAKER_BASE_MINUTES", "60"))
+    CIRCUIT_BREAKER_MAX_MINUTES: int = int(os.getenv("CIRCUIT_BREAKER_MAX_MINUTES", str(7 * 24 * 60)))
+
+    # 前回確認した最新記事に到達したらエントリ処理を打ち切る
+    ENABLE_FEED_WATERMARK: bool = os.getenv("ENABLE_FEED_WATERMARK", "true").lower() == "true"
 
     # Article filtering
     ARTICLE_AGE_LIMIT_DAYS: int = int(os.getenv("ARTICLE_AGE_LIMIT_DAYS", "7"))
@@ -44,10 +148,19 @@ class Settings:
     EXCLUDE_KEYWORDS: List[str] = [
         kw.strip() for kw in os.getenv("EXCLUDE_KEYWORDS", "開催,お知らせ,募集,採用,Advent Calendar").split(",")
     ]
+    # 指定した場合、いずれかを含む記事のみ通知（空なら全て許可）
+    INCLUDE_KEYWORDS: List[str] = [
+        kw.strip() for kw in os.getenv("INCLUDE_KEYWORDS", "").split(",") if kw.strip()
+    ]
 
     # Timezone
     TIMEZONE: str = os.getenv("TZ", "Asia/Tokyo")
 
+    # Dry run: Slackに投稿せず、通知済み・取得状態もDBに保存しない（リプレイ時は既定で有効）
+    DRY_RUN: bool = os.getenv(
+        "DRY_RUN", "true" if os.getenv("FEED_CACHE_MODE", "off").lower() == "replay" else "false"
+    ).lower() == "true"
+
     # Application
     APP_NAME: str = "Slack Bot"
     APP_VERSION: str = "1.0.0"
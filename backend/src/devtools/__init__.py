@@ -0,0 +1 @@
+"""Local stand-ins for external services (benchmarks and manual testing)"""
@@ -0,0 +1,419 @@
+"""Local stand-in for the Slack Web API"""
+import json
+import math
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+
+# 故障の種類（inject_faultで指定する）
+FAULT_KINDS = ("ratelimited", "timeout", "lost_response", "server_error", "error")
+
+
+class _ChannelRateLimiter:
+    """チャンネルごとのトークンバケット（待たずに、超過した場合は次に使えるまでの秒数を返す）"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str) -> float:
+        """トークンを1つ使う。使えない場合は使えるようになるまでの秒数"""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate_per_second)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate_per_second
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+
+class FakeSlackServer:
+    """
+    Slack Web APIのローカル版（負荷試験・障害試験用）
+
+    chat.postMessage / chat.update / conversations.history / conversations.replies を受け付け、
+    チャンネル・スレッドごとのメッセージをメモリに記録する。
+    SLACK_API_BASE_URLに base_url を設定してSlackServiceから利用する。
+
+    - レート制限: post_message_per_second を指定すると、chat.postMessageを
+      チャンネルごとのトークンバケットで制限し、超過時はRetry-After付きの429を返す
+      （chat.updateはTier 3相当の1分50回）
+    - 故障: 応答遅延（latency_seconds ± latency_jitter_seconds）と、
+      429 / タイムアウト / 5xx / ok:false を指定した割合でランダムに発生させる。
+      inject_fault() で次のN回の呼び出しを確実に失敗させることもできる
+    - 記録: messages（投稿順）、get_channel_messages() / get_thread()、
+      calls（メソッド・チャンネル・ステータス・エラー）
+
+    Usage:
+        with FakeSlackServer(latency_seconds=0.05, rate_limit_ratio=0.1) as slack:
+            settings.SLACK_API_BASE_URL = slack.base_url
+            slack.inject_fault("server_error", count=2)
+    """
+
+    # chat.updateのレート制限（Tier 3: 1分50回）
+    UPDATE_PER_MINUTE = 50
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        retry_after_seconds: int = 1,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_jitter_seconds: float = 0.0,
+        post_message_per_second: Optional[float] = None,
+        post_message_burst: int = 1,
+        timeout_ratio: float = 0.0,
+        timeout_seconds: float = 30.0,
+        server_error_ratio: float = 0.0,
+        error_ratio: float = 0.0,
+        error_code: str = "internal_error",
+        channels: Optional[Iterable[str]] = None
+    ):
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after_seconds = retry_after_seconds
+        self.timeout_ratio = timeout_ratio
+        self.timeout_seconds = timeout_seconds
+        self.server_error_ratio = server_error_ratio
+        self.error_ratio = error_ratio
+        self.error_code = error_code
+        # 指定した場合、それ以外のチャンネルへの投稿はchannel_not_foundになる
+        self.channels = set(channels) if channels is not None else None
+
+        self.messages: List[Dict] = []
+        self.updates: List[Dict] = []
+        self.calls: List[Dict] = []
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.fault_counts: Dict[str, int] = {kind: 0 for kind in FAULT_KINDS}
+
+        self._by_ts: Dict[Tuple[str, str], Dict] = {}
+        self._threads: Dict[Tuple[str, str], List[Dict]] = {}
+        self._faults: Deque[Tuple[str, Optional[str], Optional[str]]] = deque()
+        self._post_limiter = (
+            _ChannelRateLimiter(post_message_per_second, post_message_burst)
+            if post_message_per_second else None
+        )
+        self._update_limiter = _ChannelRateLimiter(self.UPDATE_PER_MINUTE / 60, self.UPDATE_PER_MINUTE // 10)
+        self._ts_counter = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self) -> "FakeSlackServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeSlackServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def inject_fault(
+        self,
+        kind: str,
+        count: int = 1,
+        method: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        次のcount回の呼び出しを失敗させる
+
+        Args:
+            kind: ratelimited / timeout / lost_response（処理した後にタイムアウト） /
+                server_error / error（ok:false）
+            count: 失敗させる回数
+            method: 指定した場合はそのメソッドの呼び出しのみ
+            error: kind=errorの場合のエラーコード（省略時はerror_code）
+        """
+        if kind not in FAULT_KINDS:
+            raise ValueError(f"Unknown fault kind: {kind}")
+        with self._lock:
+            for _ in range(count):
+                self._faults.append((kind, method, error))
+
+    def get_channel_messages(self, channel: str) -> List[Dict]:
+        """チャンネルのトップレベルのメッセージ（投稿順）"""
+        with self._lock:
+            return [m for m in self.messages if m["channel"] == channel and not m.get("thread_ts")]
+
+    def get_thread(self, channel: str, thread_ts: str) -> List[Dict]:
+        """スレッドの返信（投稿順、親は含まない）"""
+        with self._lock:
+            return list(self._threads.get((channel, thread_ts), []))
+
+    def reset(self) -> None:
+        """記録したメッセージ・呼び出しと、未発生の故障を消去"""
+        with self._lock:
+            self.messages.clear()
+            self.updates.clear()
+            self.calls.clear()
+            self._by_ts.clear()
+            self._threads.clear()
+            self._faults.clear()
+            self.request_count = 0
+            self.rate_limited_count = 0
+            self.fault_counts = {kind: 0 for kind in FAULT_KINDS}
+
+    def _next_ts(self) -> str:
+        """一意で単調増加するts（Slackと同じ "秒.マイクロ秒" 形式）"""
+        self._ts_counter += 1
+        return f"{int(time.time())}.{self._ts_counter:06d}"
+
+    def _pick_fault(self, method: str) -> Optional[Tuple[str, Optional[str]]]:
+        """この呼び出しで発生させる故障（inject_faultで指定したものを優先）"""
+        for i, (kind, fault_method, error) in enumerate(self._faults):
+            if fault_method is None or fault_method == method:
+                del self._faults[i]
+                return kind, error
+
+        roll = self._random.random()
+        for kind, ratio in (
+            ("ratelimited", self.rate_limit_ratio),
+            ("timeout", self.timeout_ratio),
+            ("server_error", self.server_error_ratio),
+            ("error", self.error_ratio),
+        ):
+            if roll < ratio:
+                return kind, None
+            roll -= ratio
+        return None
+
+    def _post_message(self, payload: Dict) -> Dict:
+        """chat.postMessageの処理"""
+        channel = payload.get("channel")
+        if not channel:
+            return {"ok": False, "error": "channel_not_found"}
+        if self.channels is not None and channel not in self.channels:
+            return {"ok": False, "error": "channel_not_found"}
+        if not payload.get("text") and not payload.get("blocks"):
+            return {"ok": False, "error": "no_text"}
+
+        thread_ts = payload.get("thread_ts")
+        if thread_ts and (channel, thread_ts) not in self._by_ts:
+            return {"ok": False, "error": "thread_not_found"}
+
+        ts = self._next_ts()
+        message = {**payload, "channel": channel, "ts": ts}
+        self.messages.append(message)
+        self._by_ts[(channel, ts)] = message
+        if thread_ts:
+            self._threads.setdefault((channel, thread_ts), []).append(message)
+        return {"ok": True, "channel": channel, "ts": ts, "message": message}
+
+    def _update_message(self, payload: Dict) -> Dict:
+        """chat.updateの処理（本文・ブロックを置き換える）"""
+        message = self._by_ts.get((payload.get("channel"), payload.get("ts")))
+        if message is None:
+            return {"ok": False, "error": "message_not_found"}
+
+        for key in ("text", "blocks", "attachments", "metadata"):
+            if key in payload:
+                message[key] = payload[key]
+        message["edited"] = {"ts": self._next_ts()}
+        self.updates.append({"channel": message["channel"], "ts": message["ts"], **payload})
+        return {"ok": True, "channel": message["channel"], "ts": message["ts"], "text": message.get("text")}
+
+    def _history(self, payload: Dict, thread_ts: Optional[str] = None) -> Dict:
+        """conversations.history / conversations.repliesの処理（新しい順）"""
+        channel = payload.get("channel")
+        if self.channels is not None and channel not in self.channels:
+            return {"ok": False, "error": "channel_not_found"}
+
+        if thread_ts:
+            parent = self._by_ts.get((channel, thread_ts))
+            if parent is None:
+                return {"ok": False, "error": "thread_not_found"}
+            # repliesは親を先頭に古い順で返す
+            messages = [parent] + self._threads.get((channel, thread_ts), [])
+        else:
+            messages = [m for m in reversed(self.messages) if m["channel"] == channel and not m.get("thread_ts")]
+
+        oldest = float(payload.get("oldest") or 0)
+        messages = [m for m in messages if float(m["ts"]) > oldest]
+        if str(payload.get("include_all_metadata", "")).lower() not in ("true", "1"):
+            messages = [{k: v for k, v in m.items() if k != "metadata"} for m in messages]
+
+        limit = int(payload.get("limit") or 100)
+        return {"ok": True, "messages": messages[:limit], "has_more": len(messages) > limit}
+
+    def _handle(self, method: str, payload: Dict) -> Tuple[Dict, float]:
+        """
+        APIメソッドを処理
+
+        Returns:
+            (レスポンス, 429の場合はRetry-Afterの秒数、それ以外は0)
+        """
+        channel = payload.get("channel") or ""
+        limiter = {"chat.postMessage": self._post_limiter, "chat.update": self._update_limiter}.get(method)
+        if limiter is not None:
+            wait = limiter.take(channel)
+            if wait > 0:
+                return {"ok": False, "error": "ratelimited"}, wait
+
+        if method == "chat.postMessage":
+            return self._post_message(payload), 0.0
+        if method == "chat.update":
+            return self._update_message(payload), 0.0
+        if method == "conversations.history":
+            return self._history(payload), 0.0
+        if method == "conversations.replies":
+            return self._history(payload, thread_ts=payload.get("ts")), 0.0
+        return {"ok": False, "error": "unknown_method"}, 0.0
+
+    def _record_call(self, method: str, payload: Dict, status: int, error: Optional[str]) -> None:
+        with self._lock:
+            self.calls.append({
+                "method": method,
+                "channel": payload.get("channel"),
+                "status": status,
+                "error": error,
+            })
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-aliveでヘッダーと本文を別々に書き込むため、Nagleによる遅延（約40ms）を避ける
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                method = self.path.rsplit("/", 1)[-1]
+
+                if not self.path.startswith("/api/"):
+                    self._respond(404, {"ok": False, "error": "unknown_method"})
+                    return
+
+                try:
+                    payload = self._parse_payload(body)
+                except ValueError:
+                    self._respond(200, {"ok": False, "error": "invalid_json"})
+                    return
+
+                with server._lock:
+                    server.request_count += 1
+                    fault = server._pick_fault(method)
+                    if fault:
+                        server.fault_counts[fault[0]] += 1
+                        if fault[0] == "ratelimited":
+                            server.rate_limited_count += 1
+
+                delay = server.latency_seconds
+                if server.latency_jitter_seconds:
+                    with server._lock:
+                        delay += server._random.uniform(-1, 1) * server.latency_jitter_seconds
+                if delay > 0:
+                    time.sleep(delay)
+
+                if fault:
+                    kind, error = fault
+                    if kind == "ratelimited":
+                        server._record_call(method, payload, 429, "ratelimited")
+                        self._respond(
+                            429,
+                            {"ok": False, "error": "ratelimited"},
+                            {"Retry-After": str(server.retry_after_seconds)}
+                        )
+                    elif kind == "timeout":
+                        # クライアントのタイムアウトより長く待ってから応答する（処理はしない）
+                        server._record_call(method, payload, 0, "timeout")
+                        time.sleep(server.timeout_seconds)
+                        try:
+                            self._respond(504, {"ok": False, "error": "timeout"})
+                        except OSError:
+                            # クライアントは既に切断している
+                            self.close_connection = True
+                    elif kind == "lost_response":
+                        # 処理（投稿）はしたが、応答がクライアントのタイムアウトに間に合わない
+                        with server._lock:
+                            server._handle(method, payload)
+                        server._record_call(method, payload, 0, "lost_response")
+                        time.sleep(server.timeout_seconds)
+                        try:
+                            self._respond(504, {"ok": False, "error": "timeout"})
+                        except OSError:
+                            self.close_connection = True
+                    elif kind == "server_error":
+                        status = 500 + server._random.choice((0, 2, 3))
+                        server._record_call(method, payload, status, f"HTTP {status}")
+                        self._respond_text(status, "upstream error")
+                    else:
+                        error = error or server.error_code
+                        server._record_call(method, payload, 200, error)
+                        self._respond(200, {"ok": False, "error": error})
+                    return
+
+                with server._lock:
+                    data, retry_after = server._handle(method, payload)
+                    if retry_after:
+                        server.rate_limited_count += 1
+
+                if retry_after:
+                    server._record_call(method, payload, 429, "ratelimited")
+                    self._respond(
+                        429,
+                        data,
+                        {"Retry-After": str(max(1, math.ceil(retry_after)))}
+                    )
+                    return
+
+                status = 404 if data.get("error") == "unknown_method" else 200
+                server._record_call(method, payload, status, data.get("error"))
+                self._respond(status, data)
+
+            def _parse_payload(self, body: bytes) -> Dict:
+                """JSON、またはフォーム形式（conversations.*）のリクエストボディ"""
+                content_type = self.headers.get("Content-Type", "")
+                if "application/x-www-form-urlencoded" in content_type:
+                    form = parse_qs(body.decode("utf-8"))
+                    return {key: values[0] for key, values in form.items()}
+                return json.loads(body or b"{}")
+
+            def _respond(self, status: int, data: Dict, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _respond_text(self, status: int, text: str):
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,182 @@
+"""Local HTTP server serving synthetic RSS / Atom feeds"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from xml.sax.saxutils import escape
+
+
+class StubFeedServer:
+    """
+    合成フィードを配信するローカルHTTPサーバー
+
+    /feeds/<番号>.xml で、偶数番号はRSS 2.0、奇数番号はAtomのフィードを返す。
+    エントリ数・本文サイズ・応答遅延を指定でき、ETagによる条件付きGETにも応答する。
+    hub_urlを指定すると、フィードにWebSubのハブ（rel="hub"）とself linkを含める。
+
+    Usage:
+        with StubFeedServer(feed_count=30, entries_per_feed=20) as server:
+            urls = server.feed_urls()
+    """
+
+    def __init__(
+        self,
+        feed_count: int = 10,
+        entries_per_feed: int = 20,
+        entry_body_bytes: int = 0,
+        latency_seconds: float = 0.0,
+        hub_url: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.feed_count = feed_count
+        self.entries_per_feed = entries_per_feed
+        self.entry_body_bytes = entry_body_bytes
+        self.latency_seconds = latency_seconds
+        self.hub_url = hub_url
+        self.generated_at = datetime.now(timezone.utc).replace(microsecond=0)
+
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._feeds: Dict[int, bytes] = {}
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def feed_urls(self):
+        """全フィードのURL"""
+        return [self.feed_url(i) for i in range(self.feed_count)]
+
+    def feed_url(self, index: int) -> str:
+        """フィードのURL"""
+        return f"{self.base_url}/feeds/{index}.xml"
+
+    def start(self) -> "StubFeedServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubFeedServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _entry_dates(self):
+        # 新しい順に1時間間隔
+        return [self.generated_at - timedelta(hours=i) for i in range(self.entries_per_feed)]
+
+    def render_feed(self, index: int) -> bytes:
+        """フィード本文を生成（同じ番号には毎回同じ内容を返す）"""
+        if index in self._feeds:
+            return self._feeds[index]
+
+        body = escape("x" * self.entry_body_bytes)
+        base = f"https://stub.example.com/{index}"
+        hub_links = ""
+        if self.hub_url:
+            hub_links = (
+                f'<atom:link rel="hub" href="{escape(self.hub_url)}"/>'
+                f'<atom:link rel="self" href="{escape(self.feed_url(index))}"/>'
+            )
+
+        if index % 2 == 0:
+            items = "".join(
+                f"<item><title>Stub feed {index} post {n}</title>"
+                f"<link>{base}/posts/{n}</link><guid>{base}/posts/{n}</guid>"
+                f"<pubDate>{format_datetime(date)}</pubDate>"
+                f"<description>{body}</description></item>"
+                for n, date in enumerate(self._entry_dates())
+            )
+            xml = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'
+                f"<title>Stub feed {index}</title><link>{base}</link>{hub_links}{items}</channel></rss>"
+            )
+        else:
+            entries = "".join(
+                f"<entry><title>Stub feed {index} post {n}</title>"
+                f'<link href="{base}/posts/{n}"/><id>{base}/posts/{n}</id>'
+                f"<published>{date.isoformat()}</published><updated>{date.isoformat()}</updated>"
+                f"<content>{body}</content></entry>"
+                for n, date in enumerate(self._entry_dates())
+            )
+            xml = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:atom="http://www.w3.org/2005/Atom">'
+                f"<title>Stub feed {index}</title><id>{base}</id>{hub_links}"
+                f"<updated>{self.generated_at.isoformat()}</updated>{entries}</feed>"
+            )
+
+        self._feeds[index] = xml.encode("utf-8")
+        return self._feeds[index]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-aliveでヘッダーと本文を別々に書き込むため、Nagleによる遅延（約40ms）を避ける
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+
+                if server.latency_seconds:
+                    time.sleep(server.latency_seconds)
+
+                path = self.path.split("?")[0]
+                if not (path.startswith("/feeds/") and path.endswith(".xml")):
+                    self._respond(404, b"not found", "text/plain")
+                    return
+
+                try:
+                    index = int(path[len("/feeds/"):-len(".xml")])
+                except ValueError:
+                    index = -1
+                if not 0 <= index < server.feed_count:
+                    self._respond(404, b"not found", "text/plain")
+                    return
+
+                etag = f'"stub-{index}-{int(server.generated_at.timestamp())}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                content_type = "application/rss+xml" if index % 2 == 0 else "application/atom+xml"
+                self._respond(200, server.render_feed(index), content_type, {"ETag": etag})
+
+            def _respond(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
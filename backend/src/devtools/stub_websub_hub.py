@@ -0,0 +1,163 @@
+"""Local WebSub hub for exercising push subscriptions"""
+import hashlib
+import hmac
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+import requests
+
+
+class StubWebSubHub:
+    """
+    購読の申し込みを受け付け、配信を行うローカルのWebSubハブ
+
+    申し込み（POST hub.mode=subscribe / unsubscribe）には202を返し、
+    別スレッドでコールバックURLに確認リクエスト（hub.challenge）を送る。
+    challengeがそのまま返された購読だけを登録し、publish()で
+    X-Hub-Signature付きのフィードを購読者に配信する。
+
+    Usage:
+        with StubWebSubHub() as hub:
+            # フィードに <atom:link rel="hub" href="{hub.hub_url}"/> を含める
+            hub.wait_for_subscriptions(1)
+            hub.publish(topic_url, feed_xml)
+    """
+
+    def __init__(self, lease_seconds: int = 3600, host: str = "127.0.0.1", port: int = 0):
+        self.lease_seconds = lease_seconds
+
+        # (topic, callback) → secret
+        self.subscriptions: Dict[Tuple[str, str], str] = {}
+        self.requests: List[Dict[str, str]] = []
+        self.verification_failures = 0
+        self.deliveries: List[Dict] = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def hub_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "StubWebSubHub":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubWebSubHub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def wait_for_subscriptions(self, count: int, timeout: float = 5.0) -> bool:
+        """確認済みの購読がcount件になるまで待つ"""
+        with self._changed:
+            return self._changed.wait_for(lambda: len(self.subscriptions) >= count, timeout)
+
+    def publish(self, topic: str, content: bytes, content_type: str = "application/atom+xml") -> int:
+        """
+        トピックの購読者にフィードを配信
+
+        Returns:
+            2xxを返した購読者の数
+        """
+        with self._lock:
+            targets = [(callback, secret) for (t, callback), secret in self.subscriptions.items() if t == topic]
+
+        delivered = 0
+        for callback, secret in targets:
+            headers = {"Content-Type": content_type}
+            if secret:
+                signature = hmac.new(secret.encode("utf-8"), content, hashlib.sha256).hexdigest()
+                headers["X-Hub-Signature"] = f"sha256={signature}"
+
+            response = requests.post(callback, data=content, headers=headers, timeout=5)
+            with self._lock:
+                self.deliveries.append({"topic": topic, "callback": callback, "status": response.status_code})
+                # 410 Goneは購読者側で購読が無い（以後配信しない）
+                if response.status_code == 410:
+                    self.subscriptions.pop((topic, callback), None)
+            if 200 <= response.status_code < 300:
+                delivered += 1
+
+        return delivered
+
+    def _verify(self, params: Dict[str, str]) -> None:
+        """コールバックURLに確認リクエストを送り、challengeが返れば購読を登録・解除"""
+        mode = params["hub.mode"]
+        topic = params["hub.topic"]
+        callback = params["hub.callback"]
+        challenge = secrets.token_urlsafe(16)
+
+        query = {"hub.mode": mode, "hub.topic": topic, "hub.challenge": challenge}
+        if mode == "subscribe":
+            query["hub.lease_seconds"] = str(self.lease_seconds)
+
+        parsed = urlparse(callback)
+        separator = "&" if parsed.query else ""
+        verify_url = urlunparse(parsed._replace(query=parsed.query + separator + urlencode(query)))
+
+        try:
+            response = requests.get(verify_url, timeout=5)
+            verified = response.status_code == 200 and response.text == challenge
+        except requests.exceptions.RequestException:
+            verified = False
+
+        with self._changed:
+            if not verified:
+                self.verification_failures += 1
+            elif mode == "subscribe":
+                self.subscriptions[(topic, callback)] = params.get("hub.secret", "")
+            else:
+                self.subscriptions.pop((topic, callback), None)
+            self._changed.notify_all()
+
+    def _make_handler(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-aliveでヘッダーと本文を別々に書き込むため、Nagleによる遅延（約40ms）を避ける
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                params = {key: values[0] for key, values in form.items()}
+
+                if (
+                    params.get("hub.mode") not in ("subscribe", "unsubscribe")
+                    or not params.get("hub.topic")
+                    or not params.get("hub.callback")
+                ):
+                    self._respond(400, b"invalid request")
+                    return
+
+                with hub._lock:
+                    hub.requests.append(params)
+
+                # 確認は応答後に非同期で行う
+                self._respond(202, b"")
+                threading.Thread(target=hub._verify, args=(params,), daemon=True).start()
+
+            def _respond(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,12 +1,19 @@
 """Main FastAPI application entry point"""
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends
+from typing import Optional
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy.orm import Session
 
 from src.config.database import get_db, init_db
+from src.config.settings import settings
 from src.scheduler import scheduler
+from src.services import notification_job_runner
+from src.utils.metrics import render_metrics
 
 # ロギング設定
 logging.basicConfig(
@@ -36,6 +43,7 @@ async def lifespan(app: FastAPI):
     logger.info("Application shutdown")
     scheduler.stop()
     logger.info("Scheduler stopped")
+    notification_job_runner.shutdown()
 
 
 app = FastAPI(
@@ -70,37 +78,49 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "slack-bot",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "scheduler_leader": scheduler.is_leader
     }
 
 
-@app.post("/trigger-notification")
-async def trigger_notification(db: Session = Depends(get_db)):
+@app.get("/metrics")
+def metrics():
+    """Prometheusのメトリクス（情報源ごとの取得・段階ごとの処理時間など）"""
+    return Response(render_metrics(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+@app.post("/trigger-notification", status_code=202)
+def trigger_notification(force: bool = Query(False, description="クールダウン中でも実行する")):
     """
-    手動で通知を実行するエンドポイント（テスト用）
+    手動で通知を実行するエンドポイント
+
+    通知処理はバックグラウンドのワーカーで実行し、ジョブIDをすぐに返す。
+    実行状況は GET /notification-jobs/{job_id} で確認する。
+    実行中のジョブがある場合やクールダウン中の場合は、そのジョブのIDを返す（coalesced）。
     """
-    from src.services import NotificationService
+    job = notification_job_runner.submit(trigger="manual", force=force)
+    return {
+        "status": "coalesced" if job["coalesced"] else "accepted",
+        "job_id": job["job_id"],
+        "job_status": job["status"],
+        "status_url": f"/notification-jobs/{job['job_id']}"
+    }
 
-    try:
-        service = NotificationService(db)
-        success = service.run()
 
-        if success:
-            return {
-                "status": "success",
-                "message": "Notification sent successfully"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": "Failed to send notification"
-            }
-    except Exception as e:
-        logger.error(f"Error triggering notification: {str(e)}")
-        return {
-            "status": "error",
-            "message": str(e)
-        }
+@app.get("/notification-jobs")
+def get_notification_jobs(limit: int = Query(20, ge=1, le=100)):
+    """通知処理の実行履歴を新しい順に取得"""
+    jobs = notification_job_runner.list_jobs(limit=limit)
+    return {"count": len(jobs), "jobs": jobs}
+
+
+@app.get("/notification-jobs/{job_id}")
+def get_notification_job(job_id: str):
+    """通知処理の実行状況（段階ごとの進捗）を取得"""
+    job = notification_job_runner.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 
 @app.get("/sources")
@@ -124,6 +144,155 @@ async def get_sources(db: Session = Depends(get_db)):
     }
 
 
+@app.get("/channel-routes")
+async def get_channel_routes(db: Session = Depends(get_db)):
+    """チャンネル別の配信ルートの一覧を取得"""
+    from src.models import ChannelRoute
+
+    routes = db.query(ChannelRoute).order_by(ChannelRoute.id).all()
+    return {
+        "count": len(routes),
+        "routes": [
+            {
+                "id": r.id,
+                "name": r.name,
+                "channel_id": r.channel_id,
+                "is_active": r.is_active,
+                "source_ids": [s.id for s in r.sources],
+                "include_keywords": r.get_include_keywords(),
+                "exclude_keywords": r.get_exclude_keywords()
+            }
+            for r in routes
+        ]
+    }
+
+
+@app.get("/websub/subscriptions")
+async def get_websub_subscriptions(db: Session = Depends(get_db)):
+    """WebSubの購読一覧を取得"""
+    from src.services import WebSubService
+
+    subscriptions = WebSubService(db).get_subscriptions()
+    return {
+        "count": len(subscriptions),
+        "subscriptions": [
+            {
+                "source_id": s.source_id,
+                "hub_url": s.hub_url,
+                "topic_url": s.topic_url,
+                "state": s.state,
+                "lease_expires_at": s.lease_expires_at.isoformat() if s.lease_expires_at else None,
+                "last_pushed_at": s.last_pushed_at.isoformat() if s.last_pushed_at else None,
+                "last_error": s.last_error
+            }
+            for s in subscriptions
+        ]
+    }
+
+
+@app.post("/websub/subscriptions/{source_id}")
+def subscribe_websub(source_id: int, db: Session = Depends(get_db)):
+    """
+    WebSubの購読を申し込む（ハブは巡回時に検出したものを使う）
+    """
+    from src.services import WebSubService
+
+    service = WebSubService(db)
+    subscription = service.get_subscription(source_id)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="No WebSub hub discovered for this source")
+
+    if service.subscribe(subscription):
+        return {"status": "success", "message": "Subscription requested"}
+    return {"status": "error", "message": subscription.last_error}
+
+
+@app.delete("/websub/subscriptions/{source_id}")
+def unsubscribe_websub(source_id: int, db: Session = Depends(get_db)):
+    """WebSubの購読解除を申し込む"""
+    from src.services import WebSubService
+
+    service = WebSubService(db)
+    subscription = service.get_subscription(source_id)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+
+    if service.unsubscribe(subscription):
+        return {"status": "success", "message": "Unsubscription requested"}
+    return {"status": "error", "message": subscription.last_error}
+
+
+@app.get("/websub/callback/{source_id}")
+def verify_websub_callback(
+    source_id: int,
+    mode: str = Query(..., alias="hub.mode"),
+    topic: str = Query(..., alias="hub.topic"),
+    challenge: Optional[str] = Query(None, alias="hub.challenge"),
+    lease_seconds: Optional[int] = Query(None, alias="hub.lease_seconds"),
+    reason: Optional[str] = Query(None, alias="hub.reason"),
+    db: Session = Depends(get_db)
+):
+    """
+    ハブからの購読・解除の確認（challengeをそのまま返すと確認となる）
+    """
+    from src.services import WebSubService
+
+    service = WebSubService(db)
+
+    if mode == "denied":
+        service.record_denial(source_id, topic, reason)
+        return PlainTextResponse("")
+
+    if not challenge:
+        raise HTTPException(status_code=400, detail="hub.challenge is required")
+
+    verified = service.verify_intent(source_id, mode, topic, challenge, lease_seconds)
+    if verified is None:
+        raise HTTPException(status_code=404, detail="Unknown subscription")
+    return PlainTextResponse(verified)
+
+
+@app.post("/websub/callback/{source_id}")
+async def receive_websub_content(source_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    ハブから配信されたフィードを受け取り、通知待ちとして保存
+
+    本文は署名の検証前に読み込むため、フィード取得と同じ上限（FETCH_MAX_BYTES）を超えたら
+    読み込みを打ち切って413を返す。
+    """
+    from src.services import WebSubService
+
+    max_bytes = settings.FETCH_MAX_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        logger.warning(f"WebSub content for source {source_id} too large: {content_length} bytes")
+        raise HTTPException(status_code=413, detail="Content too large")
+
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            logger.warning(f"WebSub content for source {source_id} too large: exceeded {max_bytes} bytes")
+            raise HTTPException(status_code=413, detail="Content too large")
+        chunks.append(chunk)
+    body = b"".join(chunks)
+
+    headers = {k.lower(): v for k, v in request.headers.items()}
+
+    try:
+        # パースとDB書き込みはイベントループを塞がないようスレッドで行う
+        staged = await run_in_threadpool(WebSubService(db).receive_content, source_id, body, headers)
+    except Exception as e:
+        logger.error(f"Error handling WebSub content for source {source_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to process content")
+
+    if staged is None:
+        # 購読していないトピック（ハブに配信停止を促す）
+        return Response(status_code=410)
+    return Response(status_code=202)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,5 +1,15 @@
 """Database models"""
 from .rss_source import RSSSource
 from .notified_article import NotifiedArticle
+from .staged_article import StagedArticle
+from .websub_subscription import WebSubSubscription
+from .slack_outbox import SlackOutboxMessage
+from .channel_route import ChannelRoute
+from .channel_notified_article import ChannelNotifiedArticle
+from .notification_job import NotificationJob
+from .fetch_task import FetchTask
 
-__all__ = ["RSSSource", "NotifiedArticle"]
+__all__ = [
+    "RSSSource", "NotifiedArticle", "StagedArticle", "WebSubSubscription", "SlackOutboxMessage",
+    "ChannelRoute", "ChannelNotifiedArticle", "NotificationJob", "FetchTask",
+]
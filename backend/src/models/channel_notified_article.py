@@ -0,0 +1,27 @@
+"""Channel Notified Article model"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, UniqueConstraint
+from src.config.database import Base
+
+
+class ChannelNotifiedArticle(Base):
+    """
+    チャンネルごとの通知済み記事を管理するモデル
+
+    チャンネル別の配信ルート（ChannelRoute）を使う場合の重複判定に使う。
+    同じ記事でも、通知していないチャンネルには別の情報源経由で通知できる。
+    """
+    __tablename__ = "channel_notified_articles"
+    __table_args__ = (
+        UniqueConstraint("channel_id", "url_hash", name="uq_channel_notified_articles_channel_url_hash"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel_id = Column(String(50), nullable=False, comment="通知先チャンネル")
+    url_hash = Column(BigInteger, nullable=False, comment="正規化URLのハッシュ")
+    article_url = Column(Text, nullable=False, comment="記事URL")
+    source_id = Column(Integer, ForeignKey("rss_sources.id"), comment="情報源ID")
+    notified_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="通知日時")
+
+    def __repr__(self):
+        return f"<ChannelNotifiedArticle(channel_id='{self.channel_id}', url='{self.article_url[:50]}...')>"
@@ -0,0 +1,60 @@
+"""Channel Route model"""
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Table
+from sqlalchemy.orm import relationship
+from src.config.database import Base
+
+
+# ルートと情報源の対応（多対多）
+channel_route_sources = Table(
+    "channel_route_sources",
+    Base.metadata,
+    Column("route_id", Integer, ForeignKey("channel_routes.id", ondelete="CASCADE"), primary_key=True),
+    Column("source_id", Integer, ForeignKey("rss_sources.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+def _split_keywords(value: Optional[str]) -> Optional[List[str]]:
+    """カンマ区切りのキーワードをリストに変換（Noneはそのまま）"""
+    if value is None:
+        return None
+    return [kw.strip() for kw in value.split(",") if kw.strip()]
+
+
+class ChannelRoute(Base):
+    """
+    通知先チャンネルごとの配信ルールを管理するモデル
+
+    有効なルートが1件以上ある場合、記事はルールに一致するチャンネルにそれぞれ通知する
+    （ルートが無い場合は従来どおりSLACK_CHANNEL_IDに通知）。
+
+    - sources: 対象の情報源（空の場合は全ての有効な情報源）
+    - include_keywords / exclude_keywords: カンマ区切り。
+      NULLの場合は設定値（INCLUDE_KEYWORDS / EXCLUDE_KEYWORDS）を使い、空文字はキーワード無し
+    """
+    __tablename__ = "channel_routes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False, comment="ルート名（チーム名など）")
+    channel_id = Column(String(50), nullable=False, unique=True, comment="通知先チャンネル")
+    is_active = Column(Boolean, default=True, nullable=False, comment="有効/無効")
+    include_keywords = Column(Text, comment="許可キーワード（カンマ区切り）")
+    exclude_keywords = Column(Text, comment="除外キーワード（カンマ区切り）")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    sources = relationship("RSSSource", secondary=channel_route_sources, backref="channel_routes")
+
+    def get_include_keywords(self) -> Optional[List[str]]:
+        """許可キーワードのリスト（未設定の場合None）"""
+        return _split_keywords(self.include_keywords)
+
+    def get_exclude_keywords(self) -> Optional[List[str]]:
+        """除外キーワードのリスト（未設定の場合None）"""
+        return _split_keywords(self.exclude_keywords)
+
+    def __repr__(self):
+        return f"<ChannelRoute(id={self.id}, name='{self.name}', channel_id='{self.channel_id}')>"
@@ -0,0 +1,40 @@
+"""Fetch Task model"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from src.config.database import Base
+
+
+class FetchTask(Base):
+    """
+    情報源ごとのフィード取得タスクを管理するモデル（取得の作業キュー）
+
+    FETCH_MODE=queueの場合、通知処理（コーディネーター）が取得対象の情報源ごとに登録し、
+    ワーカープロセス（scripts/fetch_worker.py）がSELECT ... FOR UPDATE SKIP LOCKEDで
+    重複なく取り出して取得する。取得した記事は通知待ち（staged_articles）に保存する。
+
+    status:
+        pending: 取得待ち
+        claimed: ワーカーが取得中（停止した場合はタイムアウト後に取得待ちに戻す）
+        done: 取得成功
+        failed: 取得失敗、または試行回数の上限・待ち時間の上限に達した
+    """
+    __tablename__ = "fetch_tasks"
+    __table_args__ = (
+        Index("ix_fetch_tasks_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    round_id = Column(String(36), nullable=False, index=True, comment="通知1回分のID")
+    source_id = Column(Integer, ForeignKey("rss_sources.id"), nullable=False, comment="情報源ID")
+    status = Column(String(20), default="pending", nullable=False, comment="取得状態")
+    attempts = Column(Integer, default=0, nullable=False, comment="取得試行回数")
+    worker = Column(String(255), comment="取得したワーカー（ホスト名:PID）")
+    article_count = Column(Integer, comment="新着記事数")
+    error = Column(Text, comment="エラー内容")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = Column(DateTime, comment="取得を開始した日時")
+    finished_at = Column(DateTime, comment="終了日時")
+
+    def __repr__(self):
+        return f"<FetchTask(id={self.id}, source_id={self.source_id}, status='{self.status}')>"
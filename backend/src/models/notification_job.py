@@ -0,0 +1,62 @@
+"""Notification Job model"""
+import json
+from datetime import datetime
+from typing import Dict
+from sqlalchemy import Column, String, DateTime, Text, Index
+from src.config.database import Base
+
+
+class NotificationJob(Base):
+    """
+    通知処理（NotificationService.run）の実行状況を管理するモデル
+
+    複数のプロセスで動かしても、どのプロセスからでも状況を確認できるようDBに保存する。
+
+    status:
+        queued: 実行待ち
+        running: 実行中（stageが現在の段階）
+        succeeded: 全メッセージを送信できた
+        failed: 失敗した、または未送信のメッセージが残った
+
+    active_keyは実行待ち・実行中のジョブにのみ設定し、ユニーク制約で
+    同時に1つしか実行されないようにする（終了時にNULLに戻す）。
+    """
+    __tablename__ = "notification_jobs"
+    __table_args__ = (
+        Index("ix_notification_jobs_active_key", "active_key", unique=True),
+    )
+
+    id = Column(String(36), primary_key=True, comment="ジョブID")
+    trigger = Column(String(20), nullable=False, comment="manual / scheduled")
+    status = Column(String(20), default="queued", nullable=False, index=True, comment="実行状態")
+    stage = Column(String(30), comment="実行中の段階")
+    stages = Column(Text, comment="段階ごとの開始日時と詳細（JSON）")
+    result = Column(Text, comment="実行結果の集計（JSON）")
+    error = Column(Text, comment="エラー内容")
+    worker = Column(String(255), comment="実行したプロセス（ホスト名:PID）")
+    active_key = Column(String(30), comment="実行待ち・実行中の場合のみ設定")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    started_at = Column(DateTime, comment="開始日時")
+    finished_at = Column(DateTime, comment="終了日時")
+    # 実行中は定期的に更新する（更新が途絶えたジョブは停止したとみなす）
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self) -> Dict:
+        """APIレスポンス用の辞書"""
+        return {
+            "job_id": self.id,
+            "trigger": self.trigger,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": json.loads(self.stages) if self.stages else [],
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "worker": self.worker,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def __repr__(self):
+        return f"<NotificationJob(id='{self.id}', status='{self.status}', stage='{self.stage}')>"
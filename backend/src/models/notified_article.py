@@ -1,8 +1,14 @@
 """Notified Article model"""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey
 from sqlalchemy.orm import relationship
 from src.config.database import Base
+from src.utils.url import url_hash
+
+
+def _default_url_hash(context) -> int:
+    """article_urlからurl_hashを補完（明示的に指定されなかった場合）"""
+    return url_hash(context.get_current_parameters()["article_url"])
 
 
 class NotifiedArticle(Base):
@@ -10,7 +16,16 @@ class NotifiedArticle(Base):
     __tablename__ = "notified_articles"
 
     id = Column(Integer, primary_key=True, index=True)
-    article_url = Column(Text, nullable=False, unique=True, index=True, comment="記事URL")
+    article_url = Column(Text, nullable=False, comment="記事URL")
+    # 正規化URLの64bitハッシュ。重複判定はURL本体ではなくこちらのユニークインデックスで行う
+    url_hash = Column(
+        BigInteger,
+        nullable=False,
+        unique=True,
+        index=True,
+        default=_default_url_hash,
+        comment="正規化URLのハッシュ"
+    )
     title = Column(Text, comment="記事タイトル")
     published_at = Column(DateTime, comment="公開日時")
     notified_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="通知日時")
@@ -1,5 +1,6 @@
 """RSS Source model"""
 from datetime import datetime
+from typing import Optional
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
 from src.config.database import Base
 
@@ -12,8 +13,31 @@ class RSSSource(Base):
     name = Column(String(255), nullable=False, comment="企業名・サイト名")
     url = Column(Text, nullable=False, unique=True, comment="RSS Feed URL")
     is_active = Column(Boolean, default=True, nullable=False, comment="有効/無効")
+
+    # 条件付きGET（If-None-Match / If-Modified-Since）用
+    etag = Column(Text, comment="前回取得時のETag")
+    last_modified = Column(Text, comment="前回取得時のLast-Modified")
+    last_http_status = Column(Integer, comment="前回取得時のHTTPステータス")
+    last_fetched_at = Column(DateTime, comment="前回取得日時")
+
+    # ウォーターマーク（前回までに確認した最新記事）
+    watermark_published_at = Column(DateTime, comment="確認済み最新記事の公開日時")
+    watermark_guid = Column(Text, comment="確認済み最新記事のGUID")
+
+    # 情報源ごとの巡回スケジュール（POLLING_MODE=adaptive）
+    poll_interval_minutes = Column(Integer, comment="巡回間隔（分）")
+    next_poll_at = Column(DateTime, comment="次回巡回日時")
+
+    # サーキットブレーカー（連続失敗時は指数バックオフで取得をスキップ）
+    consecutive_failures = Column(Integer, default=0, nullable=False, server_default="0", comment="連続失敗回数")
+    retry_after = Column(DateTime, comment="この日時まで取得をスキップ")
+
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    def is_circuit_open(self, now: Optional[datetime] = None) -> bool:
+        """連続失敗により取得をスキップ中か"""
+        return self.retry_after is not None and self.retry_after > (now or datetime.utcnow())
+
     def __repr__(self):
         return f"<RSSSource(id={self.id}, name='{self.name}', is_active={self.is_active})>"
@@ -0,0 +1,51 @@
+"""Slack Outbox model"""
+from datetime import datetime
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Index
+from src.config.database import Base
+
+
+class SlackOutboxMessage(Base):
+    """
+    Slackへの送信待ちメッセージを管理するモデル（アウトボックス）
+
+    通知済みの保存と同じトランザクションで登録し、OutboxServiceが送信する。
+
+    state:
+        pending: 送信待ち（next_attempt_at以降に送信）
+        sending: 送信中（送信したワーカーが結果を記録する前に停止した場合はこのまま残る）
+        sent: 送信済み（tsを記録）
+        failed: 再試行の上限に達した、または再試行しても成功しないエラー
+    """
+    __tablename__ = "slack_outbox"
+    __table_args__ = (
+        Index("ix_slack_outbox_state_next_attempt_at", "state", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # 同じメッセージを二重に登録・送信しないためのキー（メッセージメタデータにも付与する）
+    idempotency_key = Column(String(255), nullable=False, unique=True, comment="冪等キー")
+    batch_id = Column(String(36), nullable=False, index=True, comment="通知1回分のID")
+    sequence = Column(Integer, nullable=False, comment="バッチ内の投稿順")
+    kind = Column(String(20), nullable=False, comment="main / header / article / digest / errors")
+    channel_id = Column(String(50), nullable=False, comment="投稿先チャンネル")
+    text = Column(Text, nullable=False, comment="本文")
+    blocks = Column(Text, comment="Block Kitのブロック（JSON）")
+    article_count = Column(Integer, default=0, nullable=False, comment="含まれる記事数")
+    # スレッド親のメッセージ（メイン投稿はNone）
+    parent_id = Column(Integer, ForeignKey("slack_outbox.id"), comment="スレッド親")
+
+    state = Column(String(20), default="pending", nullable=False, comment="送信状態")
+    attempts = Column(Integer, default=0, nullable=False, comment="送信試行回数")
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="次回送信日時")
+    claimed_at = Column(DateTime, comment="送信を開始した日時")
+    claim_token = Column(String(36), index=True, comment="送信を開始したワーカーの識別子")
+    last_error = Column(Text, comment="直近の送信エラー")
+    # 直近の送信がタイムアウト・5xxなどで、Slack上に投稿済みかわからない（再送前に確認する）
+    delivery_unknown = Column(Boolean, default=False, nullable=False, comment="投稿済みか不明")
+    ts = Column(String(32), comment="投稿したメッセージのタイムスタンプ")
+    sent_at = Column(DateTime, comment="送信日時")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<SlackOutboxMessage(id={self.id}, kind='{self.kind}', state='{self.state}')>"
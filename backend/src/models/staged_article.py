@@ -0,0 +1,24 @@
+"""Staged Article model"""
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, DateTime, Text, ForeignKey
+from sqlalchemy.orm import relationship
+from src.config.database import Base
+
+
+class StagedArticle(Base):
+    """巡回で取得し、通知待ちの記事を管理するモデル（ダイジェスト作成時に通知済みへ移動）"""
+    __tablename__ = "staged_articles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    article_url = Column(Text, nullable=False, comment="記事URL")
+    url_hash = Column(BigInteger, nullable=False, unique=True, index=True, comment="正規化URLのハッシュ")
+    title = Column(Text, comment="記事タイトル")
+    published_at = Column(DateTime, comment="公開日時")
+    staged_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="取得日時")
+    source_id = Column(Integer, ForeignKey("rss_sources.id"), comment="情報源ID")
+
+    # Relationship
+    source = relationship("RSSSource", backref="staged_articles")
+
+    def __repr__(self):
+        return f"<StagedArticle(id={self.id}, title='{self.title}', url='{self.article_url[:50]}...')>"
@@ -0,0 +1,49 @@
+"""WebSub Subscription model"""
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy.orm import relationship, backref
+from src.config.database import Base
+
+
+class WebSubSubscription(Base):
+    """
+    情報源ごとのWebSub（PubSubHubbub）購読を管理するモデル
+
+    state:
+        discovered: フィードでハブを検出した（未購読）
+        pending: 購読を申し込み、ハブからの確認待ち
+        subscribed: 購読中（lease_expires_atまで有効）
+        unsubscribing: 購読解除を申し込み、確認待ち
+        unsubscribed: 購読解除済み
+        denied: ハブに拒否された
+    """
+    __tablename__ = "websub_subscriptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_id = Column(Integer, ForeignKey("rss_sources.id"), nullable=False, unique=True, comment="情報源ID")
+    hub_url = Column(Text, nullable=False, comment="ハブのURL")
+    topic_url = Column(Text, nullable=False, comment="トピック（フィード自身）のURL")
+    secret = Column(String(64), comment="配信内容の署名検証用シークレット")
+    state = Column(String(20), default="discovered", nullable=False, comment="購読状態")
+    requested_at = Column(DateTime, comment="購読・解除を申し込んだ日時")
+    lease_expires_at = Column(DateTime, comment="購読期限")
+    last_pushed_at = Column(DateTime, comment="最後に配信を受け取った日時")
+    last_error = Column(Text, comment="直近の申し込みエラー")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    source = relationship("RSSSource", backref=backref("websub_subscription", uselist=False))
+
+    def is_active(self, now: Optional[datetime] = None) -> bool:
+        """購読が有効期限内か（更新の申し込み中も期限までは有効）"""
+        return (
+            self.state in ("subscribed", "pending")
+            and self.lease_expires_at is not None
+            and self.lease_expires_at > (now or datetime.utcnow())
+        )
+
+    def __repr__(self):
+        return f"<WebSubSubscription(source_id={self.source_id}, state='{self.state}', hub='{self.hub_url}')>"
@@ -1,4 +1,5 @@
 """Scheduler module"""
 from .job_scheduler import scheduler, JobScheduler
+from .leader_election import LeaderElection
 
-__all__ = ["scheduler", "JobScheduler"]
+__all__ = ["scheduler", "JobScheduler", "LeaderElection"]
@@ -1,39 +1,94 @@
 """Job scheduler for periodic tasks"""
 import logging
+from typing import Optional
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import pytz
 from src.config.settings import settings
 from src.config.database import SessionLocal
-from src.services import NotificationService
+from src.services import OutboxService, RSSService, WebSubService, notification_job_runner
+from .leader_election import LeaderElection
 
 logger = logging.getLogger(__name__)
 
 
 class JobScheduler:
-    """定期実行ジョブのスケジューラー"""
+    """
+    定期実行ジョブのスケジューラー
 
-    def __init__(self):
+    Webプロセスを複数起動しても各ジョブが1回だけ実行されるよう、
+    スケジューラーは一時停止した状態で起動し、リーダーに選出された
+    プロセスだけがジョブを実行する（LeaderElection）。
+    """
+
+    def __init__(self, leader_election: Optional[LeaderElection] = None):
         self.scheduler = BackgroundScheduler(
             timezone=pytz.timezone(settings.TIMEZONE)
         )
+        self.leader_election = leader_election or LeaderElection()
+
+    @property
+    def is_leader(self) -> bool:
+        """このプロセスがジョブを実行しているか"""
+        return self.leader_election.is_leader
+
+    def _on_elected(self):
+        self.scheduler.resume()
+        logger.info("Scheduler resumed (this process is the leader)")
+
+    def _on_revoked(self):
+        if self.scheduler.running:
+            self.scheduler.pause()
+            logger.info("Scheduler paused (this process is no longer the leader)")
 
     def notification_job(self):
         """通知ジョブ（スケジューラーから呼び出される）"""
         logger.info("Running scheduled notification job")
 
-        db = SessionLocal()
         try:
-            service = NotificationService(db)
-            success = service.run()
+            # 実行状況は手動実行と同じくnotification_jobsに記録する
+            job = notification_job_runner.run(trigger="scheduled")
 
-            if success:
+            if job["status"] == "succeeded":
                 logger.info("Scheduled notification job completed successfully")
             else:
-                logger.error("Scheduled notification job failed")
+                logger.error(f"Scheduled notification job failed: {job['error']}")
 
         except Exception as e:
             logger.error(f"Error in notification job: {str(e)}", exc_info=True)
+
+    def polling_job(self):
+        """巡回ジョブ（POLLING_MODE=adaptive、巡回日時を迎えた情報源のみ取得）"""
+        db = SessionLocal()
+        try:
+            staged_count = RSSService(db).poll_due_sources()
+            if staged_count:
+                logger.info(f"Polling job staged {staged_count} new articles")
+        except Exception as e:
+            logger.error(f"Error in polling job: {str(e)}", exc_info=True)
+        finally:
+            db.close()
+
+    def outbox_delivery_job(self):
+        """アウトボックスの再送ジョブ（送信に失敗・中断したSlackメッセージを送信）"""
+        db = SessionLocal()
+        try:
+            service = OutboxService(db)
+            service.deliver_pending()
+            service.purge_sent()
+        except Exception as e:
+            logger.error(f"Error in outbox delivery job: {str(e)}", exc_info=True)
+        finally:
+            db.close()
+
+    def websub_renewal_job(self):
+        """WebSubの購読の申し込み・更新ジョブ（ENABLE_WEBSUB=true）"""
+        db = SessionLocal()
+        try:
+            WebSubService(db).renew_subscriptions()
+        except Exception as e:
+            logger.error(f"Error in WebSub renewal job: {str(e)}", exc_info=True)
         finally:
             db.close()
 
@@ -56,17 +111,69 @@ class JobScheduler:
             trigger=trigger,
             id="daily_notification",
             name="Daily Tech Blog Notification",
-            replace_existing=True
+            replace_existing=True,
+            # リーダーが停止して引き継いだ直後でも、引き継ぎにかかる時間内なら実行する
+            # （直前にリーダーが実行済みの場合は通知のクールダウンで重複しない）
+            misfire_grace_time=max(60, int(settings.SCHEDULER_LEADER_CHECK_SECONDS * 4)),
+            coalesce=True
+        )
+
+        # アウトボックスの再送ジョブを追加
+        self.scheduler.add_job(
+            self.outbox_delivery_job,
+            trigger=IntervalTrigger(seconds=settings.SLACK_OUTBOX_DELIVERY_INTERVAL_SECONDS),
+            id="outbox_delivery",
+            name="Slack Outbox Delivery",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
 
-        # スケジューラーを開始
-        self.scheduler.start()
+        # 情報源ごとの巡回ジョブを追加（通知ジョブは取得済みの記事をまとめて通知する）
+        if settings.POLLING_MODE == "adaptive":
+            self.scheduler.add_job(
+                self.polling_job,
+                trigger=IntervalTrigger(minutes=settings.POLL_CHECK_INTERVAL_MINUTES),
+                id="feed_polling",
+                name="Adaptive Feed Polling",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            logger.info(
+                f"Adaptive polling enabled. Checking for due sources every "
+                f"{settings.POLL_CHECK_INTERVAL_MINUTES} minutes"
+            )
+
+        # WebSubの購読管理ジョブを追加（配信された記事は通知待ちとして保存されるため巡回モードが必要）
+        if settings.ENABLE_WEBSUB and settings.POLLING_MODE != "adaptive":
+            logger.warning("ENABLE_WEBSUB requires POLLING_MODE=adaptive, WebSub is disabled")
+        elif settings.ENABLE_WEBSUB:
+            self.scheduler.add_job(
+                self.websub_renewal_job,
+                trigger=IntervalTrigger(minutes=settings.WEBSUB_RENEW_CHECK_INTERVAL_MINUTES),
+                id="websub_renewal",
+                name="WebSub Subscription Renewal",
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+            logger.info(
+                f"WebSub enabled. Checking subscriptions every "
+                f"{settings.WEBSUB_RENEW_CHECK_INTERVAL_MINUTES} minutes"
+            )
+
+        # スケジューラーを一時停止した状態で開始し、リーダーに選出されたら再開する
+        self.scheduler.start(paused=True)
+        self.leader_election.start(on_elected=self._on_elected, on_revoked=self._on_revoked)
         logger.info(
             f"Scheduler started. Notification job will run daily at {notification_time} {settings.TIMEZONE}"
+            f" ({'leader' if self.is_leader else 'standby'})"
         )
 
     def stop(self):
-        """スケジューラーを停止"""
+        """スケジューラーを停止（リーダーの場合はロックを解放し、他のプロセスに引き継ぐ）"""
+        self.leader_election.stop()
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Scheduler stopped")
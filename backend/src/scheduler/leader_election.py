@@ -0,0 +1,145 @@
+"""Leader election for the in-process scheduler"""
+import logging
+import threading
+from typing import Callable, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from src.config.database import engine as default_engine
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    複数のプロセスのうち1つだけをスケジューラーの実行担当（リーダー）にする
+
+    PostgreSQLではセッション単位のアドバイザリロック（pg_try_advisory_lock）を
+    専用の接続で保持したプロセスをリーダーとする。リーダーのプロセスが停止すると
+    接続が切れてロックが解放されるため、他のプロセスが次の確認時に引き継ぐ。
+    PostgreSQL以外のDB、またはSCHEDULER_LEADER_ELECTION=localの場合は、
+    常にこのプロセスをリーダーとする（単一プロセスでの運用向け）。
+    """
+
+    def __init__(
+        self,
+        engine: Engine = default_engine,
+        lock_id: Optional[int] = None,
+        check_interval: Optional[float] = None
+    ):
+        self.engine = engine
+        self.lock_id = lock_id if lock_id is not None else settings.SCHEDULER_ADVISORY_LOCK_ID
+        self.check_interval = check_interval or settings.SCHEDULER_LEADER_CHECK_SECONDS
+        self._connection: Optional[Connection] = None
+        self._is_leader = False
+        self._on_elected: Optional[Callable[[], None]] = None
+        self._on_revoked: Optional[Callable[[], None]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def uses_advisory_lock(self) -> bool:
+        """アドバイザリロックで選出するか（Falseの場合は常にリーダー）"""
+        return (
+            settings.SCHEDULER_LEADER_ELECTION != "local"
+            and self.engine.dialect.name == "postgresql"
+        )
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self, on_elected: Callable[[], None], on_revoked: Callable[[], None]) -> None:
+        """
+        リーダー選出を開始する
+
+        Args:
+            on_elected: リーダーになった時に呼び出す
+            on_revoked: リーダーでなくなった時に呼び出す（DB接続が切れた場合など）
+        """
+        self._on_elected = on_elected
+        self._on_revoked = on_revoked
+
+        if not self.uses_advisory_lock:
+            logger.info(
+                "Scheduler leader election is not used (local mode or non-PostgreSQL database), "
+                "running scheduler in this process"
+            )
+            self._set_leader(True)
+            return
+
+        self._stop.clear()
+        # 起動直後に1回確認し、以降はcheck_intervalごとに確認する
+        self._check()
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader-election", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """リーダー選出を停止し、保持しているロックを解放"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval)
+            self._thread = None
+
+        if self._connection is not None:
+            if self._is_leader:
+                try:
+                    self._connection.execute(
+                        text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": self.lock_id}
+                    )
+                except Exception as e:
+                    logger.warning(f"Failed to release scheduler leader lock: {str(e)}")
+            self._close_connection()
+        self._set_leader(False)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            self._check()
+
+    def _check(self) -> None:
+        """ロックの取得を試みる（リーダーの場合は保持している接続が生きているか確認）"""
+        try:
+            if self._connection is None:
+                # ロックは接続に紐づくため、プールに戻さない専用の接続を自動コミットで保持する
+                self._connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+            if self._is_leader:
+                self._connection.execute(text("SELECT 1"))
+                return
+
+            acquired = self._connection.execute(
+                text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id}
+            ).scalar()
+            if acquired:
+                logger.info(f"Acquired scheduler leader lock {self.lock_id}, this process runs the scheduler")
+                self._set_leader(True)
+
+        except Exception as e:
+            # 接続が切れた場合はロックも解放されているため、リーダーを降りて再接続から試みる
+            logger.warning(f"Scheduler leader election check failed: {str(e)}")
+            self._close_connection()
+            if self._is_leader:
+                logger.warning("Lost scheduler leader lock, pausing scheduler in this process")
+                self._set_leader(False)
+
+    def _set_leader(self, is_leader: bool) -> None:
+        if is_leader == self._is_leader:
+            return
+        self._is_leader = is_leader
+        callback = self._on_elected if is_leader else self._on_revoked
+        if callback is not None:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in scheduler leader election callback: {str(e)}", exc_info=True)
+
+    def _close_connection(self) -> None:
+        """接続をプールに戻さずに閉じる（ロックを保持したまま再利用されないように）"""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            connection.invalidate()
+            connection.close()
+        except Exception:
+            pass
@@ -1,6 +1,14 @@
 """Services module"""
 from .rss_service import RSSService
 from .slack_service import SlackService
+from .outbox_service import OutboxService
+from .channel_router import ChannelRouter
+from .fetch_queue_service import FetchQueueService
 from .notification_service import NotificationService
+from .notification_job_runner import NotificationJobRunner, notification_job_runner
+from .websub_service import WebSubService
 
-__all__ = ["RSSService", "SlackService", "NotificationService"]
+__all__ = [
+    "RSSService", "SlackService", "OutboxService", "ChannelRouter", "FetchQueueService", "NotificationService",
+    "NotificationJobRunner", "notification_job_runner", "WebSubService",
+]
@@ -0,0 +1,173 @@
+"""Routing of new articles to per-team Slack channels"""
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+from src.config.settings import settings
+from src.models import ChannelRoute, RSSSource
+from src.utils.url import url_hash
+from .keyword_matcher import KeywordMatcher
+from .rss_service import RSSService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RoutedArticles:
+    """1チャンネル分の通知内容（routeがNoneの場合はSLACK_CHANNEL_IDに通知）"""
+    route: Optional[ChannelRoute]
+    articles: List[Dict] = field(default_factory=list)
+    total_sources: int = 0
+    successful_sources: int = 0
+    errors: List[Dict] = field(default_factory=list)
+
+    @property
+    def channel_id(self) -> Optional[str]:
+        return self.route.channel_id if self.route else None
+
+
+class ChannelRouter:
+    """
+    新着記事をチャンネル別の配信ルート（ChannelRoute）に振り分ける
+
+    フィードの取得・パースは全ルートの対象情報源をまとめて1回だけ行い、
+    その結果をルートごとに情報源・キーワードで絞り込む。
+    通知済みの判定はチャンネルと記事の組（ChannelNotifiedArticle）で行う。
+    ルートの作成前に通知した記事（notified_articles）は、新しいルートにも通知済みとみなす
+    （追加したルートに期間内の記事がまとめて投稿されないように）。
+    """
+
+    def __init__(self, db: Session, rss_service: Optional[RSSService] = None):
+        self.db = db
+        self.rss_service = rss_service or RSSService(db)
+
+    def get_routes(self) -> List[ChannelRoute]:
+        """有効な配信ルートを取得（RSSServiceの絞り込みもルートの有無に合わせる）"""
+        routes = self.db.query(ChannelRoute).filter(
+            ChannelRoute.is_active == True
+        ).order_by(ChannelRoute.id).all()
+        self.rss_service.channel_routing_enabled = bool(routes)
+        return routes
+
+    @staticmethod
+    def _route_source_ids(route: ChannelRoute) -> Optional[Set[int]]:
+        """ルートの対象情報源のID（全ての情報源が対象の場合None）"""
+        if not route.sources:
+            return None
+        return {source.id for source in route.sources if source.is_active}
+
+    def get_sources_to_fetch(self, routes: List[ChannelRoute]) -> List[RSSSource]:
+        """
+        いずれかのルートの対象となる有効な情報源を取得
+
+        Args:
+            routes: 配信ルート
+
+        Returns:
+            取得対象の情報源（複数のルートの対象でも1件）
+        """
+        sources = self.rss_service.get_active_sources()
+        source_ids: Set[int] = set()
+        for route in routes:
+            route_source_ids = self._route_source_ids(route)
+            if route_source_ids is None:
+                return sources
+            source_ids |= route_source_ids
+        return [source for source in sources if source.id in source_ids]
+
+    @staticmethod
+    def build_matcher(route: ChannelRoute) -> Optional[KeywordMatcher]:
+        """
+        ルートのキーワードフィルタを生成
+
+        ルートでキーワードを指定していない項目は設定値を使う
+        （設定値はENABLE_KEYWORD_FILTERが有効な場合のみ）。
+
+        Returns:
+            KeywordMatcher、絞り込まない場合None
+        """
+        include_keywords = route.get_include_keywords()
+        exclude_keywords = route.get_exclude_keywords()
+        if settings.ENABLE_KEYWORD_FILTER:
+            if include_keywords is None:
+                include_keywords = settings.INCLUDE_KEYWORDS
+            if exclude_keywords is None:
+                exclude_keywords = settings.EXCLUDE_KEYWORDS
+
+        if not include_keywords and not exclude_keywords:
+            return None
+        return KeywordMatcher(exclude_keywords=exclude_keywords or (), include_keywords=include_keywords or ())
+
+    def route_articles(
+        self,
+        routes: List[ChannelRoute],
+        articles: List[Dict],
+        stats: Dict
+    ) -> List[RoutedArticles]:
+        """
+        記事をルートごとに振り分ける
+
+        Args:
+            routes: 配信ルート
+            articles: get_new_articles / get_staged_articlesで取得した記事
+            stats: 同じく統計情報（"successful_source_ids" を含む）
+
+        Returns:
+            ルートごとの通知内容（記事が0件のルートも含む）
+        """
+        hashed_articles = [(article, url_hash(article["article_url"])) for article in articles]
+        successful_ids = set(stats.get("successful_source_ids", []))
+        errors = stats.get("errors", [])
+
+        results = []
+        for route in routes:
+            source_ids = self._route_source_ids(route)
+            matcher = self.build_matcher(route)
+
+            candidates = [
+                (article, article_hash) for article, article_hash in hashed_articles
+                if (source_ids is None or article["source_id"] in source_ids)
+                and (matcher is None or matcher.is_allowed(article.get("title", "")))
+            ]
+
+            candidate_urls = [article["article_url"] for article, _ in candidates]
+            notified_urls = self.rss_service.get_notified_urls(candidate_urls, channel_id=route.channel_id)
+            if route.created_at is not None:
+                notified_urls |= self.rss_service.get_notified_urls(
+                    (url for url in candidate_urls if url not in notified_urls),
+                    notified_before=route.created_at
+                )
+
+            # 複数の情報源に同じ記事がある場合は1件にまとめる
+            selected = []
+            seen_hashes: Set[int] = set()
+            for article, article_hash in candidates:
+                if article["article_url"] in notified_urls or article_hash in seen_hashes:
+                    continue
+                seen_hashes.add(article_hash)
+                selected.append(article)
+
+            routed = RoutedArticles(route=route, articles=selected)
+            if source_ids is None:
+                routed.total_sources = stats.get("total_sources", 0)
+                routed.successful_sources = stats.get("successful_sources", 0)
+                routed.errors = errors
+            else:
+                names = {source.name for source in route.sources if source.is_active}
+                routed.total_sources = len(source_ids)
+                routed.successful_sources = len(source_ids & successful_ids)
+                routed.errors = [error for error in errors if error.get("source_name") in names]
+
+            logger.info(
+                f"Routed {len(selected)} articles to {route.name} ({route.channel_id}), "
+                f"{len(candidates) - len(selected)} already notified"
+            )
+            results.append(routed)
+
+        return results
+
+    def mark_as_notified(self, routed: List[RoutedArticles]) -> None:
+        """振り分けた記事をチャンネルごとに通知済みとして保存（コミットは呼び出し元が行う）"""
+        for item in routed:
+            if item.route and item.articles:
+                self.rss_service.mark_as_notified_in_channel(item.route.channel_id, item.articles, commit=False)
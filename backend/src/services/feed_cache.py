@@ -0,0 +1,266 @@
+"""Content-addressed on-disk cache of raw feed responses"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from src.config.settings import settings
+from .http_client import FeedResponse
+
+logger = logging.getLogger(__name__)
+
+
+class FeedCache:
+    """
+    取得したフィードの生データをディスクに保存するキャッシュ
+
+    本文はgzip圧縮し、内容のSHA-256をファイル名として保存する（objects/）。
+    URLごとのインデックス（index/）が最新の本文ハッシュとレスポンスヘッダーを指す。
+    同じ内容の本文は1つだけ保存される。
+
+    FEED_CACHE_MODE:
+        record: 取得したフィードを保存する
+        replay: ネットワークにアクセスせず、保存済みのフィードのみを使う
+
+    削除（evict）はディレクトリ全体を走査するため、取得のたびには行わない。
+    保存した本文のサイズを数えておき、上限を超えたときかEVICT_INTERVAL_SECONDSごとに実行する。
+    """
+
+    # 期限切れのエントリを削除する間隔（サイズ上限を超えた場合はすぐに削除する）
+    EVICT_INTERVAL_SECONDS = 60 * 60
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: float):
+        self.directory = Path(directory)
+        self.objects_dir = self.directory / "objects"
+        self.index_dir = self.directory / "index"
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+        # 本文の合計サイズの見積もり（起動後の最初の削除で実際の値になる）と最後に削除した時刻
+        self._total_bytes: Optional[int] = None
+        self._last_evicted_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls) -> Optional["FeedCache"]:
+        """設定値から生成（FEED_CACHE_MODEがoffの場合None）"""
+        if settings.FEED_CACHE_MODE not in ("record", "replay"):
+            return None
+        return cls(
+            directory=settings.FEED_CACHE_DIR,
+            max_bytes=settings.FEED_CACHE_MAX_BYTES,
+            max_age_seconds=settings.FEED_CACHE_MAX_AGE_DAYS * 24 * 60 * 60
+        )
+
+    @property
+    def replay(self) -> bool:
+        """リプレイモードか"""
+        return settings.FEED_CACHE_MODE == "replay"
+
+    def _index_path(self, url: str) -> Path:
+        return self.index_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _object_path(self, content_hash: str) -> Path:
+        return self.objects_dir / f"{content_hash}.gz"
+
+    @staticmethod
+    def _atomic_write(path: Path, data: bytes) -> None:
+        """一時ファイルに書いてから置き換える（並行取得時に壊れたファイルを読まないため）"""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def store(self, response: FeedResponse, url: Optional[str] = None) -> str:
+        """
+        フィードを保存
+
+        Args:
+            response: 取得結果
+            url: キャッシュキーとするURL（省略時はresponse.url）
+
+        Returns:
+            本文のハッシュ
+        """
+        content_hash = hashlib.sha256(response.content).hexdigest()
+
+        object_path = self._object_path(content_hash)
+        if not object_path.exists():
+            compressed = gzip.compress(response.content)
+            self._atomic_write(object_path, compressed)
+            with self._lock:
+                if self._total_bytes is not None:
+                    self._total_bytes += len(compressed)
+
+        entry = {
+            "url": url or response.url,
+            "final_url": response.url,
+            "content_hash": content_hash,
+            "status_code": response.status_code,
+            "headers": response.headers,
+            "stored_at": time.time()
+        }
+        self._atomic_write(
+            self._index_path(url or response.url),
+            json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        )
+        return content_hash
+
+    def record_not_modified(self, url: str, response: FeedResponse) -> None:
+        """
+        304 Not Modifiedをインデックスに記録
+
+        保存済みの本文が最新であることを確認できた場合は保存日時を更新する。
+        ETagが保存時と異なる（サーバー側の最新版を保存していない）場合や、
+        本文を保存していない場合は、リプレイ時に古い内容・欠落になることを警告する。
+
+        Args:
+            url: フィードURL
+            response: 304の取得結果
+        """
+        index_path = self._index_path(url)
+        try:
+            entry = json.loads(index_path.read_bytes())
+        except FileNotFoundError:
+            logger.warning(f"Feed not modified but its body is not cached, replay will skip it: {url}")
+            return
+        except Exception as e:
+            logger.warning(f"Broken feed cache entry for {url}: {str(e)}")
+            return
+
+        etag = response.headers.get("etag")
+        cached_etag = entry["headers"].get("etag")
+        entry["stale"] = bool(etag and cached_etag and etag != cached_etag)
+        if entry["stale"]:
+            logger.warning(f"Feed not modified but the cached body is older ({cached_etag} != {etag}): {url}")
+        else:
+            entry["stored_at"] = time.time()
+
+        self._atomic_write(index_path, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def load(self, url: str) -> Optional[FeedResponse]:
+        """
+        保存済みのフィードを取得
+
+        Args:
+            url: フィードURL
+
+        Returns:
+            FeedResponse、保存されていない場合None
+        """
+        try:
+            entry = json.loads(self._index_path(url).read_bytes())
+            content = gzip.decompress(self._object_path(entry["content_hash"]).read_bytes())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Broken feed cache entry for {url}: {str(e)}")
+            return None
+
+        if entry.get("stale"):
+            logger.warning(f"Replaying a cached feed older than the last fetched version: {url}")
+
+        return FeedResponse(
+            url=entry.get("final_url", url),
+            status_code=entry["status_code"],
+            headers=entry["headers"],
+            content=content
+        )
+
+    def maybe_evict(self) -> bool:
+        """
+        必要な場合だけevict()を実行
+
+        起動後の最初の呼び出し、合計サイズの見積もりがmax_bytesを超えた場合、
+        前回の削除からEVICT_INTERVAL_SECONDS経った場合に実行する。
+
+        Returns:
+            実行した場合True
+        """
+        with self._lock:
+            due = (
+                self._total_bytes is None
+                or self._total_bytes > self.max_bytes
+                or time.monotonic() - self._last_evicted_at >= self.EVICT_INTERVAL_SECONDS
+            )
+        if due:
+            self.evict()
+        return due
+
+    def evict(self) -> None:
+        """
+        古いエントリとサイズ上限を超えた分を削除
+
+        1. max_age_secondsより古いインデックスを削除
+        2. どのインデックスからも参照されない本文を削除
+        3. 合計サイズがmax_bytesを超える場合、古いインデックスから順に削除
+        """
+        now = time.time()
+        entries = []
+
+        for index_path in self.index_dir.glob("*.json"):
+            try:
+                entry = json.loads(index_path.read_bytes())
+            except Exception:
+                index_path.unlink(missing_ok=True)
+                continue
+
+            if now - entry.get("stored_at", 0) > self.max_age_seconds:
+                index_path.unlink(missing_ok=True)
+                continue
+            entries.append((entry.get("stored_at", 0), index_path, entry["content_hash"]))
+
+        referenced = {content_hash for _, _, content_hash in entries}
+        object_sizes = {}
+        for object_path in self.objects_dir.glob("*.gz"):
+            content_hash = object_path.name[:-len(".gz")]
+            if content_hash not in referenced:
+                object_path.unlink(missing_ok=True)
+            else:
+                object_sizes[content_hash] = object_path.stat().st_size
+
+        total_bytes = sum(object_sizes.values())
+        if total_bytes <= self.max_bytes:
+            self._set_evicted(total_bytes)
+            return
+
+        # 古い順に削除（同じ本文を参照する他のインデックスが残っていれば本文は残す）
+        entries.sort()
+        remaining_refs = {}
+        for _, _, content_hash in entries:
+            remaining_refs[content_hash] = remaining_refs.get(content_hash, 0) + 1
+
+        for _, index_path, content_hash in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            index_path.unlink(missing_ok=True)
+            remaining_refs[content_hash] -= 1
+            if remaining_refs[content_hash] == 0:
+                self._object_path(content_hash).unlink(missing_ok=True)
+                total_bytes -= object_sizes.get(content_hash, 0)
+
+        self._set_evicted(total_bytes)
+        logger.info(f"Feed cache evicted down to {total_bytes} bytes")
+
+    def _set_evicted(self, total_bytes: int) -> None:
+        """削除後の合計サイズと時刻を記録"""
+        with self._lock:
+            self._total_bytes = total_bytes
+            self._last_evicted_at = time.monotonic()
+
+
+# 設定値から生成した共有キャッシュ（無効な場合None）
+feed_cache = FeedCache.from_settings()
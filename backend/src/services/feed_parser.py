@@ -0,0 +1,402 @@
+"""Feed parsing: streaming fast path with feedparser fallback and process-pool offloading"""
+import atexit
+import calendar
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from xml.parsers import expat
+import feedparser
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# (link, title, published_parsed, guid)
+CompactEntry = Tuple[Optional[str], Optional[str], Optional[Tuple[int, ...]], Optional[str]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def parse_compact(content: bytes, response_headers: Dict[str, str]) -> Dict:
+    """
+    feedparserでパースし、使用するフィールドだけを抜き出す
+
+    プロセスプールのワーカーで実行されるため、戻り値はpickle可能な
+    小さなデータ（FeedParserDictのツリーを丸ごと返さない）にする。
+
+    Args:
+        content: フィード本文
+        response_headers: レスポンスヘッダー（小文字キー）
+
+    Returns:
+        {"entries": [CompactEntry, ...], "bozo": bool, "bozo_exception": str or None,
+         "hub": WebSubハブのURL or None, "self": フィード自身のURL or None}
+    """
+    feed = feedparser.parse(content, response_headers=response_headers)
+
+    links = {"hub": None, "self": None}
+    for link in feed.feed.get("links", []):
+        if link.get("rel") in links and link.get("href") and links[link["rel"]] is None:
+            links[link["rel"]] = link["href"]
+
+    entries: List[CompactEntry] = []
+    for entry in feed.entries:
+        published = entry.get("published_parsed")
+        entries.append((
+            entry.get("link"),
+            entry.get("title"),
+            tuple(published) if published else None,
+            entry.get("id")
+        ))
+
+    return {
+        "entries": entries,
+        "bozo": bool(feed.bozo),
+        "bozo_exception": str(feed.get("bozo_exception")) if feed.bozo else None,
+        **links
+    }
+
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RSS1_NS = "http://purl.org/rss/1.0/"
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+XML_BASE = "http://www.w3.org/XML/1998/namespace base"
+
+
+class _Fallback(Exception):
+    """高速パーサーで扱えないフィード（feedparserで処理する）"""
+
+
+class _StopParsing(Exception):
+    """期間外の記事が続いたため打ち切り"""
+
+
+# feedparserと同じ結果になる書式だけを高速パーサーで扱う（それ以外はfeedparserに任せる）
+RFC822_DATE = re.compile(
+    r"(?:[A-Za-z]{3}, )?\d{1,2} [A-Za-z]{3} \d{2,4} \d{1,2}:\d{2}(?::\d{2})? (?:[+-]\d{4}|[A-Za-z]{1,5})"
+)
+W3CDTF_DATE = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})?)?"
+)
+
+
+def _parse_published(value: str) -> time.struct_time:
+    """
+    公開日時をfeedparserのpublished_parsedと同じUTCのstruct_timeに変換
+
+    RSSのpubDate（RFC 822）とAtomのpublished（ISO 8601）を扱う。
+    どちらでも解釈できない日付はfeedparserに任せる。
+
+    Args:
+        value: pubDate / publishedの文字列
+
+    Returns:
+        UTCのstruct_time
+
+    Raises:
+        _Fallback: 解釈できない日付の場合
+    """
+    value = value.strip()
+    try:
+        if RFC822_DATE.fullmatch(value):
+            published = parsedate_to_datetime(value)
+        elif W3CDTF_DATE.fullmatch(value):
+            published = datetime.fromisoformat(value)
+        else:
+            raise ValueError(value)
+    except (TypeError, ValueError):
+        raise _Fallback(f"unsupported date: {value!r}")
+
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc)
+    return published.utctimetuple()
+
+
+class _FastFeedHandler:
+    """
+    expatのイベントからエントリのlink / title / 公開日時 / GUIDだけを集める
+
+    feedparserの結果と揃えるため、RSSでlinkがない場合はisPermaLinkなGUIDをlinkとして扱い、
+    RSS 1.0ではrdf:aboutをGUIDとする。
+    公開日時はRSSのpubDateとAtomのpublishedのみ（updatedは使わない）。
+    """
+
+    def __init__(self, cutoff: Optional[time.struct_time], stop_after_old: int):
+        self.cutoff = calendar.timegm(cutoff) if cutoff else None
+        self.stop_after_old = stop_after_old
+        self.format: Optional[str] = None
+        self.entries: List[CompactEntry] = []
+        self.stopped_early = False
+        # フィード直下の<atom:link rel="hub|self">（WebSubの購読に使う）
+        self.links: Dict[str, Optional[str]] = {"hub": None, "self": None}
+
+        self._entry: Optional[Dict] = None
+        self._entry_depth = 0
+        self._depth = 0
+        self._field: Optional[str] = None
+        self._text: List[str] = []
+        self._old_streak = 0
+
+    def start(self, name: str, attrs: Dict[str, str]) -> None:
+        self._depth += 1
+
+        if XML_BASE in attrs:
+            raise _Fallback("xml:base")
+
+        if self.format is None:
+            if name == "rss":
+                self.format = "rss"
+            elif name == f"{RDF_NS} RDF":
+                self.format = "rss1"
+            elif name == f"{ATOM_NS} feed":
+                self.format = "atom"
+            else:
+                raise _Fallback(f"unsupported root element: {name}")
+            return
+
+        if self._entry is None:
+            if name == f"{ATOM_NS} link":
+                rel = attrs.get("rel")
+                if rel in self.links and self.links[rel] is None and attrs.get("href"):
+                    self.links[rel] = attrs["href"].strip()
+                return
+            if (
+                (self.format == "rss" and name == "item")
+                or (self.format == "rss1" and name == f"{RSS1_NS} item")
+                or (self.format == "atom" and name == f"{ATOM_NS} entry")
+            ):
+                self._entry = {}
+                self._entry_depth = self._depth
+                if self.format == "rss1" and f"{RDF_NS} about" in attrs:
+                    self._entry["guid"] = attrs[f"{RDF_NS} about"]
+            return
+
+        # エントリの直下の要素のみ扱う（<source>内のtitleなどは無視）
+        if self._depth != self._entry_depth + 1:
+            return
+
+        field = self._field_name(name, attrs)
+        if field:
+            self._field = field
+            self._text = []
+
+    def _field_name(self, name: str, attrs: Dict[str, str]) -> Optional[str]:
+        if self.format == "rss":
+            if name == "guid":
+                self._entry["guid_is_permalink"] = attrs.get("isPermaLink", "true").lower() != "false"
+            return {"title": "title", "link": "link", "guid": "guid", "pubDate": "published"}.get(name)
+
+        if self.format == "rss1":
+            return {f"{RSS1_NS} title": "title", f"{RSS1_NS} link": "link"}.get(name)
+
+        # Atom
+        if name == f"{ATOM_NS} link":
+            if attrs.get("rel", "alternate") == "alternate" and "link" not in self._entry:
+                self._entry["link"] = attrs.get("href", "").strip()
+            return None
+        if name == f"{ATOM_NS} title":
+            if attrs.get("type", "text") != "text":
+                raise _Fallback("non-text atom title")
+            return "title"
+        return {f"{ATOM_NS} id": "guid", f"{ATOM_NS} published": "published"}.get(name)
+
+    def end(self, name: str) -> None:
+        if self._entry is not None:
+            if self._field and self._depth == self._entry_depth + 1:
+                self._entry.setdefault(self._field, "".join(self._text).strip())
+                self._field = None
+            elif self._depth == self._entry_depth:
+                self._finish_entry()
+        self._depth -= 1
+
+    def data(self, text: str) -> None:
+        if self._field:
+            self._text.append(text)
+
+    def _finish_entry(self) -> None:
+        entry, self._entry = self._entry, None
+
+        link = entry.get("link")
+        guid = entry.get("guid")
+        if not link and guid and entry.get("guid_is_permalink", True) and self.format == "rss":
+            link = guid
+        if link and "://" not in link:
+            raise _Fallback("relative link")
+
+        published = _parse_published(entry["published"]) if entry.get("published") else None
+        self.entries.append((link, entry.get("title"), tuple(published) if published else None, guid))
+
+        # 期間外の記事が一定数続いたら、以降も古い記事とみなして打ち切る
+        if self.cutoff is not None and published and calendar.timegm(published) < self.cutoff:
+            self._old_streak += 1
+            if self._old_streak >= self.stop_after_old:
+                self.stopped_early = True
+                raise _StopParsing()
+        else:
+            self._old_streak = 0
+
+
+def parse_fast(content: bytes, cutoff: Optional[datetime] = None) -> Optional[Dict]:
+    """
+    expatでフィードを逐次パースし、使用するフィールドだけを抜き出す
+
+    feedparserのサニタイズや正規化を省くため高速だが、RSS 2.0 / RSS 1.0 / Atom 1.0の
+    素直なフィードのみ対応する。壊れたXML、expat非対応の文字コード（Shift_JISなど）、
+    相対URL、HTML形式のAtomタイトルなどはNoneを返し、feedparserに任せる。
+
+    Args:
+        content: フィード本文
+        cutoff: この日時（UTC）より古い記事が続いたら打ち切る
+
+    Returns:
+        parse_compactと同じ形式の辞書、対応できない場合None
+    """
+    handler = _FastFeedHandler(
+        cutoff.utctimetuple() if cutoff else None,
+        settings.FAST_PARSE_STOP_AFTER_OLD
+    )
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.data
+    parser.buffer_text = True
+
+    try:
+        chunk_size = 64 * 1024
+        for i in range(0, len(content), chunk_size):
+            parser.Parse(content[i:i + chunk_size], False)
+        parser.Parse(b"", True)
+    except _StopParsing:
+        pass
+    except (_Fallback, expat.ExpatError, LookupError, ValueError) as e:
+        logger.debug(f"Fast feed parser fallback: {str(e)}")
+        return None
+
+    if handler.format is None or not handler.entries:
+        return None
+
+    return {"entries": handler.entries, "bozo": False, "bozo_exception": None, **handler.links}
+
+
+def to_feed(compact: Dict) -> feedparser.FeedParserDict:
+    """
+    parse_compactの結果をFeedParserDictに戻す
+
+    RSSServiceの既存処理（entry.get("link") / entry.published_parsed など）が
+    そのまま使えるよう、値のあるキーだけを持つエントリを作る。
+    """
+    entries = []
+    for link, title, published, guid in compact["entries"]:
+        entry = feedparser.FeedParserDict()
+        if link:
+            entry["link"] = link
+        if title is not None:
+            entry["title"] = title
+        if published:
+            entry["published_parsed"] = time.struct_time(published)
+        if guid:
+            entry["id"] = guid
+        entries.append(entry)
+
+    feed = feedparser.FeedParserDict(entries=entries, bozo=compact["bozo"])
+    if compact["bozo"]:
+        feed["bozo_exception"] = compact["bozo_exception"]
+    if compact.get("hub"):
+        feed["hub"] = compact["hub"]
+    if compact.get("self"):
+        feed["self"] = compact["self"]
+    return feed
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """パース用のプロセスプールを取得（PARSE_WORKERS=0の場合None）"""
+    global _pool
+
+    if settings.PARSE_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            # スレッドを持つプロセス（uvicorn・APScheduler）からforkすると
+            # デッドロックの恐れがあるため、forkserverでワーカーを起動する
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("forkserver")
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    """ワーカーが異常終了したプールを破棄（次回呼び出し時に作り直す）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def shutdown_pool() -> None:
+    """プロセスプールを終了"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def parse_feed(
+    content: bytes,
+    response_headers: Dict[str, str],
+    cutoff: Optional[datetime] = None
+) -> feedparser.FeedParserDict:
+    """
+    フィードをパース
+
+    まず高速パーサー（ENABLE_FAST_PARSER）を試し、扱えないフィードはfeedparserで処理する。
+    feedparserの場合、PARSE_PROCESS_MIN_BYTES以上の大きなフィードはプロセスプールで
+    パースし、GILを取り合わずに複数コアで処理する。小さなフィードはプロセス間通信の
+    オーバーヘッドの方が大きいため、呼び出し元のスレッドでパースする。
+    いずれの場合も、メインプロセスには使用するフィールドだけを残す。
+
+    Args:
+        content: フィード本文
+        response_headers: レスポンスヘッダー（小文字キー）
+        cutoff: 高速パーサーで、この日時（UTC）より古い記事が続いたら打ち切る
+
+    Returns:
+        feedparser.FeedParserDict（entriesはlink / title / published_parsed / idのみ、
+        "parser"にどちらのパーサーを使ったか、WebSubに対応したフィードでは"hub" / "self"を設定）
+    """
+    if settings.ENABLE_FAST_PARSER:
+        compact = parse_fast(content, cutoff)
+        if compact is not None:
+            feed = to_feed(compact)
+            feed["parser"] = "fast"
+            return feed
+
+    pool = _get_pool() if len(content) >= settings.PARSE_PROCESS_MIN_BYTES else None
+
+    compact = None
+    if pool is not None:
+        try:
+            compact = pool.submit(parse_compact, content, response_headers).result()
+        except BrokenProcessPool:
+            logger.warning("Feed parser process pool is broken, parsing in-process")
+            _reset_pool()
+
+    if compact is None:
+        compact = parse_compact(content, response_headers)
+
+    feed = to_feed(compact)
+    feed["parser"] = "feedparser"
+    return feed
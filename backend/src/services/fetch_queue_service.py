@@ -0,0 +1,297 @@
+"""Sharded feed fetching through a database work queue"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.models import FetchTask, RSSSource
+from .rss_service import RSSService
+
+logger = logging.getLogger(__name__)
+
+
+class FetchQueueService:
+    """
+    フィードの取得を作業キュー（fetch_tasksテーブル）経由で複数のプロセスに分散する
+
+    - コーディネーター（通知処理）がrun_roundで情報源ごとのタスクを登録し、
+      全タスクが終わるまで自身もワーカーとして取得に加わる
+    - ワーカー（scripts/fetch_worker.py）はclaimでタスクをFETCH_QUEUE_CLAIM_SIZE件ずつ
+      SELECT ... FOR UPDATE SKIP LOCKEDで取り出し、RSSServiceで取得・パース・絞り込みを行い、
+      新着記事を通知待ち（staged_articles）に保存する
+    - 通知待ちの記事は、巡回モードと同じくget_staged_articlesでまとめてダイジェストにする
+
+    取得はタスクごとに別のセッションで行い、呼び出し元のトランザクションには含めない。
+    """
+
+    # タスクの最大試行回数（ワーカーが停止して取得待ちに戻した回数を含む）
+    MAX_ATTEMPTS = 3
+    # タスクが空の場合に、次に確認するまでの間隔（秒）
+    POLL_SECONDS = 1
+
+    def __init__(self, db: Session, session_factory: Callable[[], Session] = SessionLocal):
+        self.db = db
+        self.session_factory = session_factory
+
+    @property
+    def worker_name(self) -> str:
+        """ワーカーの識別子（fork後に変わるため都度取得）"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def enqueue(self, sources: List[RSSSource]) -> str:
+        """
+        情報源ごとの取得タスクを登録し、終了した過去のタスクを削除
+
+        Args:
+            sources: 取得対象の情報源
+
+        Returns:
+            登録したラウンドのID
+        """
+        round_id = str(uuid.uuid4())
+        try:
+            self.db.query(FetchTask).filter(
+                FetchTask.status.in_(["done", "failed"])
+            ).delete(synchronize_session=False)
+            self.db.bulk_insert_mappings(FetchTask, [
+                {"round_id": round_id, "source_id": source.id, "status": "pending", "attempts": 0}
+                for source in sources
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        logger.info(f"Queued {len(sources)} fetch tasks (round {round_id})")
+        return round_id
+
+    def claim(self, db: Session, limit: Optional[int] = None) -> List[FetchTask]:
+        """
+        取得待ちのタスクを取り出す
+
+        PostgreSQLではFOR UPDATE SKIP LOCKEDで他のワーカーが選んでいる行を飛ばすため、
+        同時に呼び出しても同じタスクを重複して取り出さない。ロックを使えないDBでは、
+        取得待ちのままの行だけを更新できたものを取り出す。
+
+        Args:
+            db: 取り出しに使うセッション（コミットする）
+            limit: 取り出す最大件数（省略時はFETCH_QUEUE_CLAIM_SIZE）
+
+        Returns:
+            取り出したタスク
+        """
+        limit = limit or settings.FETCH_QUEUE_CLAIM_SIZE
+        now = datetime.utcnow()
+        self._requeue_stale(db, now)
+
+        task_ids = [
+            task_id for (task_id,) in db.query(FetchTask.id).filter(
+                FetchTask.status == "pending"
+            ).order_by(FetchTask.id).limit(limit).with_for_update(skip_locked=True).all()
+        ]
+        if not task_ids:
+            db.commit()
+            return []
+
+        db.query(FetchTask).filter(
+            FetchTask.id.in_(task_ids),
+            FetchTask.status == "pending"
+        ).update({
+            FetchTask.status: "claimed",
+            FetchTask.claimed_at: now,
+            FetchTask.worker: self.worker_name,
+            FetchTask.attempts: FetchTask.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+
+        return db.query(FetchTask).filter(
+            FetchTask.id.in_(task_ids),
+            FetchTask.status == "claimed",
+            FetchTask.claimed_at == now,
+            FetchTask.worker == self.worker_name
+        ).order_by(FetchTask.id).all()
+
+    def _requeue_stale(self, db: Session, now: datetime) -> None:
+        """取得中のままFETCH_QUEUE_CLAIM_TIMEOUT_SECONDSを過ぎたタスクを取得待ちに戻す"""
+        cutoff = now - timedelta(seconds=settings.FETCH_QUEUE_CLAIM_TIMEOUT_SECONDS)
+        stale = (FetchTask.status == "claimed", FetchTask.claimed_at < cutoff)
+        failed = db.query(FetchTask).filter(*stale, FetchTask.attempts >= self.MAX_ATTEMPTS).update({
+            FetchTask.status: "failed",
+            FetchTask.error: "Worker stopped responding",
+            FetchTask.finished_at: now
+        }, synchronize_session=False)
+        requeued = db.query(FetchTask).filter(*stale).update({
+            FetchTask.status: "pending"
+        }, synchronize_session=False)
+        if failed or requeued:
+            logger.warning(f"Requeued {requeued} stale fetch tasks, gave up on {failed}")
+
+    def process(self, db: Session, tasks: List[FetchTask]) -> int:
+        """
+        取り出したタスクの情報源を取得し、新着記事を通知待ちとして保存
+
+        取得状態（ETag・ウォーターマーク・サーキットブレーカー）も同じトランザクションで保存する。
+
+        Args:
+            db: claimで使ったセッション
+            tasks: claimで取り出したタスク
+
+        Returns:
+            新たに保存した記事数
+        """
+        # コミットでタスクが失効した後に1件ずつ読み直さないよう、IDを控えておく
+        claimed = [(task.id, task.source_id) for task in tasks]
+        source_ids = [source_id for _, source_id in claimed]
+        sources = db.query(RSSSource).filter(RSSSource.id.in_(source_ids)).all()
+        rss_service = RSSService(db)
+        now = datetime.utcnow()
+
+        try:
+            articles, stats = rss_service.get_new_articles(sources)
+            staged = rss_service.stage_articles(articles)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error processing fetch tasks {source_ids}: {str(e)}", exc_info=True)
+            self._finish(db, claimed, set(), {}, {source_id: str(e)[:50] for source_id in source_ids}, now)
+            return 0
+
+        names = {source.id: source.name for source in sources}
+        errors_by_name = {error["source_name"]: error["error"] for error in stats["errors"]}
+        article_counts: Dict[int, int] = {}
+        for article in articles:
+            article_counts[article["source_id"]] = article_counts.get(article["source_id"], 0) + 1
+
+        successful = set(stats["successful_source_ids"])
+        errors = {
+            source_id: errors_by_name.get(names.get(source_id), "Source not found")
+            for source_id in source_ids if source_id not in successful
+        }
+        self._finish(db, claimed, successful, article_counts, errors, datetime.utcnow())
+        return staged
+
+    def _finish(
+        self,
+        db: Session,
+        claimed: List[Tuple[int, int]],
+        successful: Set[int],
+        article_counts: Dict[int, int],
+        errors: Dict[int, str],
+        now: datetime
+    ) -> None:
+        """タスク（(ID, 情報源ID)のリスト）の結果を記録（取得待ちに戻されて別のワーカーが取り出したタスクは更新しない）"""
+        for task_id, source_id in claimed:
+            db.query(FetchTask).filter(
+                FetchTask.id == task_id,
+                FetchTask.status == "claimed",
+                FetchTask.worker == self.worker_name
+            ).update({
+                FetchTask.status: "done" if source_id in successful else "failed",
+                FetchTask.article_count: article_counts.get(source_id, 0),
+                FetchTask.error: errors.get(source_id),
+                FetchTask.finished_at: now
+            }, synchronize_session=False)
+        db.commit()
+
+    def work_once(self, limit: Optional[int] = None) -> int:
+        """
+        タスクを1回取り出して処理する（ワーカー・コーディネーター共通）
+
+        Returns:
+            処理したタスク数（取得待ちのタスクが無い場合0）
+        """
+        db = self.session_factory()
+        try:
+            tasks = self.claim(db, limit)
+            if not tasks:
+                return 0
+            staged = self.process(db, tasks)
+            logger.info(f"Processed {len(tasks)} fetch tasks, staged {staged} new articles")
+            return len(tasks)
+        finally:
+            db.close()
+
+    def work(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        停止されるまでタスクを取り出して処理する（scripts/fetch_worker.py用）
+
+        Args:
+            stop: セットされたら終了する
+        """
+        stop = stop or threading.Event()
+        logger.info(f"Fetch worker {self.worker_name} started")
+        while not stop.is_set():
+            try:
+                if self.work_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Error in fetch worker: {str(e)}", exc_info=True)
+            stop.wait(self.POLL_SECONDS)
+        logger.info(f"Fetch worker {self.worker_name} stopped")
+
+    def count_unfinished(self, round_id: str) -> int:
+        """ラウンドの未完了（取得待ち・取得中）のタスク数"""
+        return self.db.query(func.count(FetchTask.id)).filter(
+            FetchTask.round_id == round_id,
+            FetchTask.status.in_(["pending", "claimed"])
+        ).scalar()
+
+    def run_round(self, sources: List[RSSSource], timeout: Optional[float] = None) -> Dict:
+        """
+        情報源ごとのタスクを登録し、全タスクが終わるまで取得に加わりながら待つ
+
+        FETCH_QUEUE_TIMEOUT_SECONDSを過ぎても終わらないタスクは失敗として打ち切る
+        （取得済みの分だけでダイジェストを作る）。
+
+        Args:
+            sources: 取得対象の情報源
+            timeout: 最大待ち時間（秒、省略時はFETCH_QUEUE_TIMEOUT_SECONDS）
+
+        Returns:
+            ラウンドの集計 {"round_id", "tasks", "done", "failed", "workers"}
+        """
+        timeout = timeout or settings.FETCH_QUEUE_TIMEOUT_SECONDS
+        deadline = datetime.utcnow() + timedelta(seconds=timeout)
+        round_id = self.enqueue(sources)
+
+        while True:
+            if self.work_once():
+                continue
+            if not self.count_unfinished(round_id):
+                break
+            if datetime.utcnow() >= deadline:
+                timed_out = self.db.query(FetchTask).filter(
+                    FetchTask.round_id == round_id,
+                    FetchTask.status.in_(["pending", "claimed"])
+                ).update({
+                    FetchTask.status: "failed",
+                    FetchTask.error: "Timed out waiting for a worker",
+                    FetchTask.finished_at: datetime.utcnow()
+                }, synchronize_session=False)
+                self.db.commit()
+                logger.warning(f"Fetch round {round_id} timed out, {timed_out} tasks not fetched")
+                break
+            # 他のワーカーが取得中のタスクの終了を待つ
+            self.db.commit()
+            threading.Event().wait(self.POLL_SECONDS)
+
+        summary = {"round_id": round_id, "tasks": len(sources), "done": 0, "failed": 0}
+        rows = self.db.query(FetchTask.status, func.count(FetchTask.id)).filter(
+            FetchTask.round_id == round_id
+        ).group_by(FetchTask.status).all()
+        summary.update({status: count for status, count in rows})
+        summary["workers"] = self.db.query(func.count(func.distinct(FetchTask.worker))).filter(
+            FetchTask.round_id == round_id
+        ).scalar()
+        logger.info(
+            f"Fetch round {round_id} finished: {summary['done']} done, {summary['failed']} failed, "
+            f"{summary['workers']} workers"
+        )
+
+        # ワーカーが更新した取得状態を読み直す
+        self.db.expire_all()
+        return summary
@@ -0,0 +1,174 @@
+"""Pooled HTTP client for feed downloads"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import exceptions as urllib3_exceptions
+from urllib3.util import Timeout
+from urllib3.util.request import ACCEPT_ENCODING
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FeedTooLargeError(Exception):
+    """フィードのサイズが上限を超えた場合の例外"""
+
+
+class FeedDeadlineExceededError(requests.exceptions.Timeout):
+    """フィードの取得（接続から本文の読み込みまで）が制限時間を超えた場合の例外"""
+
+
+@dataclass
+class FeedResponse:
+    """フィード取得結果"""
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+
+
+class FeedHTTPClient:
+    """
+    フィード取得用のHTTPクライアント
+
+    requests.Sessionを共有し、ホストごとにコネクションを再利用する
+    （hatenablog / note など同じホストの情報源が多いため、TLSハンドシェイクを削減できる）。
+    圧縮（gzip / deflate、brotliがインストールされていればbr）をネゴシエートし、
+    本文はストリーミングで読み込んで上限サイズを超えたら打ち切る。
+
+    requestsのtimeoutは接続・1回の読み込みごとの制限のため、少しずつ送り続けるサーバーでは
+    終わらない。取得全体にtimeout秒の期限を設け、接続・ヘッダー待ちは残り時間で打ち切る。
+    本文は1回の受信ごとに読み込み（read1）、読む前に期限を確認してソケットのタイムアウトを
+    残り時間に縮めるため、ヘッダー前に止まるサーバーでも少しずつ送るサーバーでも期限内に終わる。
+    """
+
+    def __init__(
+        self,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.max_bytes = max_bytes if max_bytes is not None else settings.FETCH_MAX_BYTES
+        self.timeout = timeout if timeout is not None else settings.FETCH_TIMEOUT_SECONDS
+
+        # 同じホストの情報源を全ワーカーが同時に取得しても接続を捨てずに済むよう、
+        # ホストごとのプールはFETCH_MAX_WORKERS以上にする
+        if pool_maxsize is None:
+            pool_maxsize = max(settings.FETCH_POOL_MAXSIZE, settings.FETCH_MAX_WORKERS)
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections or settings.FETCH_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": settings.FETCH_USER_AGENT,
+            # urllib3がデコード可能なエンコーディングのみを要求する
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.9, */*;q=0.8",
+        })
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> FeedResponse:
+        """
+        フィードを取得
+
+        Args:
+            url: 取得するURL
+            headers: 追加のリクエストヘッダー
+
+        Returns:
+            FeedResponse
+
+        Raises:
+            FeedTooLargeError: 本文がmax_bytesを超えた場合
+            FeedDeadlineExceededError: 取得全体がtimeout秒を超えた場合
+            requests.exceptions.RequestException: 通信エラー
+        """
+        deadline = time.monotonic() + self.timeout
+        # 接続・ヘッダーの受信は合計でも期限内に収める
+        timeout = Timeout(connect=self.timeout, read=self.timeout, total=self.timeout)
+        with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            response_headers = {k.lower(): v for k, v in response.headers.items()}
+
+            # Content-Lengthが分かる場合は本文を読む前に判定
+            # （圧縮時は転送サイズだが、展開後はそれ以上になるので同じ判定でよい）
+            content_length = response_headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > self.max_bytes:
+                raise FeedTooLargeError(
+                    f"Feed too large: {content_length} bytes (limit {self.max_bytes})"
+                )
+
+            chunks = []
+            received = 0
+            while True:
+                chunk = self._read_chunk(response, deadline, received)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > self.max_bytes:
+                    raise FeedTooLargeError(
+                        f"Feed too large: exceeded {self.max_bytes} bytes"
+                    )
+                chunks.append(chunk)
+
+            return FeedResponse(
+                url=response.url,
+                status_code=response.status_code,
+                headers=response_headers,
+                content=b"".join(chunks)
+            )
+
+    def _read_chunk(self, response: requests.Response, deadline: float, received: int) -> bytes:
+        """
+        本文を1回の受信分だけ読み込む（展開済み）
+
+        Args:
+            response: stream=Trueで取得したレスポンス
+            deadline: 取得全体の期限（time.monotonic()）
+            received: これまでに読み込んだバイト数（エラーメッセージ用）
+
+        Returns:
+            読み込んだデータ（終端ではb""）
+
+        Raises:
+            FeedDeadlineExceededError: 期限を過ぎた場合
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FeedDeadlineExceededError(
+                f"Feed download exceeded {self.timeout} seconds ({received} bytes received)"
+            )
+
+        connection = response.raw.connection
+        if connection is not None and connection.sock is not None:
+            connection.sock.settimeout(remaining)
+
+        # 例外はresponse.iter_content()と同じくrequestsの例外に変換する
+        try:
+            return response.raw.read1(64 * 1024, decode_content=True)
+        except urllib3_exceptions.ReadTimeoutError as e:
+            raise FeedDeadlineExceededError(
+                f"Feed download exceeded {self.timeout} seconds ({received} bytes received)"
+            ) from e
+        except urllib3_exceptions.ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e) from e
+        except urllib3_exceptions.DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e) from e
+        except urllib3_exceptions.SSLError as e:
+            raise requests.exceptions.SSLError(e) from e
+
+    def close(self) -> None:
+        """コネクションプールを解放"""
+        self.session.close()
+
+
+# 共有HTTPクライアント
+feed_http_client = FeedHTTPClient()
@@ -0,0 +1,121 @@
+"""Compiled keyword matcher for article titles"""
+import html
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Pattern
+from src.config.settings import settings
+
+
+def normalize_text(text: str) -> str:
+    """
+    キーワード照合用にテキストを正規化
+
+    HTMLエンティティをデコード（例: &#038; → &）し、
+    NFKC正規化（全角英数→半角）と大文字小文字の畳み込みを行う。
+    """
+    return unicodedata.normalize("NFKC", html.unescape(text)).casefold()
+
+
+@dataclass
+class KeywordMatchResult:
+    """キーワード照合結果"""
+    allowed: bool
+    excluded_keyword: Optional[str] = None
+    included_keyword: Optional[str] = None
+
+
+class KeywordMatcher:
+    """
+    許可・除外キーワードの照合
+
+    キーワードごとにループせず、全キーワードを1つの正規表現にまとめて
+    正規化済みタイトルを1回走査する。正規表現は生成時に一度だけコンパイルする。
+    """
+
+    def __init__(
+        self,
+        exclude_keywords: Iterable[str] = (),
+        include_keywords: Iterable[str] = ()
+    ):
+        self._exclude_keywords = self._build_keyword_map(exclude_keywords)
+        self._include_keywords = self._build_keyword_map(include_keywords)
+        self._exclude_pattern = self._compile(self._exclude_keywords)
+        self._include_pattern = self._compile(self._include_keywords)
+
+    @classmethod
+    def from_settings(cls) -> "KeywordMatcher":
+        """設定値（EXCLUDE_KEYWORDS / INCLUDE_KEYWORDS）から生成"""
+        return cls(
+            exclude_keywords=settings.EXCLUDE_KEYWORDS,
+            include_keywords=settings.INCLUDE_KEYWORDS
+        )
+
+    @staticmethod
+    def _build_keyword_map(keywords: Iterable[str]) -> Dict[str, str]:
+        """正規化したキーワード → 元のキーワード（空文字は除外）"""
+        keyword_map: Dict[str, str] = {}
+        for keyword in keywords:
+            normalized = normalize_text(keyword.strip())
+            if normalized:
+                keyword_map.setdefault(normalized, keyword.strip())
+        return keyword_map
+
+    @staticmethod
+    def _compile(keyword_map: Dict[str, str]) -> Optional[Pattern[str]]:
+        """キーワードを1つの正規表現にまとめる（長いキーワードを優先）"""
+        if not keyword_map:
+            return None
+        alternatives = sorted(keyword_map, key=len, reverse=True)
+        return re.compile("|".join(re.escape(keyword) for keyword in alternatives))
+
+    @property
+    def has_include_keywords(self) -> bool:
+        """許可キーワードが設定されているか"""
+        return self._include_pattern is not None
+
+    @staticmethod
+    def _search(
+        pattern: Optional[Pattern[str]], keyword_map: Dict[str, str], normalized: str
+    ) -> Optional[str]:
+        if pattern is None:
+            return None
+        match = pattern.search(normalized)
+        return keyword_map[match.group(0)] if match else None
+
+    def match(self, text: str) -> KeywordMatchResult:
+        """
+        テキストをキーワードフィルタにかける
+
+        除外キーワードを含まず、許可キーワードが設定されている場合は
+        そのいずれかを含む場合に通過（allowed=True）とする。
+
+        Args:
+            text: 記事タイトルなど
+
+        Returns:
+            KeywordMatchResult（一致したキーワードは設定時の表記）
+        """
+        normalized = normalize_text(text)
+
+        excluded = self._search(self._exclude_pattern, self._exclude_keywords, normalized)
+        if excluded:
+            return KeywordMatchResult(allowed=False, excluded_keyword=excluded)
+
+        if self._include_pattern is None:
+            return KeywordMatchResult(allowed=True)
+
+        included = self._search(self._include_pattern, self._include_keywords, normalized)
+        return KeywordMatchResult(allowed=included is not None, included_keyword=included)
+
+    def find_excluded_keyword(self, text: str) -> Optional[str]:
+        """テキストに含まれる除外キーワードを取得（なければNone）"""
+        return self._search(self._exclude_pattern, self._exclude_keywords, normalize_text(text))
+
+    def is_allowed(self, text: str) -> bool:
+        """テキストがキーワードフィルタを通過するか"""
+        return self.match(text).allowed
+
+
+# 設定値から生成した共有マッチャー
+keyword_matcher = KeywordMatcher.from_settings()
@@ -0,0 +1,362 @@
+"""Background execution and tracking of notification runs"""
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.models import NotificationJob
+from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationJobRunner:
+    """
+    通知処理（NotificationService.run）をワーカースレッドで実行し、
+    実行状況と段階ごとの進捗をnotification_jobsに記録する
+
+    NotificationService.runはフィード取得・DB・Slack APIを同期的に呼び出すため、
+    APIのイベントループ上では実行せず、submit()でワーカープールに渡してジョブIDを返す。
+    スケジューラーからはrun()で呼び出し元のスレッドのまま実行し、同じく記録する。
+
+    通知処理は同時に1つだけ実行する（single-flight）。実行待ち・実行中のジョブが
+    あれば新たに登録せずそのジョブを返し、成功してからNOTIFICATION_COOLDOWN_SECONDS
+    以内であれば直前のジョブを返す。排他はactive_keyのユニーク制約で行うため、
+    複数のプロセスで動かしていても二重に実行されない。
+    """
+
+    # 実行待ち・実行中のジョブに設定するactive_key
+    ACTIVE_KEY = "notification"
+    # 実行中のジョブのupdated_atを更新する間隔（秒）
+    HEARTBEAT_SECONDS = 30
+    # 別プロセスで実行中のジョブの終了を確認する間隔（秒）
+    WAIT_POLL_SECONDS = 2
+    # ジョブの登録・合流を試みる最大回数（同時に登録された場合にやり直す）
+    ACQUIRE_ATTEMPTS = 5
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.max_workers = max_workers or settings.NOTIFICATION_JOB_WORKERS
+        self.session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queued: Set[str] = set()
+        self._finished: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def worker_name(self) -> str:
+        """実行したプロセスの識別子（fork後に変わるため都度取得）"""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="notification-job"
+                )
+            return self._executor
+
+    def _acquire(self, trigger: str, force: bool = False) -> Tuple[Dict, bool]:
+        """
+        新たに実行するジョブを登録するか、合流する既存のジョブを取得する
+
+        Args:
+            trigger: 実行のきっかけ（manual / scheduled）
+            force: Trueの場合、クールダウン中でも実行する（実行中のジョブには合流する）
+
+        Returns:
+            (ジョブ（to_dict）, 新たに登録した場合True)
+
+        Raises:
+            IntegrityError: active_key以外の制約違反、またはACQUIRE_ATTEMPTS回続けて登録が競合した場合
+            RuntimeError: 停止したジョブの解除が続き、ACQUIRE_ATTEMPTS回で登録・合流できなかった場合
+        """
+        for attempt in range(1, self.ACQUIRE_ATTEMPTS + 1):
+            db = self.session_factory()
+            try:
+                now = datetime.utcnow()
+                active = db.query(NotificationJob).filter(
+                    NotificationJob.active_key == self.ACTIVE_KEY
+                ).first()
+                if active is not None:
+                    if not self._is_stale(active, now):
+                        return active.to_dict(), False
+                    # 更新が途絶えたジョブは停止したとみなし、排他を解除して実行し直す
+                    logger.warning(f"Notification job {active.id} stopped responding, abandoning it")
+                    active.status = "failed"
+                    active.error = "Abandoned (no heartbeat)"
+                    active.finished_at = now
+                    active.active_key = None
+                    db.commit()
+                    continue
+
+                if not force and settings.NOTIFICATION_COOLDOWN_SECONDS > 0:
+                    recent = db.query(NotificationJob).filter(
+                        NotificationJob.status == "succeeded",
+                        NotificationJob.finished_at >= now - timedelta(seconds=settings.NOTIFICATION_COOLDOWN_SECONDS)
+                    ).order_by(NotificationJob.finished_at.desc()).first()
+                    if recent is not None:
+                        return recent.to_dict(), False
+
+                job = NotificationJob(
+                    id=str(uuid.uuid4()), trigger=trigger, status="queued", active_key=self.ACTIVE_KEY
+                )
+                db.add(job)
+                cutoff = now - timedelta(days=settings.NOTIFICATION_JOB_RETENTION_DAYS)
+                db.query(NotificationJob).filter(
+                    NotificationJob.created_at < cutoff,
+                    NotificationJob.status.in_(["succeeded", "failed"])
+                ).delete(synchronize_session=False)
+                db.commit()
+                return job.to_dict(), True
+            except IntegrityError as e:
+                db.rollback()
+                if not self._is_active_key_conflict(e) or attempt == self.ACQUIRE_ATTEMPTS:
+                    raise
+                # 同時に別の呼び出しが登録した（次のループでそのジョブに合流する）
+                logger.info("Notification job was registered concurrently, retrying to coalesce")
+            finally:
+                db.close()
+
+        raise RuntimeError(f"Could not acquire a notification job after {self.ACQUIRE_ATTEMPTS} attempts")
+
+    @staticmethod
+    def _is_active_key_conflict(error: IntegrityError) -> bool:
+        """
+        active_keyのユニーク制約違反か
+
+        PostgreSQLはインデックス名（ix_notification_jobs_active_key）、
+        SQLiteはカラム名（notification_jobs.active_key）をメッセージに含む。
+        """
+        return "active_key" in str(error.orig)
+
+    @staticmethod
+    def _is_stale(job: NotificationJob, now: datetime) -> bool:
+        """ジョブの更新がNOTIFICATION_JOB_STALE_SECONDS以上途絶えているか"""
+        last_seen = job.updated_at or job.created_at
+        return last_seen < now - timedelta(seconds=settings.NOTIFICATION_JOB_STALE_SECONDS)
+
+    def _update(self, job_id: str, **values) -> None:
+        """ジョブの状態を更新（通知処理とは別のセッションで即時コミット）"""
+        db = self.session_factory()
+        try:
+            db.query(NotificationJob).filter(NotificationJob.id == job_id).update(
+                {**values, "updated_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def submit(self, trigger: str = "manual", force: bool = False) -> Dict:
+        """
+        通知処理をワーカープールで実行する
+
+        実行待ち・実行中のジョブがある場合や、クールダウン中の場合は
+        新たに実行せず、そのジョブを返す（"coalesced": True）。
+
+        Args:
+            trigger: 実行のきっかけ（manual / scheduled）
+            force: Trueの場合、クールダウン中でも実行する
+
+        Returns:
+            登録した、または合流したジョブ（to_dict）
+        """
+        job, created = self._acquire(trigger, force)
+        if not created:
+            logger.info(f"Notification {trigger} request coalesced into job {job['job_id']} ({job['status']})")
+            return {**job, "coalesced": True}
+
+        with self._lock:
+            self._queued.add(job["job_id"])
+            self._finished[job["job_id"]] = threading.Event()
+        self._get_executor().submit(self._execute, job["job_id"])
+        logger.info(f"Notification job {job['job_id']} queued ({trigger})")
+        return {**job, "coalesced": False}
+
+    def run(self, trigger: str = "scheduled", force: bool = False) -> Dict:
+        """
+        通知処理を呼び出し元のスレッドで実行する（スケジューラー用）
+
+        実行待ち・実行中のジョブがある場合は、その終了を待って結果を返す。
+
+        Args:
+            trigger: 実行のきっかけ（manual / scheduled）
+            force: Trueの場合、クールダウン中でも実行する
+
+        Returns:
+            終了したジョブ（to_dict）
+        """
+        while True:
+            job, created = self._acquire(trigger, force)
+            if created:
+                with self._lock:
+                    self._finished[job["job_id"]] = threading.Event()
+                self._execute(job["job_id"])
+                return {**self.get_job(job["job_id"]), "coalesced": False}
+
+            logger.info(f"Notification {trigger} run coalesced into job {job['job_id']} ({job['status']})")
+            finished = self.wait(job["job_id"])
+            if finished is not None:
+                return {**finished, "coalesced": True}
+            # 合流したジョブが停止した場合は、改めて実行する
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        ジョブの終了を待つ
+
+        同じプロセスで実行しているジョブは終了の通知を、
+        別プロセスのジョブはWAIT_POLL_SECONDSごとにDBを確認して待つ。
+
+        Args:
+            job_id: ジョブID
+            timeout: 最大待ち時間（秒、Noneの場合は無制限）
+
+        Returns:
+            終了したジョブ（to_dict）。タイムアウトした場合や、
+            ジョブが存在しないか停止したとみなされた場合None
+        """
+        deadline = None if timeout is None else datetime.utcnow() + timedelta(seconds=timeout)
+        with self._lock:
+            event = self._finished.get(job_id)
+        if event is not None:
+            if not event.wait(timeout):
+                return None
+            return self.get_job(job_id)
+
+        while True:
+            db = self.session_factory()
+            try:
+                job = db.query(NotificationJob).filter(NotificationJob.id == job_id).first()
+                if job is None:
+                    return None
+                if job.status in ("succeeded", "failed"):
+                    return job.to_dict()
+                now = datetime.utcnow()
+                if self._is_stale(job, now) or (deadline is not None and now >= deadline):
+                    return None
+            finally:
+                db.close()
+            threading.Event().wait(self.WAIT_POLL_SECONDS)
+
+    def _heartbeat(self, job_id: str, stop: threading.Event) -> None:
+        """実行中のジョブのupdated_atを定期的に更新（停止の検知用）"""
+        while not stop.wait(self.HEARTBEAT_SECONDS):
+            try:
+                self._update(job_id)
+            except Exception as e:
+                logger.warning(f"Failed to update heartbeat of notification job {job_id}: {str(e)}")
+
+    def _execute(self, job_id: str) -> bool:
+        """ジョブを実行し、段階ごとの進捗と結果を記録"""
+        with self._lock:
+            self._queued.discard(job_id)
+
+        self._update(job_id, status="running", started_at=datetime.utcnow(), worker=self.worker_name)
+        stop_heartbeat = threading.Event()
+        threading.Thread(
+            target=self._heartbeat, args=(job_id, stop_heartbeat),
+            name=f"notification-job-heartbeat-{job_id[:8]}", daemon=True
+        ).start()
+        stages: List[Dict] = []
+
+        def progress(stage: str, details: Dict) -> None:
+            now = datetime.utcnow().isoformat()
+            if stages:
+                stages[-1]["finished_at"] = now
+            stages.append({"name": stage, "started_at": now})
+            self._update(job_id, stage=stage, stages=json.dumps(stages), result=json.dumps(details))
+
+        db = self.session_factory()
+        service = NotificationService(db, progress=progress)
+        success = False
+        error = None
+        try:
+            success = service.run()
+            if not success:
+                undelivered = service.summary.get("undelivered")
+                error = (
+                    f"{undelivered} messages failed or queued for retry"
+                    if undelivered else "Notification process failed (see logs)"
+                )
+        except Exception as e:
+            logger.error(f"Notification job {job_id} failed: {str(e)}", exc_info=True)
+            error = str(e)
+        finally:
+            db.close()
+            stop_heartbeat.set()
+
+        now = datetime.utcnow()
+        if stages:
+            stages[-1]["finished_at"] = now.isoformat()
+        try:
+            self._update(
+                job_id,
+                status="succeeded" if success else "failed",
+                stage=None,
+                stages=json.dumps(stages),
+                result=json.dumps(service.summary),
+                error=error,
+                finished_at=now,
+                active_key=None
+            )
+        finally:
+            self._notify_finished(job_id)
+        logger.info(f"Notification job {job_id} {'succeeded' if success else 'failed'}")
+        return success
+
+    def _notify_finished(self, job_id: str) -> None:
+        """同じプロセスで終了を待っている呼び出し元に通知"""
+        with self._lock:
+            event = self._finished.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """ジョブの実行状況を取得（存在しない場合None）"""
+        db = self.session_factory()
+        try:
+            job = db.query(NotificationJob).filter(NotificationJob.id == job_id).first()
+            return job.to_dict() if job else None
+        finally:
+            db.close()
+
+    def list_jobs(self, limit: int = 20) -> List[Dict]:
+        """新しい順にジョブを取得"""
+        db = self.session_factory()
+        try:
+            jobs = db.query(NotificationJob).order_by(NotificationJob.created_at.desc()).limit(limit).all()
+            return [job.to_dict() for job in jobs]
+        finally:
+            db.close()
+
+    def shutdown(self, wait: bool = False) -> None:
+        """ワーカープールを停止（開始前のジョブは取り消して失敗として記録）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+        with self._lock:
+            cancelled, self._queued = self._queued, set()
+        for job_id in cancelled:
+            self._update(
+                job_id, status="failed", error="Cancelled at shutdown",
+                finished_at=datetime.utcnow(), active_key=None
+            )
+            self._notify_finished(job_id)
+
+
+# 共有ランナー（APIとスケジューラーで同じワーカープールを使う）
+notification_job_runner = NotificationJobRunner()
@@ -1,6 +1,13 @@
 """Main notification service that orchestrates RSS collection and Slack notification"""
 import logging
+import time
+from typing import Callable, Dict, Optional
 from sqlalchemy.orm import Session
+from src.config.settings import settings
+from src.utils.metrics import NOTIFICATION_RUN_SECONDS, NOTIFICATION_STAGE_SECONDS
+from .channel_router import ChannelRouter, RoutedArticles
+from .fetch_queue_service import FetchQueueService
+from .outbox_service import OutboxService
 from .rss_service import RSSService
 from .slack_service import SlackService
 
@@ -10,57 +17,195 @@ logger = logging.getLogger(__name__)
 class NotificationService:
     """通知処理を統括するサービス"""
 
-    def __init__(self, db: Session):
+    # 実行の段階（progressに通知する順）
+    STAGES = ("fetch", "route", "enqueue", "deliver")
+
+    def __init__(self, db: Session, progress: Optional[Callable[[str, Dict], None]] = None):
+        """
+        Args:
+            db: DBセッション
+            progress: 各段階の開始時に (段階名, それまでの集計) で呼び出される
+        """
         self.db = db
+        self.progress = progress
+        # 直近のrunの集計（記事数・チャンネル数・メッセージ数・未送信数）
+        self.summary: Dict = {}
+        # 実行中の段階と開始時刻（段階ごとの時間の計測用）
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
         self.rss_service = RSSService(db)
         self.slack_service = SlackService()
+        self.outbox_service = OutboxService(db, slack_service=self.slack_service)
+        self.channel_router = ChannelRouter(db, rss_service=self.rss_service)
+        self.fetch_queue = FetchQueueService(db)
+
+    def _report(self, stage: str, **details) -> None:
+        """段階の開始を通知（進捗の記録に失敗しても通知処理は続ける）"""
+        self._finish_stage()
+        self._stage, self._stage_started = stage, time.perf_counter()
+        self.summary.update(details)
+        if self.progress is None:
+            return
+        try:
+            self.progress(stage, dict(self.summary))
+        except Exception as e:
+            logger.warning(f"Failed to report progress ({stage}): {str(e)}")
+
+    def _finish_stage(self) -> None:
+        """実行中の段階の時間を記録"""
+        if self._stage is not None:
+            NOTIFICATION_STAGE_SECONDS.labels(self._stage).observe(time.perf_counter() - self._stage_started)
+            self._stage = None
 
     def run(self) -> bool:
         """
         メイン処理フロー:
         1. RSS巡回して新着記事を取得
-        2. Slackに通知（記事0件でも通知）
-        3. 通知済みとしてDBに保存
+           （POLLING_MODE=adaptiveの場合は巡回済みの通知待ち記事を使用）
+           チャンネル別の配信ルートがある場合は、全ルートの対象情報源をまとめて1回だけ取得する
+           （FETCH_MODE=queueの場合は作業キュー経由でワーカーと分担して取得し、通知待ちの記事を使用）
+        2. 記事を通知先チャンネルごとに振り分ける（ルートが無い場合はSLACK_CHANNEL_IDのみ）
+        3. 通知メッセージをアウトボックスに登録し、通知済み・取得状態と同じトランザクションで保存
+           （記事0件でも通知）
+        4. アウトボックスからSlackに送信
+           （送信できなかったメッセージは配信ジョブが再送する）
 
         Returns:
-            成功した場合True、失敗した場合False
+            全メッセージを送信できた場合True、失敗した場合False
         """
+        started = time.perf_counter()
+        success = False
+        try:
+            success = self._run()
+            return success
+        finally:
+            self._finish_stage()
+            NOTIFICATION_RUN_SECONDS.labels("success" if success else "failure").observe(
+                time.perf_counter() - started
+            )
+
+    def _run(self) -> bool:
+        """runの本体"""
         try:
             logger.info("Starting notification process")
+            self.summary = {}
+            self._report("fetch")
+            routes = self.channel_router.get_routes()
 
             # 1. 新着記事と統計情報を取得
-            new_articles, stats = self.rss_service.get_new_articles()
-
-            total_sources = stats.get("total_sources", 0)
-            successful_sources = stats.get("successful_sources", 0)
-            errors = stats.get("errors", [])
+            if settings.POLLING_MODE == "adaptive":
+                new_articles, stats = self.rss_service.get_staged_articles()
+            elif settings.FETCH_MODE == "queue" and not settings.DRY_RUN:
+                # ワーカーは取得結果を保存するため、ドライランでは使わない
+                sources = (
+                    self.channel_router.get_sources_to_fetch(routes) if routes
+                    else self.rss_service.get_active_sources()
+                )
+                self.summary["fetch_round"] = self.fetch_queue.run_round(sources)
+                new_articles, stats = self.rss_service.get_staged_articles()
+            else:
+                sources = self.channel_router.get_sources_to_fetch(routes) if routes else None
+                new_articles, stats = self.rss_service.get_new_articles(sources)
 
             logger.info(
                 f"RSS collection completed: "
                 f"{len(new_articles)} new articles, "
-                f"{successful_sources}/{total_sources} sources succeeded, "
-                f"{len(errors)} errors"
+                f"{stats.get('successful_sources', 0)}/{stats.get('total_sources', 0)} sources succeeded, "
+                f"{len(stats.get('errors', []))} errors"
             )
 
-            # 2. Slackに通知（記事0件でも必ず通知）
-            notification_sent = self.slack_service.send_notification(
-                articles=new_articles,
-                total_sources=total_sources,
-                successful_sources=successful_sources,
-                errors=errors
+            # 2. 通知先チャンネルごとに振り分け
+            self._report(
+                "route",
+                articles=len(new_articles),
+                total_sources=stats.get("total_sources", 0),
+                successful_sources=stats.get("successful_sources", 0),
+                errors=len(stats.get("errors", []))
             )
+            if routes:
+                notifications = self.channel_router.route_articles(routes, new_articles, stats)
+            else:
+                notifications = [RoutedArticles(
+                    route=None,
+                    articles=new_articles,
+                    total_sources=stats.get("total_sources", 0),
+                    successful_sources=stats.get("successful_sources", 0),
+                    errors=stats.get("errors", [])
+                )]
 
-            if not notification_sent:
-                logger.error("Failed to send notification to Slack")
+            # ドライランでは送信内容をログに出すだけで、通知済み・取得状態を保存しない
+            # （同じ条件で繰り返し実行できるように）
+            if settings.DRY_RUN:
+                for notification in notifications:
+                    self.slack_service.send_notification(
+                        articles=notification.articles,
+                        total_sources=notification.total_sources,
+                        successful_sources=notification.successful_sources,
+                        errors=notification.errors,
+                        channel_id=notification.channel_id
+                    )
+                self.db.rollback()
+                logger.info("Dry run completed, skipped saving notification state")
+                return True
+
+            # 送信できない設定のまま登録すると、通知済みにした記事が届かないまま失われるため、
+            # 取得状態も含めて何も保存せず、次回の実行で同じ記事を通知する
+            unconfigured = [
+                notification.channel_id or "SLACK_CHANNEL_ID" for notification in notifications
+                if not self.slack_service.is_configured(notification.channel_id)
+            ]
+            if unconfigured:
+                self.db.rollback()
+                logger.error(
+                    f"SLACK_BOT_TOKEN or the channel is not configured ({', '.join(unconfigured)}), "
+                    f"skipped notification of {len(new_articles)} articles until the next run"
+                )
                 return False
 
-            # 3. 通知済みとして保存（記事がある場合のみ）
-            if new_articles:
-                self.rss_service.mark_as_notified(new_articles)
+            # 3. 送信メッセージ・通知済み記事・取得状態（ETag / Last-Modified）を1トランザクションで保存
+            self._report("enqueue", channels=len(notifications))
+            batch_ids = []
+            message_count = 0
+            notified_articles = []
+            for notification in notifications:
+                messages = self.slack_service.build_messages(
+                    articles=notification.articles,
+                    total_sources=notification.total_sources,
+                    successful_sources=notification.successful_sources,
+                    errors=notification.errors
+                )
+                batch_ids.append(self.outbox_service.enqueue(messages, channel_id=notification.channel_id))
+                message_count += len(messages)
+                notified_articles.extend(notification.articles)
+
+            if notified_articles:
+                self.rss_service.mark_as_notified(notified_articles, commit=False)
+            if routes:
+                self.channel_router.mark_as_notified(notifications)
+
+            # 通知待ちの記事を使った場合は削除
+            if stats.get("staged_up_to_id") is not None:
+                self.rss_service.clear_staged_articles(stats["staged_up_to_id"], commit=False)
+
+            self.rss_service.commit_fetch_state()
+
+            # 4. Slackに送信
+            self._report("deliver", messages=message_count)
+            undelivered = 0
+            for batch_id in batch_ids:
+                delivery = self.outbox_service.deliver_pending(batch_id=batch_id)
+                undelivered += delivery["pending"] + delivery["failed"]
+            self.summary["undelivered"] = undelivered
+            if undelivered:
+                logger.error(
+                    f"Notification not fully delivered: {undelivered} messages failed or queued for retry"
+                )
+                return False
 
             logger.info("Notification process completed successfully")
             return True
 
         except Exception as e:
+            self.db.rollback()
             logger.error(f"Error in notification process: {str(e)}", exc_info=True)
             return False
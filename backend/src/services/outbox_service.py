@@ -0,0 +1,459 @@
+"""Durable outbox for Slack messages"""
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from sqlalchemy import bindparam, insert
+from sqlalchemy.orm import Session
+from src.config.settings import settings
+from src.models import SlackOutboxMessage
+from src.utils.metrics import SLACK_OUTBOX_UNDELIVERED
+from .slack_service import SlackService
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """
+    Slackへの送信をアウトボックス（slack_outboxテーブル）経由で行うサービス
+
+    通知するメッセージは、通知済みの記事・取得状態と同じトランザクションで登録する（enqueue）。
+    送信（deliver_pending）は登録とは独立して再試行・再開でき、
+    送信済みのメッセージはtsを記録して二重に送らない。
+
+    - バッチ（通知1回分）の中では登録順に送信し、送信できなかったメッセージ以降は次回に回す
+      （スレッド内の順序を保つ）
+    - 一時的なエラーは SLACK_OUTBOX_RETRY_BASE_SECONDS から倍々の間隔（最大1日）で再送を続ける
+      （記事は登録時に通知済みになるため、諦めると届かないまま失われる）。
+      SLACK_OUTBOX_MAX_ATTEMPTS 回失敗したらエラーログとメトリクス
+      （techblog_bot_slack_outbox_undelivered）で知らせる
+    - 再送しても成功しないエラー（PERMANENT_ERRORS）のみ failed にする
+    - 送信中に停止したメッセージや、タイムアウト・5xxなど投稿されたかわからない失敗の後は、
+      再送する前にメッセージメタデータの冪等キーでSlack上を探し、投稿済みならtsを記録する
+
+    Slack上の確認にはconversations.history / conversations.repliesを使うため、
+    Botにchannels:history（プライベートチャンネルはgroups:history）のスコープが必要。
+    スコープが無いと確認できず、投稿済みかもしれないメッセージを再送する（重複しうる）。
+    """
+
+    # メッセージメタデータのevent_type（冪等キーを付与する）
+    METADATA_EVENT_TYPE = "techblog_bot_outbox"
+
+    # 送信結果をまとめて保存する件数
+    RESULT_FLUSH_SIZE = 50
+
+    # 再送しても成功しないエラー
+    # （not_configuredは設定を直せば送れるため含めない）
+    PERMANENT_ERRORS = {
+        "channel_not_found",
+        "not_in_channel",
+        "is_archived",
+        "invalid_auth",
+        "account_inactive",
+        "token_revoked",
+        "no_text",
+        "msg_too_long",
+        "invalid_blocks",
+        "invalid_metadata_format",
+        "restricted_action",
+    }
+
+    def __init__(self, db: Session, slack_service: Optional[SlackService] = None):
+        self.db = db
+        self.slack_service = slack_service or SlackService()
+
+    def enqueue(self, messages: List[Dict], channel_id: Optional[str] = None) -> str:
+        """
+        メッセージをアウトボックスに登録（コミットは呼び出し元が行う）
+
+        Args:
+            messages: SlackService.build_messagesの戻り値（1件目がスレッド親）
+            channel_id: 投稿先チャンネル（省略時はSLACK_CHANNEL_ID）
+
+        Returns:
+            バッチID
+        """
+        batch_id = str(uuid.uuid4())
+        channel_id = channel_id or settings.SLACK_CHANNEL_ID or ""
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "idempotency_key": f"{batch_id}:{sequence}",
+                "batch_id": batch_id,
+                "sequence": sequence,
+                "kind": message["kind"],
+                "channel_id": channel_id,
+                "text": message["text"],
+                "blocks": json.dumps(message["blocks"], ensure_ascii=False) if message.get("blocks") else None,
+                "article_count": message.get("article_count", 0),
+                "state": "pending",
+                "attempts": 0,
+                "delivery_unknown": False,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for sequence, message in enumerate(messages)
+        ]
+
+        # スレッド親のIDを得るため親だけORMで先にINSERTし、返信はまとめてINSERTする
+        parent = SlackOutboxMessage(**rows[0])
+        self.db.add(parent)
+        self.db.flush()
+        if len(rows) > 1:
+            for row in rows[1:]:
+                row["parent_id"] = parent.id
+            self.db.execute(insert(SlackOutboxMessage), rows[1:])
+
+        logger.info(f"Enqueued {len(rows)} Slack messages (batch {batch_id})")
+        return batch_id
+
+    def _retry_delay(self, attempts: int) -> timedelta:
+        """再送までの間隔（失敗ごとに倍増、最大1日）"""
+        seconds = settings.SLACK_OUTBOX_RETRY_BASE_SECONDS * (2 ** max(0, min(attempts - 1, 20)))
+        return timedelta(seconds=min(seconds, 24 * 60 * 60))
+
+    def _claim(self, message_ids: List[int], now: datetime) -> Set[int]:
+        """
+        メッセージをまとめて送信中にする
+
+        条件付きUPDATEで排他し、他のワーカーが先に取得したメッセージは含まれない。
+
+        Returns:
+            取得できたメッセージのID
+        """
+        if not message_ids:
+            return set()
+
+        claim_token = str(uuid.uuid4())
+        self.db.query(SlackOutboxMessage).filter(
+            SlackOutboxMessage.id.in_(message_ids),
+            SlackOutboxMessage.state == "pending"
+        ).update(
+            {
+                SlackOutboxMessage.state: "sending",
+                SlackOutboxMessage.claim_token: claim_token,
+                SlackOutboxMessage.claimed_at: now,
+                SlackOutboxMessage.attempts: SlackOutboxMessage.attempts + 1
+            },
+            synchronize_session=False
+        )
+        self.db.commit()
+
+        rows = self.db.query(SlackOutboxMessage.id).filter(SlackOutboxMessage.claim_token == claim_token).all()
+        return {row[0] for row in rows}
+
+    def _release(self, message_ids: List[int]) -> None:
+        """取得したが送信しなかったメッセージを送信待ちに戻す"""
+        if not message_ids:
+            return
+        self.db.query(SlackOutboxMessage).filter(
+            SlackOutboxMessage.id.in_(message_ids),
+            SlackOutboxMessage.state == "sending"
+        ).update(
+            {
+                SlackOutboxMessage.state: "pending",
+                SlackOutboxMessage.attempts: SlackOutboxMessage.attempts - 1
+            },
+            synchronize_session=False
+        )
+        self.db.commit()
+
+    def _record_results(self, results: List[Dict]) -> None:
+        """
+        送信結果をまとめて保存
+
+        投稿ごとにコミットせず RESULT_FLUSH_SIZE 件ごとに保存する。
+        保存前に停止した場合は送信中のまま残り、recover_staleがSlack上の投稿から回復する。
+        """
+        if not results:
+            return
+        table = SlackOutboxMessage.__table__
+        stmt = table.update().where(table.c.id == bindparam("message_id")).values(
+            state=bindparam("new_state"),
+            ts=bindparam("new_ts"),
+            sent_at=bindparam("new_sent_at"),
+            last_error=bindparam("new_last_error"),
+            next_attempt_at=bindparam("new_next_attempt_at"),
+            delivery_unknown=bindparam("new_delivery_unknown")
+        )
+        self.db.execute(stmt, results)
+        self.db.commit()
+        results.clear()
+
+    def _update(self, message_id: int, **values) -> None:
+        """メッセージの送信状態を更新してコミット"""
+        self.db.query(SlackOutboxMessage).filter(
+            SlackOutboxMessage.id == message_id
+        ).update(values, synchronize_session=False)
+        self.db.commit()
+
+    def _metadata(self, idempotency_key: str) -> Dict:
+        return {"event_type": self.METADATA_EVENT_TYPE, "event_payload": {"key": idempotency_key}}
+
+    def find_posted_ts(
+        self,
+        channel_id: str,
+        idempotency_key: str,
+        since: datetime,
+        thread_ts: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        冪等キーのメタデータが付いた投稿をSlack上で探す
+
+        Args:
+            channel_id: チャンネル
+            idempotency_key: 冪等キー
+            since: この日時（UTC）以降の投稿を探す
+            thread_ts: スレッド返信の場合はスレッド親のts
+
+        Returns:
+            見つかった投稿のts、見つからない・確認できない場合None
+            （channels:history / groups:historyのスコープが無い場合も確認できずNone）
+        """
+        oldest = (since - datetime(1970, 1, 1)).total_seconds() - 60
+        payload = {
+            "channel": channel_id,
+            "oldest": f"{oldest:.6f}",
+            "include_all_metadata": "true",
+            "limit": "200",
+        }
+        method = "conversations.history"
+        if thread_ts:
+            method = "conversations.replies"
+            payload["ts"] = thread_ts
+
+        dispatcher = self.slack_service.dispatcher
+        result = dispatcher.call(method, payload, self.slack_service.bot_token, self.slack_service.api_base_url)
+        if not result.ok:
+            if result.error == "missing_scope":
+                logger.error(
+                    f"Could not look up posted Slack messages ({method}): the bot needs the "
+                    f"channels:history / groups:history scope, the message may be posted twice"
+                )
+            else:
+                logger.warning(f"Could not look up posted Slack messages ({method}): {result.error}")
+            return None
+
+        for message in result.data.get("messages", []):
+            metadata = message.get("metadata") or {}
+            if (
+                metadata.get("event_type") == self.METADATA_EVENT_TYPE
+                and (metadata.get("event_payload") or {}).get("key") == idempotency_key
+            ):
+                return message.get("ts")
+        return None
+
+    def recover_stale(self, now: Optional[datetime] = None) -> int:
+        """
+        送信中のまま SLACK_OUTBOX_STALE_SECONDS を過ぎたメッセージを回復
+
+        Slack上に投稿済みなら送信済みにし、見つからなければ送信待ちに戻す。
+
+        Returns:
+            回復したメッセージ数
+        """
+        now = now or datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.SLACK_OUTBOX_STALE_SECONDS)
+
+        stale = self.db.query(
+            SlackOutboxMessage.id,
+            SlackOutboxMessage.channel_id,
+            SlackOutboxMessage.idempotency_key,
+            SlackOutboxMessage.claimed_at,
+            SlackOutboxMessage.parent_id
+        ).filter(
+            SlackOutboxMessage.state == "sending",
+            SlackOutboxMessage.claimed_at < stale_before
+        ).order_by(SlackOutboxMessage.id).all()
+
+        for message in stale:
+            thread_ts = self._parent_ts(message.parent_id) if message.parent_id else None
+            ts = self.find_posted_ts(message.channel_id, message.idempotency_key, message.claimed_at, thread_ts)
+            if ts:
+                logger.info(f"Outbox message {message.id} was already posted (ts: {ts})")
+                self._update(message.id, state="sent", ts=ts, sent_at=now, last_error=None)
+            else:
+                logger.warning(f"Outbox message {message.id} was interrupted while sending, requeueing")
+                self._update(message.id, state="pending", next_attempt_at=now)
+
+        return len(stale)
+
+    def _parent_ts(self, parent_id: int) -> Optional[str]:
+        row = self.db.query(SlackOutboxMessage.ts).filter(SlackOutboxMessage.id == parent_id).first()
+        return row[0] if row else None
+
+    def deliver_pending(self, batch_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        送信待ちのメッセージを送信
+
+        Args:
+            batch_id: 指定した場合はそのバッチのみ送信
+
+        Returns:
+            {"sent": 送信した件数, "failed": 失敗として確定した件数, "pending": 未送信のまま残った件数}
+        """
+        now = datetime.utcnow()
+        self.recover_stale(now)
+
+        query = self.db.query(
+            SlackOutboxMessage.id,
+            SlackOutboxMessage.batch_id,
+            SlackOutboxMessage.kind,
+            SlackOutboxMessage.channel_id,
+            SlackOutboxMessage.idempotency_key,
+            SlackOutboxMessage.text,
+            SlackOutboxMessage.blocks,
+            SlackOutboxMessage.parent_id,
+            SlackOutboxMessage.state,
+            SlackOutboxMessage.attempts,
+            SlackOutboxMessage.next_attempt_at,
+            SlackOutboxMessage.delivery_unknown,
+            SlackOutboxMessage.claimed_at
+        ).filter(SlackOutboxMessage.state.in_(["pending", "sending"]))
+        if batch_id:
+            query = query.filter(SlackOutboxMessage.batch_id == batch_id)
+        candidates = query.order_by(SlackOutboxMessage.id).all()
+
+        stats = {"sent": 0, "failed": 0, "pending": 0}
+        if not candidates:
+            return stats
+
+        # 順序を保つため、バッチごとに先頭から送信可能な範囲だけを取得する
+        # （他のワーカーが送信中、または再送待ちのメッセージ以降は次回に回す）
+        messages = []
+        blocked_batches = set()
+        for message in candidates:
+            if message.batch_id in blocked_batches:
+                continue
+            if message.state != "pending" or message.next_attempt_at > now:
+                blocked_batches.add(message.batch_id)
+                continue
+            messages.append(message)
+
+        claimed = self._claim([message.id for message in messages], now)
+        stats["pending"] = len(candidates) - len(claimed)
+
+        self.slack_service.post_results = []
+        sent_ts: Dict[int, Optional[str]] = {}
+        results: List[Dict] = []
+        blocked_batches = set()
+        unsent: List[int] = []
+
+        for message in messages:
+            if message.id not in claimed:
+                blocked_batches.add(message.batch_id)
+                continue
+            if message.batch_id in blocked_batches:
+                unsent.append(message.id)
+                continue
+
+            thread_ts = None
+            if message.parent_id:
+                if message.parent_id not in sent_ts:
+                    self._record_results(results)
+                    sent_ts[message.parent_id] = self._parent_ts(message.parent_id)
+                thread_ts = sent_ts[message.parent_id]
+                if thread_ts is None:
+                    # スレッド親が失敗として確定した場合は子も送らない
+                    results.append(self._result_row(message.id, "failed", error="parent message was not sent"))
+                    stats["failed"] += 1
+                    continue
+
+            # 前回の失敗で投稿されたかわからない場合は、再送する前にSlack上を確認する
+            if message.delivery_unknown and message.claimed_at:
+                ts = self.find_posted_ts(message.channel_id, message.idempotency_key, message.claimed_at, thread_ts)
+                if ts:
+                    logger.info(f"Outbox message {message.id} was already posted (ts: {ts}), not resending")
+                    results.append(self._result_row(message.id, "sent", ts=ts))
+                    sent_ts[message.id] = ts
+                    stats["sent"] += 1
+                    continue
+
+            result = self.slack_service.post(
+                message.text,
+                thread_ts=thread_ts,
+                blocks=json.loads(message.blocks) if message.blocks else None,
+                metadata=self._metadata(message.idempotency_key),
+                channel_id=message.channel_id
+            )
+            attempts = message.attempts + 1
+
+            if result.ok:
+                results.append(self._result_row(message.id, "sent", ts=result.ts))
+                sent_ts[message.id] = result.ts
+                stats["sent"] += 1
+            elif result.error in self.PERMANENT_ERRORS:
+                logger.error(f"Outbox message {message.id} ({message.kind}) failed permanently: {result.error}")
+                SLACK_OUTBOX_UNDELIVERED.labels("permanent_error").inc()
+                results.append(self._result_row(message.id, "failed", error=result.error))
+                stats["failed"] += 1
+            else:
+                next_attempt_at = datetime.utcnow() + self._retry_delay(attempts)
+                if attempts == settings.SLACK_OUTBOX_MAX_ATTEMPTS:
+                    SLACK_OUTBOX_UNDELIVERED.labels("max_attempts").inc()
+                log = logger.error if attempts >= settings.SLACK_OUTBOX_MAX_ATTEMPTS else logger.warning
+                log(
+                    f"Outbox message {message.id} ({message.kind}) failed {attempts} times: {result.error}, "
+                    f"retrying at {next_attempt_at.isoformat()} UTC"
+                )
+                results.append(self._result_row(
+                    message.id, "pending", error=result.error, next_attempt_at=next_attempt_at,
+                    delivery_unknown=result.ambiguous
+                ))
+                blocked_batches.add(message.batch_id)
+                stats["pending"] += 1
+
+            if len(results) >= self.RESULT_FLUSH_SIZE:
+                self._record_results(results)
+
+        self._record_results(results)
+        self._release(unsent)
+        stats["pending"] += len(unsent)
+
+        self.slack_service.log_post_summary()
+        logger.info(
+            f"Outbox delivery: {stats['sent']} sent, {stats['failed']} failed, {stats['pending']} pending"
+        )
+        return stats
+
+    @staticmethod
+    def _result_row(
+        message_id: int,
+        state: str,
+        ts: Optional[str] = None,
+        error: Optional[str] = None,
+        next_attempt_at: Optional[datetime] = None,
+        delivery_unknown: bool = False
+    ) -> Dict:
+        """_record_resultsに渡す送信結果"""
+        now = datetime.utcnow()
+        return {
+            "message_id": message_id,
+            "new_state": state,
+            "new_ts": ts,
+            "new_sent_at": now if state == "sent" else None,
+            "new_last_error": error,
+            "new_next_attempt_at": next_attempt_at or now,
+            "new_delivery_unknown": delivery_unknown
+        }
+
+    def purge_sent(self, now: Optional[datetime] = None) -> int:
+        """保持期間（SLACK_OUTBOX_RETENTION_DAYS）を過ぎた送信済み・失敗メッセージを削除"""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=settings.SLACK_OUTBOX_RETENTION_DAYS)
+
+        # スレッド返信を先に消してから親を消す（外部キー制約のため）
+        deleted = 0
+        for is_reply in (True, False):
+            query = self.db.query(SlackOutboxMessage).filter(
+                SlackOutboxMessage.state.in_(["sent", "failed"]),
+                SlackOutboxMessage.created_at < cutoff
+            )
+            query = query.filter(
+                SlackOutboxMessage.parent_id.isnot(None) if is_reply else SlackOutboxMessage.parent_id.is_(None)
+            )
+            deleted += query.delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -1,12 +1,28 @@
 """RSS feed collection service"""
 import feedparser
-import html
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Set, Tuple
 import logging
+from requests.utils import parse_header_links
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from src.models import RSSSource, NotifiedArticle
+from src.models import (
+    RSSSource, NotifiedArticle, StagedArticle, WebSubSubscription, ChannelRoute, ChannelNotifiedArticle
+)
 from src.config.settings import settings
+from src.utils.metrics import (
+    DEDUP_QUERY_SECONDS, FEED_FETCH_BYTES, FEED_FETCH_SECONDS, FEED_FETCH_TOTAL, FEED_PARSE_SECONDS,
+    KEYWORD_FILTER_DROPPED
+)
+from src.utils.url import url_hash
+from .feed_cache import FeedCache, feed_cache
+from .feed_parser import parse_feed
+from .http_client import FeedHTTPClient, feed_http_client
+from .keyword_matcher import KeywordMatcher, keyword_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -14,25 +30,140 @@ logger = logging.getLogger(__name__)
 class RSSService:
     """RSS収集サービス"""
 
-    def __init__(self, db: Session):
+    # 通知済みチェックのIN句1回あたりの最大件数
+    DEDUP_BATCH_SIZE = 500
+    # 通知済み記事の一括INSERT 1文あたりの最大行数
+    INSERT_BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        db: Session,
+        http_client: Optional[FeedHTTPClient] = None,
+        matcher: Optional[KeywordMatcher] = None,
+        cache: Optional[FeedCache] = None
+    ):
         self.db = db
+        self.http_client = http_client or feed_http_client
+        self.cache = cache or feed_cache
+        self.matcher = matcher or keyword_matcher
+        self._channel_routing_enabled: Optional[bool] = None
+
+    @property
+    def channel_routing_enabled(self) -> bool:
+        """
+        チャンネル別の配信ルート（ChannelRoute）が有効か
+
+        有効な場合、通知済み・キーワードの判定はチャンネルごとに
+        ChannelRouterで行うため、ここでは期間制限のみで絞り込む。
+        """
+        if self._channel_routing_enabled is None:
+            self._channel_routing_enabled = self.db.query(ChannelRoute.id).filter(
+                ChannelRoute.is_active == True
+            ).first() is not None
+        return self._channel_routing_enabled
+
+    @channel_routing_enabled.setter
+    def channel_routing_enabled(self, enabled: bool) -> None:
+        self._channel_routing_enabled = enabled
 
     def get_active_sources(self) -> List[RSSSource]:
         """有効なRSS情報源を取得"""
         return self.db.query(RSSSource).filter(RSSSource.is_active == True).all()
 
-    def fetch_feed(self, url: str) -> Optional[feedparser.FeedParserDict]:
+    def get_due_sources(self, now: Optional[datetime] = None) -> List[RSSSource]:
+        """次回巡回日時を過ぎた（または未設定の）有効なRSS情報源を取得"""
+        now = now or datetime.utcnow()
+        return self.db.query(RSSSource).filter(
+            RSSSource.is_active == True,
+            or_(RSSSource.next_poll_at.is_(None), RSSSource.next_poll_at <= now),
+            or_(RSSSource.retry_after.is_(None), RSSSource.retry_after <= now)
+        ).all()
+
+    def fetch_feed(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        modified: Optional[str] = None,
+        source_id: Optional[int] = None
+    ) -> Optional[feedparser.FeedParserDict]:
         """
         指定されたURLからRSSフィードを取得
 
+        ETag / Last-Modifiedが渡された場合は条件付きGETを行い、
+        304 Not Modifiedならパースせずにstatus=304のみを返す。
+        feedparserがURLを直接取得する場合と同じく、戻り値には
+        status / etag / modified を設定する。
+
         Args:
             url: RSS Feed URL
+            etag: 前回取得時のETag
+            modified: 前回取得時のLast-Modified
+            source_id: メトリクスのラベルに使う情報源ID（情報源に紐づかない取得では省略）
 
         Returns:
             feedparser.FeedParserDict or None
         """
+        # 情報源名やURLは自由入力で系列数が増えるため、ラベルは情報源IDにする
+        source_label = str(source_id) if source_id is not None else "none"
         try:
-            feed = feedparser.parse(url)
+            logger.info(f"Fetching feed from: {url}")
+
+            headers = {}
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+
+            if self.cache and self.cache.replay:
+                # リプレイモード: ネットワークにアクセスせず保存済みのフィードを使う
+                response = self.cache.load(url)
+                if response is None:
+                    logger.warning(f"Feed not found in cache: {url}")
+                    return None
+            else:
+                # feedparserにURLを直接渡すと毎回新しい接続になるため、
+                # 共有HTTPクライアントで取得したバイト列をパースする
+                started = time.perf_counter()
+                response = self.http_client.get(url, headers=headers)
+                FEED_FETCH_SECONDS.labels(source_label).observe(time.perf_counter() - started)
+                FEED_FETCH_BYTES.labels(source_label).inc(len(response.content))
+                if self.cache and response.status_code == 200:
+                    self.cache.store(response, url=url)
+                elif self.cache and response.status_code == 304:
+                    self.cache.record_not_modified(url, response)
+            FEED_FETCH_TOTAL.labels(source_label, str(response.status_code)).inc()
+
+            if response.status_code == 304:
+                logger.info(f"Feed not modified: {url}")
+                return feedparser.FeedParserDict(
+                    status=304,
+                    etag=response.headers.get("etag", etag),
+                    modified=response.headers.get("last-modified", modified),
+                    entries=[],
+                    bozo=False
+                )
+
+            if response.status_code >= 400:
+                logger.error(f"Error fetching feed from {url}: HTTP {response.status_code}")
+                return feedparser.FeedParserDict(
+                    status=response.status_code,
+                    entries=[],
+                    bozo=True
+                )
+
+            # 相対URLを解決できるよう、取得元URLをContent-Locationとして渡す
+            started = time.perf_counter()
+            feed = parse_feed(
+                response.content,
+                {"content-location": response.url, **response.headers},
+                cutoff=self._parse_cutoff()
+            )
+            FEED_PARSE_SECONDS.labels(feed.parser).observe(time.perf_counter() - started)
+            logger.debug(f"Parsed feed from {url} with {feed.parser} parser")
+            self._apply_link_header(feed, response.headers.get("link"))
+            feed["status"] = response.status_code
+            feed["etag"] = response.headers.get("etag")
+            feed["modified"] = response.headers.get("last-modified")
 
             # フィードが正常に取得できたか確認
             if feed.bozo:
@@ -40,23 +171,212 @@ class RSSService:
 
             return feed
         except Exception as e:
+            FEED_FETCH_TOTAL.labels(source_label, "error").inc()
             logger.error(f"Error fetching feed from {url}: {str(e)}")
             return None
 
-    def parse_articles(self, feed: feedparser.FeedParserDict, source_id: int) -> List[Dict]:
+    def _apply_link_header(self, feed: feedparser.FeedParserDict, link_header: Optional[str]) -> None:
+        """
+        LinkヘッダーのWebSubハブ / selfをフィードに設定
+
+        フィード本文の<atom:link>が優先（本文に無い場合のみ設定）。
+        """
+        if not link_header:
+            return
+        for link in parse_header_links(link_header):
+            rel = link.get("rel")
+            if rel in ("hub", "self") and link.get("url") and not feed.get(rel):
+                feed[rel] = link["url"]
+
+    def _parse_cutoff(self) -> datetime:
+        """
+        パースを打ち切る基準日時（UTC）
+
+        期間制限の判定はローカル時刻で行われるため、1日の余裕を持たせる。
+        """
+        return datetime.utcnow() - timedelta(days=settings.ARTICLE_AGE_LIMIT_DAYS + 1)
+
+    def fetch_feeds(
+        self, sources: List[RSSSource]
+    ) -> List[Tuple[RSSSource, Optional[feedparser.FeedParserDict]]]:
+        """
+        複数のRSS情報源を並行して取得
+
+        ネットワーク待ちがほとんどのため、スレッドプールで同時に取得する。
+        DBセッションはスレッド間で共有できないので、ワーカーには
+        URLと前回のETag / Last-Modifiedだけを渡す。
+
+        Args:
+            sources: RSS情報源のリスト
+
+        Returns:
+            (情報源, フィード)のリスト（sourcesと同じ順序）
+        """
+        if not sources:
+            return []
+
+        requests_args = [(source.url, source.etag, source.last_modified, source.id) for source in sources]
+        max_workers = max(1, min(settings.FETCH_MAX_WORKERS, len(requests_args)))
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-fetch") as executor:
+            feeds = list(executor.map(lambda args: self.fetch_feed(*args), requests_args))
+
+        if self.cache and not self.cache.replay:
+            try:
+                self.cache.maybe_evict()
+            except Exception as e:
+                logger.warning(f"Error evicting feed cache: {str(e)}")
+
+        return list(zip(sources, feeds))
+
+    def update_fetch_state(self, source: RSSSource, feed: Optional[feedparser.FeedParserDict]) -> None:
+        """
+        取得結果（ETag / Last-Modified / HTTPステータス）を情報源に反映
+
+        コミットは通知完了後にまとめて行う（commit_fetch_state）。
+        通知に失敗した場合に304で記事を取りこぼさないため。
+
+        Args:
+            source: RSS情報源
+            feed: fetch_feedの戻り値
+        """
+        source.last_fetched_at = datetime.utcnow()
+
+        if not feed:
+            source.last_http_status = None
+            return
+
+        status = feed.get("status")
+        source.last_http_status = status
+
+        if status is not None and status < 400:
+            source.etag = feed.get("etag")
+            source.last_modified = feed.get("modified")
+
+    def record_fetch_success(self, source: RSSSource) -> None:
+        """取得成功時にサーキットブレーカーをリセット"""
+        if source.consecutive_failures or source.retry_after:
+            logger.info(f"Source {source.name} recovered after {source.consecutive_failures} failures")
+        source.consecutive_failures = 0
+        source.retry_after = None
+
+    def record_fetch_failure(self, source: RSSSource) -> None:
+        """
+        取得失敗を記録し、閾値を超えたら取得を一時停止（サーキットオープン）
+
+        停止時間はCIRCUIT_BREAKER_BASE_MINUTESと取得間隔の長い方から失敗ごとに倍増し、
+        CIRCUIT_BREAKER_MAX_MINUTESを上限とする。期限後の取得が再試行となり、
+        成功すればリセット、失敗すればさらに停止時間を延ばす。
+        """
+        source.consecutive_failures = (source.consecutive_failures or 0) + 1
+
+        over_threshold = source.consecutive_failures - settings.CIRCUIT_BREAKER_THRESHOLD
+        if over_threshold < 0:
+            return
+
+        # 停止時間が取得間隔（dailyでは1日）より短いと、次の取得を1回も飛ばさない
+        interval = self._fetch_interval_minutes(source)
+        backoff_minutes = min(
+            max(settings.CIRCUIT_BREAKER_BASE_MINUTES, interval) * (2 ** min(over_threshold, 20)),
+            settings.CIRCUIT_BREAKER_MAX_MINUTES
+        )
+        # 期限ちょうどの取得を飛ばすかが実行時刻の数秒のずれで変わらないよう、間隔の半分だけ延ばす
+        source.retry_after = datetime.utcnow() + timedelta(minutes=backoff_minutes + interval / 2)
+        logger.warning(
+            f"Circuit open for {source.name}: {source.consecutive_failures} consecutive failures, "
+            f"skipping until {source.retry_after.isoformat()} UTC"
+        )
+
+    def _fetch_interval_minutes(self, source: RSSSource) -> int:
+        """情報源を取得する間隔（分、adaptiveは情報源ごとの巡回間隔、dailyは通知の間隔）"""
+        if settings.POLLING_MODE == "adaptive":
+            return source.poll_interval_minutes or settings.POLL_DEFAULT_INTERVAL_MINUTES
+        return 24 * 60
+
+    def _circuit_open_error(self, source: RSSSource) -> Dict:
+        """サーキットオープン中の情報源のエラー情報"""
+        return {
+            "source_name": source.name,
+            "error": f"circuit open: {source.consecutive_failures}回連続失敗",
+            "circuit_open": True
+        }
+
+    def commit_fetch_state(self) -> None:
+        """update_fetch_stateで反映した取得状態を保存"""
+        try:
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error saving feed fetch state: {str(e)}")
+            raise
+
+    def _entry_published_at(self, entry: feedparser.FeedParserDict) -> Optional[datetime]:
+        """エントリの公開日時を取得（不明な場合None）"""
+        if hasattr(entry, "published_parsed") and entry.published_parsed:
+            try:
+                return datetime(*entry.published_parsed[:6])
+            except Exception as e:
+                logger.warning(f"Error parsing published date: {str(e)}")
+        return None
+
+    def _is_sorted_newest_first(self, published_dates: List[Optional[datetime]]) -> bool:
+        """
+        エントリが新しい順に並んでいるかチェック
+
+        公開日時が欠けている、または順序が崩れているフィードは
+        ウォーターマークで打ち切ると記事を取りこぼすため、Falseを返す。
+        """
+        if not published_dates or any(d is None for d in published_dates):
+            return False
+        return all(a >= b for a, b in zip(published_dates, published_dates[1:]))
+
+    def parse_articles(
+        self,
+        feed: feedparser.FeedParserDict,
+        source_id: int,
+        since_published_at: Optional[datetime] = None,
+        since_guid: Optional[str] = None
+    ) -> List[Dict]:
         """
         フィードから記事情報を抽出
 
+        ウォーターマーク（前回までに確認した最新記事の公開日時・GUID）が
+        指定された場合、新しい順に並んだフィードではそこに到達した時点で打ち切る。
+        並び順が信頼できないフィードは全件を処理する。
+
         Args:
             feed: feedparser.FeedParserDict
             source_id: RSS情報源のID
+            since_published_at: 前回確認した最新記事の公開日時
+            since_guid: 前回確認した最新記事のGUID
 
         Returns:
             記事情報のリスト
         """
         articles = []
 
-        for entry in feed.entries:
+        entries = feed.entries
+        published_dates = [self._entry_published_at(entry) for entry in entries]
+
+        use_watermark = (
+            settings.ENABLE_FEED_WATERMARK
+            and (since_published_at is not None or since_guid)
+            and self._is_sorted_newest_first(published_dates)
+        )
+
+        for entry, published_at in zip(entries, published_dates):
+            guid = entry.get("id") or entry.get("link", "")
+
+            # 前回確認済みの記事に到達したら、以降は全て既読
+            # （GUIDが一致しても公開日時が更新された記事は先頭に移動しているため、打ち切らない）
+            if use_watermark:
+                if since_guid and guid == since_guid and (
+                    since_published_at is None or published_at <= since_published_at
+                ):
+                    break
+                if since_published_at is not None and published_at < since_published_at:
+                    break
+
             # 記事URLを取得
             article_url = entry.get("link", "")
             if not article_url:
@@ -65,23 +385,150 @@ class RSSService:
             # タイトルを取得
             title = entry.get("title", "No Title")
 
-            # 公開日時を取得
-            published_at = None
-            if hasattr(entry, "published_parsed") and entry.published_parsed:
-                try:
-                    published_at = datetime(*entry.published_parsed[:6])
-                except Exception as e:
-                    logger.warning(f"Error parsing published date: {str(e)}")
-
             articles.append({
                 "article_url": article_url,
                 "title": title,
                 "published_at": published_at,
+                "guid": guid,
                 "source_id": source_id
             })
 
+        if use_watermark and len(articles) < len(entries):
+            logger.debug(
+                f"Stopped at watermark for source {source_id}: "
+                f"{len(articles)}/{len(entries)} entries processed"
+            )
+
         return articles
 
+    def update_watermark(self, source: RSSSource, feed: feedparser.FeedParserDict) -> None:
+        """
+        フィード内の最新記事をウォーターマークとして情報源に反映
+
+        コミットはupdate_fetch_stateと同様に通知完了後に行う。
+
+        Args:
+            source: RSS情報源
+            feed: feedparser.FeedParserDict
+        """
+        newest_entry = None
+        newest_published_at = None
+
+        for entry in feed.entries:
+            published_at = self._entry_published_at(entry)
+            if published_at is None:
+                continue
+            if newest_published_at is None or published_at > newest_published_at:
+                newest_entry = entry
+                newest_published_at = published_at
+
+        if newest_entry is None:
+            return
+
+        if source.watermark_published_at is None or newest_published_at >= source.watermark_published_at:
+            source.watermark_published_at = newest_published_at
+            source.watermark_guid = newest_entry.get("id") or newest_entry.get("link", "")
+
+    def compute_poll_interval(self, feed: feedparser.FeedParserDict) -> int:
+        """
+        フィードの更新頻度から巡回間隔（分）を算出
+
+        直近の記事の投稿間隔の中央値の半分を目安とし、
+        POLL_MIN_INTERVAL_MINUTES〜POLL_MAX_INTERVAL_MINUTESに収める。
+        最新記事が最大間隔より古い情報源は休眠中とみなし最大間隔とする。
+
+        Args:
+            feed: feedparser.FeedParserDict
+
+        Returns:
+            巡回間隔（分）
+        """
+        dates = sorted(
+            (d for d in (self._entry_published_at(entry) for entry in feed.entries) if d),
+            reverse=True
+        )[:10]
+
+        if len(dates) < 2:
+            return settings.POLL_DEFAULT_INTERVAL_MINUTES
+
+        if datetime.utcnow() - dates[0] > timedelta(minutes=settings.POLL_MAX_INTERVAL_MINUTES):
+            return settings.POLL_MAX_INTERVAL_MINUTES
+
+        gaps = sorted((a - b).total_seconds() / 60 for a, b in zip(dates, dates[1:]))
+        median_gap = gaps[len(gaps) // 2]
+
+        return int(min(
+            max(median_gap / 2, settings.POLL_MIN_INTERVAL_MINUTES),
+            settings.POLL_MAX_INTERVAL_MINUTES
+        ))
+
+    def update_poll_schedule(
+        self,
+        source: RSSSource,
+        feed: Optional[feedparser.FeedParserDict],
+        push_active: bool = False
+    ) -> None:
+        """
+        次回巡回日時を情報源に反映
+
+        記事を取得できた場合は巡回間隔を再計算し、
+        304やエラーの場合は前回の間隔を使う。
+        WebSubで購読中の情報源は更新がプッシュされるため、取りこぼし確認として最大間隔で巡回する。
+
+        Args:
+            source: RSS情報源
+            feed: fetch_feedの戻り値
+            push_active: WebSubの購読が有効か
+        """
+        if feed and feed.get("status", 200) < 400 and feed.get("entries"):
+            source.poll_interval_minutes = self.compute_poll_interval(feed)
+
+        interval = source.poll_interval_minutes or settings.POLL_DEFAULT_INTERVAL_MINUTES
+        if push_active:
+            interval = settings.POLL_MAX_INTERVAL_MINUTES
+        source.next_poll_at = datetime.utcnow() + timedelta(minutes=interval)
+
+    def get_websub_subscriptions(self, sources: List[RSSSource]) -> Dict[int, WebSubSubscription]:
+        """情報源ID → WebSub購読をまとめて取得（ENABLE_WEBSUB=falseの場合は空）"""
+        if not settings.ENABLE_WEBSUB or not sources:
+            return {}
+        subscriptions = self.db.query(WebSubSubscription).filter(
+            WebSubSubscription.source_id.in_([source.id for source in sources])
+        ).all()
+        return {subscription.source_id: subscription for subscription in subscriptions}
+
+    def update_websub_hub(
+        self,
+        source: RSSSource,
+        feed: feedparser.FeedParserDict,
+        subscription: Optional[WebSubSubscription]
+    ) -> None:
+        """
+        フィードで検出したWebSubハブを記録
+
+        購読の申し込みはスケジューラー（WebSubService.renew_subscriptions）が行う。
+        ハブやトピックが変わった場合は購読し直す。コミットはupdate_fetch_stateと同様。
+
+        Args:
+            source: RSS情報源
+            feed: fetch_feedの戻り値
+            subscription: 既存の購読（なければNone）
+        """
+        hub_url = feed.get("hub")
+        if not hub_url:
+            return
+
+        topic_url = feed.get("self") or source.url
+        if subscription is None:
+            self.db.add(WebSubSubscription(source_id=source.id, hub_url=hub_url, topic_url=topic_url))
+            logger.info(f"Discovered WebSub hub for {source.name}: {hub_url}")
+        elif subscription.hub_url != hub_url or subscription.topic_url != topic_url:
+            subscription.hub_url = hub_url
+            subscription.topic_url = topic_url
+            subscription.state = "discovered"
+            subscription.lease_expires_at = None
+            logger.info(f"WebSub hub changed for {source.name}: {hub_url}")
+
     def is_article_notified(self, article_url: str) -> bool:
         """
         記事が既に通知済みかチェック
@@ -92,11 +539,61 @@ class RSSService:
         Returns:
             通知済みの場合True
         """
-        existing = self.db.query(NotifiedArticle).filter(
-            NotifiedArticle.article_url == article_url
+        existing = self.db.query(NotifiedArticle.id).filter(
+            NotifiedArticle.url_hash == url_hash(article_url)
         ).first()
         return existing is not None
 
+    def get_notified_urls(
+        self,
+        article_urls: Iterable[str],
+        channel_id: Optional[str] = None,
+        notified_before: Optional[datetime] = None
+    ) -> Set[str]:
+        """
+        渡されたURLのうち通知済みのものをまとめて取得
+
+        記事ごとにクエリを発行せず、URLハッシュのIN句で一括チェックする
+        （バインド変数の上限を超えないよう一定件数ごとに分割）。
+
+        Args:
+            article_urls: 記事URLのリスト
+            channel_id: 指定した場合はそのチャンネルに通知済みのもの（ChannelNotifiedArticle）
+            notified_before: 指定した場合はこの日時より前に通知したもの（channel_id未指定時のみ）
+
+        Returns:
+            通知済みの記事URLの集合
+        """
+        urls_by_hash: Dict[int, List[str]] = {}
+        for url in article_urls:
+            if url:
+                urls_by_hash.setdefault(url_hash(url), []).append(url)
+
+        hashes = list(urls_by_hash)
+        notified: Set[str] = set()
+        started = time.perf_counter()
+
+        for i in range(0, len(hashes), self.DEDUP_BATCH_SIZE):
+            chunk = hashes[i:i + self.DEDUP_BATCH_SIZE]
+            if channel_id is None:
+                query = self.db.query(NotifiedArticle.url_hash).filter(NotifiedArticle.url_hash.in_(chunk))
+                if notified_before is not None:
+                    query = query.filter(NotifiedArticle.notified_at < notified_before)
+            else:
+                query = self.db.query(ChannelNotifiedArticle.url_hash).filter(
+                    ChannelNotifiedArticle.channel_id == channel_id,
+                    ChannelNotifiedArticle.url_hash.in_(chunk)
+                )
+            rows = query.all()
+            for row in rows:
+                notified.update(urls_by_hash[row[0]])
+
+        if hashes:
+            DEDUP_QUERY_SECONDS.labels("global" if channel_id is None else "channel").observe(
+                time.perf_counter() - started
+            )
+        return notified
+
     def is_article_within_age_limit(self, published_at: Optional[datetime]) -> bool:
         """
         記事が期間制限内かチェック
@@ -133,6 +630,8 @@ class RSSService:
         """
         タイトルに除外キーワードが含まれているかチェック
 
+        INCLUDE_KEYWORDSが設定されている場合、そのいずれも含まないタイトルも除外対象とする。
+
         Args:
             title: 記事タイトル
 
@@ -142,49 +641,153 @@ class RSSService:
         if not settings.ENABLE_KEYWORD_FILTER:
             return False
 
-        # HTMLエンティティをデコード（例: &#038; → &）
-        decoded_title = html.unescape(title)
+        result = self.matcher.match(title)
+        if result.allowed:
+            return False
+
+        if result.excluded_keyword:
+            KEYWORD_FILTER_DROPPED.labels("excluded").inc()
+            logger.info(f"Article excluded by keyword '{result.excluded_keyword}': {title[:80]}...")
+        else:
+            KEYWORD_FILTER_DROPPED.labels("no_include").inc()
+            logger.info(f"Article excluded (no include keyword matched): {title[:80]}...")
+        return True
 
-        # 各除外キーワードをチェック（大文字小文字を区別しない）
-        for keyword in settings.EXCLUDE_KEYWORDS:
-            if keyword.lower() in decoded_title.lower():
-                logger.info(f"Article excluded by keyword '{keyword}': {decoded_title[:80]}...")
-                return True
+    def filter_new_articles(
+        self,
+        articles: List[Dict],
+        source: RSSSource,
+        seen_hashes: Optional[Set[int]] = None
+    ) -> List[Dict]:
+        """
+        未通知 & 期間内 & キーワード除外の記事をフィルタリング
 
-        return False
+        チャンネル別の配信ルートが有効な場合は期間制限と情報源内の重複のみ判定する
+        （他の情報源に同じ記事があっても、ルートによって通知先が異なるため残す）。
+
+        Args:
+            articles: parse_articlesの戻り値
+            source: RSS情報源
+            seen_hashes: 同一実行内で採用済みの記事のURLハッシュ（更新される）
 
-    def get_new_articles(self) -> tuple[List[Dict], Dict]:
+        Returns:
+            フィルタを通過した記事のリスト（"source_name"を設定）
+        """
+        routing = self.channel_routing_enabled
+        if seen_hashes is None or routing:
+            seen_hashes = set()
+
+        # 通知済みURLを情報源ごとに1クエリで取得
+        notified_urls = set() if routing else self.get_notified_urls(a["article_url"] for a in articles)
+
+        new_articles = []
+        for article in articles:
+            # 未通知チェック
+            if article["article_url"] in notified_urls:
+                continue
+
+            # 期間制限チェック
+            if not self.is_article_within_age_limit(article.get("published_at")):
+                continue
+
+            # 除外キーワードチェック
+            if not routing and self.contains_excluded_keyword(article.get("title", "")):
+                continue
+
+            # 同一実行内の重複チェック
+            article_hash = url_hash(article["article_url"])
+            if article_hash in seen_hashes:
+                continue
+            seen_hashes.add(article_hash)
+
+            # フィルタをパスした記事を追加
+            article["source_name"] = source.name
+            new_articles.append(article)
+
+        return new_articles
+
+    def get_new_articles(self, sources: Optional[List[RSSSource]] = None) -> tuple[List[Dict], Dict]:
         """
         全RSS情報源から未通知の記事を取得
 
+        Args:
+            sources: 取得対象のRSS情報源（省略時は有効な全情報源）
+
         Returns:
             (未通知記事のリスト, 統計情報)
             統計情報: {
                 "total_sources": 監視中のRSS数,
                 "successful_sources": 取得成功したRSS数,
+                "successful_source_ids": 取得成功したRSSのID,
                 "errors": エラー情報のリスト
             }
         """
         new_articles = []
-        sources = self.get_active_sources()
+        if sources is None:
+            sources = self.get_active_sources()
         errors = []
-        successful_count = 0
-
-        logger.info(f"Fetching articles from {len(sources)} RSS sources")
+        successful_source_ids: List[int] = []
+        # 情報源ごとに使われたパーサーの集計（fast / feedparser）
+        parser_counts: Dict[str, int] = {}
+        # 同一実行内で複数の情報源に同じ記事が載っている場合の重複除外用
+        seen_hashes: Set[int] = set()
 
+        # 連続失敗で停止中の情報源は取得せず、エラーとして報告する
+        now = datetime.utcnow()
+        fetch_targets = []
         for source in sources:
+            if source.is_circuit_open(now):
+                logger.info(f"Skipping {source.name}: circuit open until {source.retry_after.isoformat()} UTC")
+                errors.append(self._circuit_open_error(source))
+            else:
+                fetch_targets.append(source)
+
+        logger.info(
+            f"Fetching articles from {len(fetch_targets)} RSS sources "
+            f"(workers: {settings.FETCH_MAX_WORKERS}, timeout: {settings.FETCH_TIMEOUT_SECONDS}s)"
+        )
+
+        subscriptions = self.get_websub_subscriptions(fetch_targets)
+
+        for source, feed in self.fetch_feeds(fetch_targets):
             try:
-                logger.info(f"Fetching feed from: {source.name} ({source.url})")
-                feed = self.fetch_feed(source.url)
+                subscription = subscriptions.get(source.id)
+                self.update_fetch_state(source, feed)
+                self.update_poll_schedule(
+                    source, feed, push_active=subscription is not None and subscription.is_active(now)
+                )
+
+                # 304 Not Modified: 前回から更新なし（成功として扱う）
+                if feed and feed.get("status") == 304:
+                    self.record_fetch_success(source)
+                    successful_source_ids.append(source.id)
+                    continue
+
+                if feed and feed.get("status", 200) >= 400:
+                    logger.warning(f"Failed to fetch feed from {source.name}: HTTP {feed.status}")
+                    self.record_fetch_failure(source)
+                    errors.append({
+                        "source_name": source.name,
+                        "error": f"HTTP {feed.status}"
+                    })
+                    continue
 
                 if not feed:
                     logger.warning(f"Failed to fetch feed from {source.name}")
+                    self.record_fetch_failure(source)
                     errors.append({
                         "source_name": source.name,
                         "error": "フィード取得失敗"
                     })
                     continue
 
+                self.record_fetch_success(source)
+                if settings.ENABLE_WEBSUB:
+                    self.update_websub_hub(source, feed, subscription)
+
+                parser_name = feed.get("parser", "feedparser")
+                parser_counts[parser_name] = parser_counts.get(parser_name, 0) + 1
+
                 if not feed.entries:
                     logger.warning(f"No entries found in feed from {source.name}")
                     errors.append({
@@ -193,30 +796,21 @@ class RSSService:
                     })
                     continue
 
-                successful_count += 1
-                articles = self.parse_articles(feed, source.id)
+                successful_source_ids.append(source.id)
+                articles = self.parse_articles(
+                    feed,
+                    source.id,
+                    since_published_at=source.watermark_published_at,
+                    since_guid=source.watermark_guid
+                )
+                self.update_watermark(source, feed)
                 logger.info(f"Found {len(articles)} articles from {source.name}")
 
-                # 未通知 & 期間内 & キーワード除外の記事をフィルタリング
-                for article in articles:
-                    # 未通知チェック
-                    if self.is_article_notified(article["article_url"]):
-                        continue
-
-                    # 期間制限チェック
-                    if not self.is_article_within_age_limit(article.get("published_at")):
-                        continue
-
-                    # 除外キーワードチェック
-                    if self.contains_excluded_keyword(article.get("title", "")):
-                        continue
-
-                    # フィルタをパスした記事を追加
-                    article["source_name"] = source.name
-                    new_articles.append(article)
+                new_articles.extend(self.filter_new_articles(articles, source, seen_hashes))
 
             except Exception as e:
                 logger.error(f"Error processing source {source.name}: {str(e)}")
+                self.record_fetch_failure(source)
                 errors.append({
                     "source_name": source.name,
                     "error": str(e)[:50]  # エラーメッセージを50文字に制限
@@ -224,35 +818,320 @@ class RSSService:
                 continue
 
         logger.info(f"Total new articles found: {len(new_articles)}")
+        if parser_counts:
+            logger.info(
+                "Feed parser paths: "
+                + ", ".join(f"{name}={count}" for name, count in sorted(parser_counts.items()))
+            )
 
         stats = {
             "total_sources": len(sources),
-            "successful_sources": successful_count,
-            "errors": errors
+            "successful_sources": len(successful_source_ids),
+            "successful_source_ids": successful_source_ids,
+            "errors": errors,
+            "parser_counts": parser_counts
         }
 
         return new_articles, stats
 
-    def mark_as_notified(self, articles: List[Dict]) -> None:
+    def _build_article_rows(self, articles: List[Dict], **extra) -> List[Dict]:
+        """記事情報をINSERT用の行に変換（url_hashが同じ記事は1件にまとめる）"""
+        rows_by_hash: Dict[int, Dict] = {}
+        for article in articles:
+            article_hash = url_hash(article["article_url"])
+            rows_by_hash.setdefault(article_hash, {
+                "article_url": article["article_url"],
+                "url_hash": article_hash,
+                "title": article["title"],
+                "published_at": article.get("published_at"),
+                "source_id": article["source_id"],
+                **extra
+            })
+        return list(rows_by_hash.values())
+
+    def mark_as_notified(self, articles: List[Dict], commit: bool = True) -> int:
         """
         記事を通知済みとしてDBに保存
 
+        1件ずつORMで追加せず、INSERT ... ON CONFLICT DO NOTHINGでまとめて保存する。
+        手動実行との競合などで通知済みの記事が混ざっていても、
+        その行だけがスキップされ、バッチ全体はロールバックされない。
+
         Args:
             articles: 記事情報のリスト
+            commit: Falseの場合はコミットせず、呼び出し元のトランザクションに含める
+
+        Returns:
+            実際に保存した件数
+        """
+        rows = self._build_article_rows(articles, notified_at=datetime.utcnow())
+
+        try:
+            inserted = 0
+            for i in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                inserted += self._insert_ignore_duplicates(NotifiedArticle, rows[i:i + self.INSERT_BATCH_SIZE])
+
+            if commit:
+                self.db.commit()
+            logger.info(
+                f"Marked {inserted} articles as notified "
+                f"({len(articles) - inserted} already notified)"
+            )
+            return inserted
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error marking articles as notified: {str(e)}")
+            raise
+
+    def mark_as_notified_in_channel(self, channel_id: str, articles: List[Dict], commit: bool = True) -> int:
+        """
+        記事をチャンネルに通知済みとしてDBに保存（チャンネル別の配信ルート用）
+
+        Args:
+            channel_id: 通知先チャンネル
+            articles: 記事情報のリスト
+            commit: Falseの場合はコミットせず、呼び出し元のトランザクションに含める
+
+        Returns:
+            実際に保存した件数
         """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "channel_id": channel_id,
+                "url_hash": row["url_hash"],
+                "article_url": row["article_url"],
+                "source_id": row["source_id"],
+                "notified_at": now
+            }
+            for row in self._build_article_rows(articles)
+        ]
+
         try:
-            for article in articles:
-                notified_article = NotifiedArticle(
-                    article_url=article["article_url"],
-                    title=article["title"],
-                    published_at=article.get("published_at"),
-                    source_id=article["source_id"]
+            inserted = 0
+            for i in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                inserted += self._insert_ignore_duplicates(
+                    ChannelNotifiedArticle, rows[i:i + self.INSERT_BATCH_SIZE], ("channel_id", "url_hash")
                 )
-                self.db.add(notified_article)
+
+            if commit:
+                self.db.commit()
+            logger.info(f"Marked {inserted} articles as notified in {channel_id}")
+            return inserted
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error marking articles as notified in {channel_id}: {str(e)}")
+            raise
+
+    def stage_articles(self, articles: List[Dict]) -> int:
+        """
+        巡回で取得した記事を通知待ちとして保存
+
+        取得状態（ETag・ウォーターマーク・次回巡回日時）も同じトランザクションで保存する。
+
+        Args:
+            articles: 記事情報のリスト
+
+        Returns:
+            新たに保存した件数
+        """
+        rows = self._build_article_rows(articles, staged_at=datetime.utcnow())
+
+        try:
+            inserted = 0
+            for i in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                inserted += self._insert_ignore_duplicates(StagedArticle, rows[i:i + self.INSERT_BATCH_SIZE])
 
             self.db.commit()
-            logger.info(f"Marked {len(articles)} articles as notified")
+            logger.info(f"Staged {inserted} articles ({len(articles) - inserted} already staged)")
+            return inserted
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error marking articles as notified: {str(e)}")
+            logger.error(f"Error staging articles: {str(e)}")
             raise
+
+    def poll_due_sources(self) -> int:
+        """
+        巡回日時を迎えた情報源のみ取得し、新着記事を通知待ちとして保存
+
+        Returns:
+            新たに保存した件数
+        """
+        sources = self.get_due_sources()
+        if not sources:
+            return 0
+
+        articles, stats = self.get_new_articles(sources)
+        logger.info(
+            f"Polled {len(sources)} due sources: "
+            f"{stats['successful_sources']} succeeded, {len(stats['errors'])} errors"
+        )
+        return self.stage_articles(articles)
+
+    def stage_pushed_content(self, source: RSSSource, content: bytes, headers: Dict[str, str]) -> int:
+        """
+        WebSubで配信されたフィードの記事を通知待ちとして保存
+
+        巡回と同じくパース・通知済みチェック・期間制限・キーワードフィルタを通す。
+        配信内容は更新分のみのことが多いため、ウォーターマークでは打ち切らない。
+
+        Args:
+            source: RSS情報源
+            content: 配信されたフィード本文
+            headers: リクエストヘッダー（小文字キー）
+
+        Returns:
+            新たに保存した件数
+        """
+        feed = parse_feed(content, {"content-location": source.url, **headers}, cutoff=self._parse_cutoff())
+        if feed.bozo and not feed.entries:
+            logger.warning(f"Could not parse pushed content for {source.name}: {feed.get('bozo_exception')}")
+            return 0
+
+        articles = self.parse_articles(feed, source.id)
+        self.update_watermark(source, feed)
+        new_articles = self.filter_new_articles(articles, source)
+        logger.info(
+            f"Received {len(feed.entries)} pushed entries from {source.name}, "
+            f"{len(new_articles)} new"
+        )
+        return self.stage_articles(new_articles)
+
+    def get_staged_articles(self) -> tuple[List[Dict], Dict]:
+        """
+        通知待ちの記事と、各情報源の直近の取得結果から統計情報を取得
+
+        巡回モード（POLLING_MODE=adaptive）で、日次ダイジェストの作成に使う。
+        戻り値はget_new_articlesと同じ形式で、統計情報には
+        clear_staged_articlesに渡す "staged_up_to_id" を含む。
+
+        Returns:
+            (未通知記事のリスト, 統計情報)
+        """
+        sources = self.get_active_sources()
+        source_names = {source.id: source.name for source in sources}
+
+        staged = self.db.query(StagedArticle).order_by(StagedArticle.id).all()
+        # チャンネル別の配信ルートが有効な場合、通知済みの判定はChannelRouterで行う
+        if self.channel_routing_enabled:
+            notified_urls = set()
+        else:
+            notified_urls = self.get_notified_urls(a.article_url for a in staged)
+
+        new_articles = []
+        for staged_article in staged:
+            if staged_article.article_url in notified_urls:
+                continue
+
+            # 取得から通知までの間に期間制限を過ぎた記事を除外
+            if not self.is_article_within_age_limit(staged_article.published_at):
+                continue
+
+            new_articles.append({
+                "article_url": staged_article.article_url,
+                "title": staged_article.title,
+                "published_at": staged_article.published_at,
+                "source_id": staged_article.source_id,
+                "source_name": source_names.get(staged_article.source_id, "Unknown")
+            })
+
+        errors = []
+        successful_source_ids: List[int] = []
+        for source in sources:
+            if source.is_circuit_open():
+                errors.append(self._circuit_open_error(source))
+                continue
+            if source.last_fetched_at is None:
+                continue
+            if source.last_http_status is not None and source.last_http_status < 400:
+                successful_source_ids.append(source.id)
+            else:
+                errors.append({
+                    "source_name": source.name,
+                    "error": f"HTTP {source.last_http_status}" if source.last_http_status else "フィード取得失敗"
+                })
+
+        logger.info(f"Total staged articles to notify: {len(new_articles)}")
+
+        stats = {
+            "total_sources": len(sources),
+            "successful_sources": len(successful_source_ids),
+            "successful_source_ids": successful_source_ids,
+            "errors": errors,
+            "staged_up_to_id": staged[-1].id if staged else None
+        }
+
+        return new_articles, stats
+
+    def clear_staged_articles(self, up_to_id: Optional[int], commit: bool = True) -> None:
+        """
+        ダイジェストに含めた通知待ち記事を削除
+
+        取得後に追加された記事を消さないよう、指定したID以下のみ削除する。
+
+        Args:
+            up_to_id: get_staged_articlesの統計情報の "staged_up_to_id"
+            commit: Falseの場合はコミットせず、呼び出し元のトランザクションに含める
+        """
+        if up_to_id is None:
+            return
+
+        try:
+            self.db.query(StagedArticle).filter(
+                StagedArticle.id <= up_to_id
+            ).delete(synchronize_session=False)
+            if commit:
+                self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error clearing staged articles: {str(e)}")
+            raise
+
+    def _insert_ignore_duplicates(
+        self,
+        model,
+        rows: List[Dict],
+        conflict_columns: Tuple[str, ...] = ("url_hash",)
+    ) -> int:
+        """
+        記事を一括INSERT（url_hashが重複する行は無視）
+
+        PostgreSQL / SQLiteはON CONFLICT DO NOTHINGを使用する。
+        それ以外のDBでは既存のハッシュを除外してから通常のINSERTを行う。
+
+        Args:
+            model: NotifiedArticle / StagedArticle / ChannelNotifiedArticle
+            rows: 挿入する行のリスト
+            conflict_columns: 重複判定に使うユニーク制約のカラム（url_hashを最後に置く）
+
+        Returns:
+            挿入した件数
+        """
+        if not rows:
+            return 0
+
+        table = model.__table__
+        dialect = self.db.get_bind().dialect.name
+        key_columns = [table.c[name] for name in conflict_columns]
+
+        if dialect == "postgresql":
+            stmt = postgresql_insert(table).values(rows).on_conflict_do_nothing(
+                index_elements=key_columns
+            )
+        elif dialect == "sqlite":
+            stmt = sqlite_insert(table).values(rows).on_conflict_do_nothing(
+                index_elements=key_columns
+            )
+        else:
+            existing = {
+                tuple(row) for row in self.db.query(*key_columns).filter(
+                    table.c.url_hash.in_([r["url_hash"] for r in rows])
+                )
+            }
+            rows = [r for r in rows if tuple(r[name] for name in conflict_columns) not in existing]
+            if not rows:
+                return 0
+            stmt = table.insert().values(rows)
+
+        result = self.db.execute(stmt)
+        return result.rowcount
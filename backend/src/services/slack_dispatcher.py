@@ -0,0 +1,264 @@
+"""Rate-limit-aware dispatcher for Slack Web API calls"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Slack Web APIのメソッドごとのレート制限（1分あたりの回数）
+# https://api.slack.com/docs/rate-limits
+TIER_RATES_PER_MINUTE = {
+    "tier1": 1,
+    "tier2": 20,
+    "tier3": 50,
+    "tier4": 100,
+}
+
+# 読み取り系のメソッドはJSONボディを受け付けないため、フォーム形式で送る
+FORM_ENCODED_METHODS = {"conversations.history", "conversations.replies"}
+
+# 失敗として返るが、Slack側では処理されている可能性があるエラー
+AMBIGUOUS_ERRORS = {"internal_error", "fatal_error", "service_unavailable", "request_timeout"}
+
+METHOD_TIERS = {
+    "chat.update": "tier3",
+    "chat.delete": "tier3",
+    "conversations.history": "tier3",
+    "conversations.replies": "tier3",
+}
+
+
+class TokenBucket:
+    """
+    トークンバケット（スレッドセーフ）
+
+    rate_per_second の速度でトークンが補充され、最大 burst 個まで貯まる。
+    429を受けた場合は block_until() で指定時刻まで払い出しを止める。
+    """
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """トークンを1つ予約し、使えるようになるまでの待ち時間（秒）を返す"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+            self._updated_at = now
+
+            # 予約分はマイナスとして持ち、後続の呼び出しは順番に待つ
+            self._tokens -= 1
+            wait = -self._tokens / self.rate_per_second if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self) -> float:
+        """
+        トークンを1つ取得（必要なら待つ）
+
+        Returns:
+            待った時間（秒）
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def block_until(self, until: float) -> None:
+        """指定時刻（time.monotonic）まで払い出しを止める"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, until)
+
+
+@dataclass
+class PostResult:
+    """Slack API呼び出しの結果"""
+    ok: bool
+    ts: Optional[str] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    attempts: int = 0
+    # 最後のリクエストの応答時間
+    latency_seconds: float = 0.0
+    # トークンバケットとRetry-Afterで待った合計時間
+    throttled_seconds: float = 0.0
+    # 成功時のレスポンス本文
+    data: Optional[Dict] = None
+    # 失敗したが、Slack側では投稿されている可能性がある（応答のタイムアウト・5xxなど）
+    ambiguous: bool = False
+
+
+class SlackDispatcher:
+    """
+    Slack Web APIの呼び出しを、メソッドごとのレート制限に合わせて送信する
+
+    - メソッド（chat.postMessageはチャンネル単位）ごとのトークンバケットで送信間隔を調整
+    - 429を受けたらRetry-Afterの秒数だけ待って再送（SLACK_MAX_RETRIES回まで）
+    - コネクションを再利用するため、requests.Sessionを共有する
+
+    呼び出しは同期的に行い、応答を受け取ってから次を送るため、
+    呼び出し順（スレッド親 → 返信の順序）はそのまま保たれる。
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        post_message_per_second: Optional[float] = None,
+        post_message_burst: Optional[int] = None
+    ):
+        self.max_retries = max_retries if max_retries is not None else settings.SLACK_MAX_RETRIES
+        self.timeout = timeout if timeout is not None else settings.SLACK_TIMEOUT_SECONDS
+        self.post_message_per_second = post_message_per_second or settings.SLACK_POST_MESSAGE_PER_SECOND
+        self.post_message_burst = post_message_burst or settings.SLACK_POST_MESSAGE_BURST
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0))
+
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, method: str, channel: Optional[str]) -> TokenBucket:
+        """メソッド（chat.postMessageはチャンネルも）ごとのトークンバケットを取得"""
+        if method == "chat.postMessage":
+            # chat.postMessageは特別枠: チャンネルごとに1秒1件（短いバーストは許容）
+            key = (method, channel)
+            rate, burst = self.post_message_per_second, self.post_message_burst
+        else:
+            key = (method, None)
+            per_minute = TIER_RATES_PER_MINUTE[METHOD_TIERS.get(method, "tier3")]
+            rate, burst = per_minute / 60, max(1, per_minute // 10)
+
+        with self._buckets_lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(rate, burst)
+            return self._buckets[key]
+
+    @staticmethod
+    def _retry_after_seconds(response: requests.Response) -> float:
+        """Retry-Afterヘッダーの秒数（無い・不正な場合は1秒）"""
+        try:
+            return max(1.0, float(response.headers.get("Retry-After", "1")))
+        except ValueError:
+            return 1.0
+
+    def call(
+        self,
+        method: str,
+        payload: Dict,
+        bot_token: str,
+        api_base_url: Optional[str] = None
+    ) -> PostResult:
+        """
+        Slack Web APIを呼び出す
+
+        Args:
+            method: APIメソッド名（例: chat.postMessage）
+            payload: リクエストボディ（JSON、読み取り系のメソッドはフォーム形式で送る）
+            bot_token: Bot Token
+            api_base_url: APIのベースURL（省略時はSLACK_API_BASE_URL）
+
+        Returns:
+            PostResult
+        """
+        url = f"{api_base_url or settings.SLACK_API_BASE_URL}/{method}"
+        headers = {"Authorization": f"Bearer {bot_token}"}
+        if method in FORM_ENCODED_METHODS:
+            body = {"data": payload}
+        else:
+            headers["Content-Type"] = "application/json; charset=utf-8"
+            body = {"json": payload}
+        bucket = self._bucket(method, payload.get("channel"))
+        result = PostResult(ok=False)
+
+        while True:
+            result.throttled_seconds += bucket.acquire()
+            result.attempts += 1
+
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, headers=headers, timeout=self.timeout, **body)
+            except requests.exceptions.ConnectTimeout:
+                # 接続できていないため、投稿されていない
+                result.latency_seconds = time.perf_counter() - started
+                result.error = "timeout"
+                return result
+            except requests.exceptions.Timeout:
+                result.latency_seconds = time.perf_counter() - started
+                result.error = "timeout"
+                result.ambiguous = True
+                return result
+            except requests.exceptions.RequestException as e:
+                result.latency_seconds = time.perf_counter() - started
+                result.error = str(e)
+                result.ambiguous = True
+                return result
+            result.latency_seconds = time.perf_counter() - started
+            result.status_code = response.status_code
+
+            if response.status_code == 429:
+                retry_after = self._retry_after_seconds(response)
+                # 同じメソッドの後続の呼び出しも止める
+                bucket.block_until(time.monotonic() + retry_after)
+                if result.attempts > self.max_retries:
+                    result.error = "ratelimited"
+                    logger.error(
+                        f"Slack {method} rate limited, giving up after {result.attempts} attempts"
+                    )
+                    return result
+                logger.warning(f"Slack {method} rate limited, retrying after {retry_after:.0f}s")
+                continue
+
+            try:
+                data = response.json()
+            except ValueError:
+                result.error = f"HTTP {response.status_code}"
+                result.ambiguous = True
+                return result
+
+            if data.get("ok"):
+                result.ok = True
+                result.ts = data.get("ts")
+                result.error = None
+                result.data = data
+            else:
+                result.error = data.get("error", "Unknown error")
+                result.ambiguous = result.error in AMBIGUOUS_ERRORS
+            return result
+
+    def close(self) -> None:
+        """コネクションプールを解放"""
+        self.session.close()
+
+
+def summarize_results(results: List[PostResult]) -> Dict:
+    """
+    投稿結果の集計
+
+    Returns:
+        {"posts", "failed", "retries", "throttled_seconds", "avg_latency_seconds", "max_latency_seconds"}
+    """
+    latencies = [r.latency_seconds for r in results if r.attempts]
+    return {
+        "posts": len(results),
+        "failed": sum(1 for r in results if not r.ok),
+        "retries": sum(max(0, r.attempts - 1) for r in results),
+        "throttled_seconds": round(sum(r.throttled_seconds for r in results), 3),
+        "avg_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "max_latency_seconds": round(max(latencies), 3) if latencies else 0.0,
+    }
+
+
+# 共有ディスパッチャー（レート制限の状態とコネクションをプロセス内で共有する）
+slack_dispatcher = SlackDispatcher()
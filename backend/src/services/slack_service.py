@@ -1,11 +1,12 @@
 """Slack notification service"""
-import requests
 import logging
 import hashlib
 import time
 from typing import List, Dict, Optional
 from datetime import datetime
 from src.config.settings import settings
+from src.utils.metrics import SLACK_POST_RETRIES, SLACK_POST_SECONDS
+from .slack_dispatcher import PostResult, SlackDispatcher, slack_dispatcher, summarize_results
 
 logger = logging.getLogger(__name__)
 
@@ -13,10 +14,26 @@ logger = logging.getLogger(__name__)
 class SlackService:
     """Slack通知サービス"""
 
-    def __init__(self):
+    # Block Kitの1メッセージあたりの最大ブロック数（Slackの上限）
+    DIGEST_MAX_BLOCKS = 50
+
+    def __init__(self, dispatcher: Optional[SlackDispatcher] = None):
         self.webhook_url = settings.SLACK_WEBHOOK_URL
         self.bot_token = settings.SLACK_BOT_TOKEN
         self.channel_id = settings.SLACK_CHANNEL_ID
+        self.api_base_url = settings.SLACK_API_BASE_URL
+        self.dispatcher = dispatcher or slack_dispatcher
+        # 投稿ごとの結果（応答時間・レート制限で待った時間）
+        self.post_results: List[PostResult] = []
+
+    def is_configured(self, channel_id: Optional[str] = None) -> bool:
+        """
+        chat.postMessageで投稿できる設定か（Bot Tokenと投稿先チャンネル）
+
+        Args:
+            channel_id: 投稿先チャンネル（省略時はSLACK_CHANNEL_ID）
+        """
+        return bool(self.bot_token and (channel_id or self.channel_id))
 
     def format_main_message(
         self,
@@ -93,6 +110,88 @@ class SlackService:
 
         return message
 
+    @staticmethod
+    def _escape_mrkdwn(text: str) -> str:
+        """mrkdwnの制御文字（& < >）をエスケープ"""
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    @staticmethod
+    def _escape_link_url(url: str) -> str:
+        """<url|text>形式のリンクを壊す文字をパーセントエンコード"""
+        return url.replace("|", "%7C").replace("<", "%3C").replace(">", "%3E").replace(" ", "%20")
+
+    def format_digest_article(self, article: Dict, article_id: int = 0) -> Dict:
+        """
+        1件の記事をBlock Kitのsectionブロックに整形（タイトルを記事へのリンクにする）
+
+        Args:
+            article: 記事情報
+            article_id: 記事の通し番号
+
+        Returns:
+            sectionブロック
+        """
+        title = self._escape_mrkdwn(article.get("title") or "No Title")
+        url = self._escape_link_url(article.get("article_url", ""))
+        published_at = article.get("published_at")
+
+        text = f"#{article_id} <{url}|{title}>"
+        if isinstance(published_at, datetime):
+            text += f"\n公開日: {published_at.strftime('%Y-%m-%d')}"
+        elif published_at:
+            text += f"\n公開日: {published_at}"
+
+        # sectionのテキストは3000文字まで
+        return {"type": "section", "text": {"type": "mrkdwn", "text": text[:3000]}}
+
+    def format_digest_messages(self, articles: List[Dict]) -> List[List[Dict]]:
+        """
+        記事一覧を情報源ごとにまとめ、Block Kitメッセージに分割
+
+        情報源ごとに見出し（contextブロック）を置き、その下に記事を並べる。
+        1メッセージがDIGEST_MAX_BLOCKSを超える場合は次のメッセージに続ける
+        （情報源の途中で分かれた場合は見出しを繰り返す）。
+
+        Args:
+            articles: 記事情報のリスト
+
+        Returns:
+            メッセージごとのブロックのリスト
+        """
+        # 情報源ごとにまとめる（情報源の並びは最初に登場した順）
+        groups: Dict[str, List[Dict]] = {}
+        for article in articles:
+            groups.setdefault(article.get("source_name", "Unknown"), []).append(article)
+
+        messages: List[List[Dict]] = []
+        blocks: List[Dict] = []
+        article_id = 0
+
+        def source_header(source_name: str, count: int, continued: bool) -> Dict:
+            label = f"*{self._escape_mrkdwn(source_name)}*（{count}件）"
+            if continued:
+                label += " 続き"
+            return {"type": "context", "elements": [{"type": "mrkdwn", "text": label}]}
+
+        for source_name, source_articles in groups.items():
+            # 見出しと記事1件が入らない場合は次のメッセージへ
+            if len(blocks) + 2 > self.DIGEST_MAX_BLOCKS:
+                messages.append(blocks)
+                blocks = []
+            blocks.append(source_header(source_name, len(source_articles), continued=False))
+
+            for article in source_articles:
+                if len(blocks) >= self.DIGEST_MAX_BLOCKS:
+                    messages.append(blocks)
+                    blocks = [source_header(source_name, len(source_articles), continued=True)]
+                article_id += 1
+                blocks.append(self.format_digest_article(article, article_id=article_id))
+
+        if blocks:
+            messages.append(blocks)
+
+        return messages
+
     def format_thread_errors(self, errors: List[Dict]) -> str:
         """
         スレッド内のエラー情報メッセージを整形
@@ -106,41 +205,129 @@ class SlackService:
         if not errors:
             return ""
 
+        # 連続失敗で取得を停止中の情報源は別枠で表示
+        fetch_errors = [e for e in errors if not e.get("circuit_open")]
+        circuit_open = [e for e in errors if e.get("circuit_open")]
+
         message = "⚠️ 取得エラー詳細\n\n"
 
-        for error in errors[:10]:  # 最大10件まで表示
+        for error in fetch_errors[:10]:  # 最大10件まで表示
             source_name = error.get("source_name", "Unknown")
             error_msg = error.get("error", "Unknown error")
             message += f"- {source_name} ({error_msg})\n"
 
-        if len(errors) > 10:
-            message += f"\n...他 {len(errors) - 10}件のエラー"
+        if len(fetch_errors) > 10:
+            message += f"\n...他 {len(fetch_errors) - 10}件のエラー\n"
 
-        return message
+        if circuit_open:
+            message += "\n⏸️ 一時停止中（circuit open・自動で再試行します）\n\n"
+            for error in circuit_open[:10]:
+                source_name = error.get("source_name", "Unknown")
+                error_msg = error.get("error", "Unknown error")
+                message += f"- {source_name} ({error_msg})\n"
+
+            if len(circuit_open) > 10:
+                message += f"\n...他 {len(circuit_open) - 10}件\n"
 
-    def post_message(self, text: str, thread_ts: Optional[str] = None) -> Optional[str]:
+        return message.rstrip("\n")
+
+    def build_messages(
+        self,
+        articles: List[Dict],
+        total_sources: int = 0,
+        successful_sources: int = 0,
+        errors: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """
+        通知するメッセージを投稿順に組み立てる
+
+        1件目がメイン投稿（スレッド親）、以降はスレッド返信。
+        記事一覧はSLACK_MESSAGE_MODEに応じて、記事ごと（unfurl）または
+        情報源ごとにまとめたBlock Kit（digest）で組み立てる。
+
+        Args:
+            articles: 記事情報のリスト
+            total_sources: 監視中の総RSS数
+            successful_sources: 取得成功したRSS数
+            errors: エラー情報のリスト
+
+        Returns:
+            [{"kind": main / header / article / digest / errors, "text": 本文,
+              "blocks": Block Kitのブロック or None, "article_count": 含まれる記事数}, ...]
+        """
+        messages = [{
+            "kind": "main",
+            "text": self.format_main_message(
+                article_count=len(articles),
+                total_sources=total_sources,
+                successful_sources=successful_sources,
+                error_count=len(errors) if errors else 0
+            ),
+            "blocks": None,
+            "article_count": 0
+        }]
+
+        if articles:
+            if settings.SLACK_MESSAGE_MODE == "digest":
+                digest_messages = self.format_digest_messages(articles)
+                for index, blocks in enumerate(digest_messages, start=1):
+                    messages.append({
+                        "kind": "digest",
+                        "text": f"📄 新着記事一覧 ({index}/{len(digest_messages)})",
+                        "blocks": blocks,
+                        "article_count": sum(1 for block in blocks if block["type"] == "section")
+                    })
+            else:
+                # 各記事を個別に投稿（unfurl発火のため）
+                messages.append({"kind": "header", "text": "📄 新着記事一覧", "blocks": None, "article_count": 0})
+                for index, article in enumerate(articles, start=1):
+                    messages.append({
+                        "kind": "article",
+                        "text": self.format_single_article(article, article_id=index),
+                        "blocks": None,
+                        "article_count": 1
+                    })
+
+        if errors:
+            error_message = self.format_thread_errors(errors)
+            if error_message:
+                messages.append({"kind": "errors", "text": error_message, "blocks": None, "article_count": 0})
+
+        return messages
+
+    def post(
+        self,
+        text: str,
+        thread_ts: Optional[str] = None,
+        blocks: Optional[List[Dict]] = None,
+        metadata: Optional[Dict] = None,
+        channel_id: Optional[str] = None
+    ) -> PostResult:
         """
         Slack chat.postMessage APIでメッセージを送信
 
         Args:
-            text: メッセージ本文
+            text: メッセージ本文（blocksを指定した場合は通知・検索用の代替テキスト）
             thread_ts: スレッドのタイムスタンプ（スレッド返信の場合）
+            blocks: Block Kitのブロック（指定した場合はURLプレビューを無効にする）
+            metadata: メッセージメタデータ（{"event_type", "event_payload"}）
+            channel_id: 投稿先チャンネル（省略時はSLACK_CHANNEL_ID）
 
         Returns:
-            投稿したメッセージのタイムスタンプ、失敗した場合None
+            PostResult
         """
-        if not self.bot_token or not self.channel_id:
+        if settings.DRY_RUN:
+            logger.info(f"[DRY RUN] Skipped posting message (thread_ts: {thread_ts}): {text[:80]}")
+            return PostResult(ok=True, ts=f"{time.time():.6f}")
+
+        channel_id = channel_id or self.channel_id
+        if not self.is_configured(channel_id):
             logger.error("SLACK_BOT_TOKEN or SLACK_CHANNEL_ID is not configured")
-            return None
+            return PostResult(ok=False, error="not_configured")
 
         try:
-            url = "https://slack.com/api/chat.postMessage"
-            headers = {
-                "Authorization": f"Bearer {self.bot_token}",
-                "Content-Type": "application/json"
-            }
             payload = {
-                "channel": self.channel_id,
+                "channel": channel_id,
                 "text": text,
                 "username": "Tech Blog Bot",
                 "icon_emoji": ":robot_face:",
@@ -151,59 +338,84 @@ class SlackService:
             if thread_ts:
                 payload["thread_ts"] = thread_ts
 
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
-            result = response.json()
-
-            if result.get("ok"):
-                ts = result.get("ts")
-                logger.info(f"Successfully posted message, ts: {ts}")
-                return ts
+            if blocks:
+                # まとめて投稿する記事ごとにプレビューが付くと一覧性が下がるため無効化
+                payload["blocks"] = blocks
+                payload["unfurl_links"] = False
+                payload["unfurl_media"] = False
+
+            if metadata:
+                payload["metadata"] = metadata
+
+            # レート制限（429）の再送はディスパッチャーが行う
+            result = self.dispatcher.call("chat.postMessage", payload, self.bot_token, self.api_base_url)
+            SLACK_POST_SECONDS.labels("ok" if result.ok else "error").observe(result.latency_seconds)
+            if result.attempts > 1:
+                SLACK_POST_RETRIES.inc(result.attempts - 1)
+            # 集計には応答本文（投稿したメッセージのエコー）を使わないため、保持しない
+            result.data = None
+            self.post_results.append(result)
+
+            if result.ok:
+                logger.info(
+                    f"Successfully posted message, ts: {result.ts} "
+                    f"(latency: {result.latency_seconds:.3f}s, throttled: {result.throttled_seconds:.3f}s, "
+                    f"attempts: {result.attempts})"
+                )
             else:
-                error = result.get("error", "Unknown error")
-                logger.error(f"Failed to post message: {error}")
-                return None
-
-        except requests.exceptions.Timeout:
-            logger.error("Timeout while posting message to Slack")
-            return None
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error posting message to Slack: {str(e)}")
-            return None
+                logger.error(f"Failed to post message: {result.error} (attempts: {result.attempts})")
+            return result
+
         except Exception as e:
             logger.error(f"Unexpected error in post_message: {str(e)}")
-            return None
+            return PostResult(ok=False, error=str(e))
+
+    def post_message(
+        self,
+        text: str,
+        thread_ts: Optional[str] = None,
+        blocks: Optional[List[Dict]] = None,
+        channel_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        メッセージを送信し、タイムスタンプを返す（postを参照）
+
+        Returns:
+            投稿したメッセージのタイムスタンプ、失敗した場合None
+        """
+        result = self.post(text, thread_ts=thread_ts, blocks=blocks, channel_id=channel_id)
+        return result.ts if result.ok else None
 
     def send_notification(
         self,
         articles: List[Dict],
         total_sources: int = 0,
         successful_sources: int = 0,
-        errors: Optional[List[Dict]] = None
+        errors: Optional[List[Dict]] = None,
+        channel_id: Optional[str] = None
     ) -> bool:
         """
-        Slackに通知を送信（メイン投稿 + スレッド返信）
+        Slackに通知を直接送信（メイン投稿 + スレッド返信）
+
+        通常の通知はアウトボックス（OutboxService）経由で送信する。
+        こちらはテスト通知やドライランで使う。
 
         Args:
             articles: 記事情報のリスト
             total_sources: 監視中の総RSS数
             successful_sources: 取得成功したRSS数
             errors: エラー情報のリスト
+            channel_id: 投稿先チャンネル（省略時はSLACK_CHANNEL_ID）
 
         Returns:
             成功した場合True、失敗した場合False
         """
+        self.post_results = []
         try:
-            error_count = len(errors) if errors else 0
+            messages = self.build_messages(articles, total_sources, successful_sources, errors)
 
             # 1. メイン投稿を送信
-            main_message = self.format_main_message(
-                article_count=len(articles),
-                total_sources=total_sources,
-                successful_sources=successful_sources,
-                error_count=error_count
-            )
-
-            thread_ts = self.post_message(main_message)
+            thread_ts = self.post_message(messages[0]["text"], channel_id=channel_id)
 
             if not thread_ts:
                 logger.error("Failed to send main notification")
@@ -211,42 +423,41 @@ class SlackService:
 
             logger.info(f"Successfully sent main notification, thread_ts: {thread_ts}")
 
-            # 2. 記事がある場合、スレッドに記事一覧を投稿
-            if articles:
-                # ヘッダーを投稿
-                header = "📄 新着記事一覧"
-                header_ts = self.post_message(header, thread_ts=thread_ts)
-                if not header_ts:
-                    logger.warning("Failed to post article header to thread")
-
-                # 各記事を個別に投稿（unfurl発火のため）
-                posted_count = 0
-                for index, article in enumerate(articles, start=1):
-                    article_message = self.format_single_article(article, article_id=index)
-                    if article_message:
-                        article_ts = self.post_message(article_message, thread_ts=thread_ts)
-                        if article_ts:
-                            posted_count += 1
-                        else:
-                            logger.warning(f"Failed to post article: {article.get('title', 'Unknown')}")
+            # 2. 記事一覧・エラー情報をスレッドに投稿
+            posted_count = 0
+            for message in messages[1:]:
+                if self.post_message(
+                    message["text"], thread_ts=thread_ts, blocks=message["blocks"], channel_id=channel_id
+                ):
+                    posted_count += message["article_count"]
+                else:
+                    logger.warning(f"Failed to post {message['kind']} message: {message['text'][:80]}")
 
+            if articles:
                 logger.info(f"Successfully posted {posted_count}/{len(articles)} articles to thread")
 
-            # 3. エラーがある場合、スレッドにエラー情報を投稿
-            if errors:
-                error_message = self.format_thread_errors(errors)
-                if error_message:
-                    error_ts = self.post_message(error_message, thread_ts=thread_ts)
-                    if error_ts:
-                        logger.info(f"Successfully posted {len(errors)} errors to thread")
-                    else:
-                        logger.warning("Failed to post errors to thread")
-
             return True
 
         except Exception as e:
             logger.error(f"Unexpected error in send_notification: {str(e)}")
             return False
+        finally:
+            self.log_post_summary()
+
+    def get_post_summary(self) -> Dict:
+        """直近のsend_notificationでの投稿結果の集計（summarize_resultsを参照）"""
+        return summarize_results(self.post_results)
+
+    def log_post_summary(self) -> None:
+        """投稿結果の集計をログに出力"""
+        if not self.post_results:
+            return
+        summary = self.get_post_summary()
+        logger.info(
+            f"Slack posts: {summary['posts']} ({summary['failed']} failed, {summary['retries']} retries), "
+            f"throttled {summary['throttled_seconds']}s, "
+            f"latency avg {summary['avg_latency_seconds']}s / max {summary['max_latency_seconds']}s"
+        )
 
     def send_test_notification(self) -> bool:
         """
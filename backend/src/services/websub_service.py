@@ -0,0 +1,293 @@
+"""WebSub (PubSubHubbub) subscription management and push handling"""
+import hashlib
+import hmac
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from src.config.settings import settings
+from src.models import WebSubSubscription
+from .http_client import FeedHTTPClient, feed_http_client
+from .rss_service import RSSService
+
+logger = logging.getLogger(__name__)
+
+
+class WebSubService:
+    """
+    WebSubの購読管理と配信の受け取り
+
+    1. 巡回時にフィードのハブを検出（RSSService.update_websub_hub）
+    2. スケジューラーが購読を申し込み、期限前に更新する（renew_subscriptions）
+    3. ハブからの確認（GET /websub/callback/{source_id}）にchallengeを返す（verify_intent）
+    4. 配信（POST /websub/callback/{source_id}）を署名検証し、通知待ちとして保存する（receive_content）
+    """
+
+    # 購読確認が来ないまま、この時間が過ぎたら申し込み直す
+    PENDING_TIMEOUT_MINUTES = 60
+
+    # X-Hub-Signatureで使われるハッシュ関数
+    SIGNATURE_ALGORITHMS = {
+        "sha1": hashlib.sha1,
+        "sha256": hashlib.sha256,
+        "sha384": hashlib.sha384,
+        "sha512": hashlib.sha512,
+    }
+
+    def __init__(
+        self,
+        db: Session,
+        http_client: Optional[FeedHTTPClient] = None,
+        rss_service: Optional[RSSService] = None
+    ):
+        self.db = db
+        self.http_client = http_client or feed_http_client
+        self.rss_service = rss_service or RSSService(db, http_client=self.http_client)
+
+    def callback_url(self, source_id: int) -> str:
+        """ハブに登録するコールバックURL"""
+        return f"{settings.WEBSUB_CALLBACK_BASE_URL}/websub/callback/{source_id}"
+
+    def get_subscriptions(self) -> List[WebSubSubscription]:
+        """全ての購読を取得"""
+        return self.db.query(WebSubSubscription).order_by(WebSubSubscription.source_id).all()
+
+    def get_subscription(self, source_id: int) -> Optional[WebSubSubscription]:
+        """情報源の購読を取得"""
+        return self.db.query(WebSubSubscription).filter(
+            WebSubSubscription.source_id == source_id
+        ).first()
+
+    def subscribe(self, subscription: WebSubSubscription) -> bool:
+        """
+        ハブに購読（または更新）を申し込む
+
+        ハブは申し込みへの応答より先に確認リクエストを送ることがあるため、
+        状態をpendingにしてコミットしてから申し込む。
+
+        Args:
+            subscription: 購読
+
+        Returns:
+            ハブが申し込みを受け付けた場合True
+        """
+        if not subscription.secret:
+            subscription.secret = secrets.token_hex(20)
+        return self._send_request(subscription, "subscribe", "pending")
+
+    def unsubscribe(self, subscription: WebSubSubscription) -> bool:
+        """
+        ハブに購読解除を申し込む
+
+        Args:
+            subscription: 購読
+
+        Returns:
+            ハブが申し込みを受け付けた場合True
+        """
+        return self._send_request(subscription, "unsubscribe", "unsubscribing")
+
+    def _send_request(self, subscription: WebSubSubscription, mode: str, next_state: str) -> bool:
+        """購読・解除の申し込みを送信（失敗時は状態を戻してエラーを記録）"""
+        previous_state = subscription.state
+        subscription.state = next_state
+        subscription.requested_at = datetime.utcnow()
+        self.db.commit()
+
+        data = {
+            "hub.callback": self.callback_url(subscription.source_id),
+            "hub.mode": mode,
+            "hub.topic": subscription.topic_url,
+        }
+        if mode == "subscribe":
+            data["hub.lease_seconds"] = str(settings.WEBSUB_LEASE_SECONDS)
+            data["hub.secret"] = subscription.secret
+
+        try:
+            response = self.http_client.session.post(
+                subscription.hub_url, data=data, timeout=self.http_client.timeout
+            )
+            if response.status_code >= 300:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        except Exception as e:
+            logger.error(f"WebSub {mode} request to {subscription.hub_url} failed: {str(e)}")
+            self.db.refresh(subscription)
+            # ハブが既に確認を済ませていれば、その状態を優先する
+            if subscription.state == next_state:
+                subscription.state = previous_state
+            subscription.last_error = str(e)[:500]
+            self.db.commit()
+            return False
+
+        logger.info(f"WebSub {mode} requested for source {subscription.source_id} at {subscription.hub_url}")
+        return True
+
+    def verify_intent(
+        self,
+        source_id: int,
+        mode: str,
+        topic: str,
+        challenge: str,
+        lease_seconds: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        ハブからの購読・解除の確認に応答
+
+        こちらから申し込んだ購読・解除のみ確認する（第三者による購読解除を防ぐ）。
+
+        Args:
+            source_id: コールバックURLの情報源ID
+            mode: hub.mode（subscribe / unsubscribe）
+            topic: hub.topic
+            challenge: hub.challenge
+            lease_seconds: hub.lease_seconds
+
+        Returns:
+            確認する場合はchallenge、拒否する場合None
+        """
+        subscription = self.get_subscription(source_id)
+        if subscription is None or subscription.topic_url != topic:
+            logger.warning(f"WebSub verification for unknown topic: source={source_id} topic={topic}")
+            return None
+
+        now = datetime.utcnow()
+
+        if mode == "subscribe" and subscription.state in ("pending", "subscribed"):
+            lease = lease_seconds or settings.WEBSUB_LEASE_SECONDS
+            subscription.state = "subscribed"
+            subscription.lease_expires_at = now + timedelta(seconds=lease)
+            subscription.last_error = None
+            self.db.commit()
+            logger.info(f"WebSub subscription verified for source {source_id}, lease {lease}s")
+            return challenge
+
+        if mode == "unsubscribe" and subscription.state == "unsubscribing":
+            subscription.state = "unsubscribed"
+            subscription.lease_expires_at = None
+            self.db.commit()
+            logger.info(f"WebSub unsubscription verified for source {source_id}")
+            return challenge
+
+        logger.warning(
+            f"Rejected WebSub {mode} verification for source {source_id} in state {subscription.state}"
+        )
+        return None
+
+    def record_denial(self, source_id: int, topic: str, reason: Optional[str] = None) -> None:
+        """ハブに購読を拒否された（hub.mode=denied）ことを記録"""
+        subscription = self.get_subscription(source_id)
+        if subscription is None or subscription.topic_url != topic:
+            return
+
+        subscription.state = "denied"
+        subscription.lease_expires_at = None
+        subscription.last_error = f"denied: {reason}" if reason else "denied"
+        self.db.commit()
+        logger.warning(f"WebSub subscription denied for source {source_id}: {reason}")
+
+    def verify_signature(self, secret: str, body: bytes, signature_header: Optional[str]) -> bool:
+        """
+        配信内容の署名（X-Hub-Signature: <method>=<hex>）を検証
+
+        Args:
+            secret: 購読時に渡したシークレット
+            body: リクエスト本文
+            signature_header: X-Hub-Signatureヘッダー
+
+        Returns:
+            署名が正しい場合True
+        """
+        if not signature_header or "=" not in signature_header:
+            return False
+
+        method, signature = signature_header.split("=", 1)
+        digestmod = self.SIGNATURE_ALGORITHMS.get(method.strip().lower())
+        if digestmod is None:
+            return False
+
+        expected = hmac.new(secret.encode("utf-8"), body, digestmod).hexdigest()
+        return hmac.compare_digest(expected, signature.strip().lower())
+
+    def receive_content(self, source_id: int, body: bytes, headers: Dict[str, str]) -> Optional[int]:
+        """
+        ハブから配信されたフィードを通知待ちとして保存
+
+        署名が一致しない配信は、仕様どおり2xxを返しつつ内容を破棄する。
+
+        Args:
+            source_id: コールバックURLの情報源ID
+            body: リクエスト本文
+            headers: リクエストヘッダー（小文字キー）
+
+        Returns:
+            新たに保存した件数、購読していない場合None
+        """
+        subscription = self.get_subscription(source_id)
+        if subscription is None or subscription.state not in ("subscribed", "pending"):
+            logger.warning(f"WebSub content for unsubscribed source {source_id}, ignoring")
+            return None
+
+        if subscription.secret and not self.verify_signature(
+            subscription.secret, body, headers.get("x-hub-signature")
+        ):
+            logger.warning(f"WebSub content with invalid signature for source {source_id}, ignoring")
+            return 0
+
+        source = subscription.source
+        if source is None or not source.is_active:
+            return 0
+
+        subscription.last_pushed_at = datetime.utcnow()
+        # 本文以外のヘッダー（Content-Lengthなど）はパースに不要
+        content_headers = {k: v for k, v in headers.items() if k in ("content-type", "content-location")}
+        return self.rss_service.stage_pushed_content(source, body, content_headers)
+
+    def renew_subscriptions(self, now: Optional[datetime] = None) -> int:
+        """
+        購読の申し込み・更新・解除を行う（スケジューラーから定期的に呼び出される）
+
+        - ハブを検出した有効な情報源: 購読を申し込む
+        - 購読期限の残りがWEBSUB_RENEW_BEFORE_MINUTESを切った購読: 更新する
+        - 確認が来ないまま PENDING_TIMEOUT_MINUTES を過ぎた申し込み: 申し込み直す
+        - 無効化された情報源の購読: 解除する
+        ハブに拒否された（denied）購読は、ハブが変わるまで申し込まない。
+
+        Returns:
+            送信した申し込みの件数
+        """
+        if not settings.WEBSUB_CALLBACK_BASE_URL:
+            logger.warning("WEBSUB_CALLBACK_BASE_URL is not set, skipping WebSub subscriptions")
+            return 0
+
+        now = now or datetime.utcnow()
+        renew_before = now + timedelta(minutes=settings.WEBSUB_RENEW_BEFORE_MINUTES)
+        pending_timeout = now - timedelta(minutes=self.PENDING_TIMEOUT_MINUTES)
+
+        sent = 0
+        for subscription in self.get_subscriptions():
+            source = subscription.source
+            is_stale = subscription.requested_at is None or subscription.requested_at < pending_timeout
+
+            if source is None or not source.is_active:
+                if subscription.state == "subscribed" or (subscription.state == "unsubscribing" and is_stale):
+                    sent += self.unsubscribe(subscription)
+                continue
+
+            if subscription.state in ("discovered", "unsubscribed", "unsubscribing"):
+                needs_subscribe = subscription.state != "unsubscribing" or is_stale
+            elif subscription.state == "subscribed":
+                needs_subscribe = (
+                    subscription.lease_expires_at is None or subscription.lease_expires_at < renew_before
+                )
+            elif subscription.state == "pending":
+                needs_subscribe = is_stale
+            else:
+                needs_subscribe = False
+
+            if needs_subscribe:
+                sent += self.subscribe(subscription)
+
+        if sent:
+            logger.info(f"Sent {sent} WebSub subscription requests")
+        return sent
@@ -0,0 +1,75 @@
+"""Prometheus metrics"""
+import os
+from prometheus_client import CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess
+
+# 情報源（source_id）ごとの系列になるため、バケットは少なめにする（上限はFETCH_TIMEOUT_SECONDSの既定値）
+FETCH_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+# 1回の通知処理は数秒〜数十分
+RUN_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# RSSService
+FEED_FETCH_SECONDS = Histogram(
+    "techblog_bot_feed_fetch_seconds", "フィードの取得時間（パースを除く）",
+    ["source_id"], buckets=FETCH_BUCKETS
+)
+FEED_FETCH_BYTES = Counter(
+    "techblog_bot_feed_fetch_bytes", "取得したフィードのバイト数", ["source_id"]
+)
+FEED_FETCH_TOTAL = Counter(
+    "techblog_bot_feed_fetch", "フィードの取得回数（statusはHTTPステータス、例外の場合error）",
+    ["source_id", "status"]
+)
+FEED_PARSE_SECONDS = Histogram(
+    "techblog_bot_feed_parse_seconds", "フィードのパース時間", ["parser"]
+)
+DEDUP_QUERY_SECONDS = Histogram(
+    "techblog_bot_dedup_query_seconds", "通知済みチェックのクエリ時間（scopeはglobal / channel）", ["scope"]
+)
+KEYWORD_FILTER_DROPPED = Counter(
+    "techblog_bot_keyword_filter_dropped", "キーワードで除外した記事数（reasonはexcluded / no_include）",
+    ["reason"]
+)
+
+# SlackService
+SLACK_POST_SECONDS = Histogram(
+    "techblog_bot_slack_post_seconds", "chat.postMessageの応答時間（最後の試行）", ["result"]
+)
+SLACK_POST_RETRIES = Counter(
+    "techblog_bot_slack_post_retries", "chat.postMessageのレート制限による再送回数"
+)
+
+# OutboxService
+SLACK_OUTBOX_UNDELIVERED = Counter(
+    "techblog_bot_slack_outbox_undelivered",
+    "届けられていないメッセージ数（reasonはpermanent_error: 送信を諦めた / "
+    "max_attempts: SLACK_OUTBOX_MAX_ATTEMPTS回失敗し、再送を続けている）",
+    ["reason"]
+)
+
+# NotificationService
+NOTIFICATION_RUN_SECONDS = Histogram(
+    "techblog_bot_notification_run_seconds", "通知処理全体の時間（resultはsuccess / failure）",
+    ["result"], buckets=RUN_BUCKETS
+)
+NOTIFICATION_STAGE_SECONDS = Histogram(
+    "techblog_bot_notification_stage_seconds", "通知処理の段階ごとの時間", ["stage"], buckets=RUN_BUCKETS
+)
+
+# DB
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "techblog_bot_db_pool_checkout_seconds", "コネクションプールから接続を取り出すまでの待ち時間"
+)
+
+
+def render_metrics() -> bytes:
+    """
+    /metrics のレスポンス本文を生成
+
+    uvicornを複数ワーカーで起動する場合は、PROMETHEUS_MULTIPROC_DIRを設定すると
+    全ワーカーの値を集計して返す。
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
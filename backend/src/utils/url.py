@@ -0,0 +1,67 @@
+"""URL utilities"""
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 記事の同一性に影響しないトラッキング用クエリパラメータ
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "yclid", "mc_cid", "mc_eid", "igshid", "ref_src", "_hsenc", "_hsmi",
+}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    重複判定用にURLを正規化
+
+    - スキーム・ホストを小文字化し、デフォルトポートとユーザー情報（user:pass@）を除去
+    - フラグメント（#以降）を除去
+    - トラッキング用パラメータ（utm_* など）を除去し、残りをキー順に整列
+
+    Args:
+        url: 記事URL
+
+    Returns:
+        正規化したURL
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        # 不正なポート（例: "example.com:abc"）はportの参照時にValueErrorになる
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if ":" in netloc:
+        # IPv6アドレスはhostnameで角括弧が外れるので付け直す
+        netloc = f"[{netloc}]"
+    if port and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+def url_hash(url: str) -> int:
+    """
+    正規化したURLの64bitハッシュを取得
+
+    BIGINT（符号付き64bit）カラムに格納するため符号付き整数で返す。
+
+    Args:
+        url: 記事URL
+
+    Returns:
+        符号付き64bit整数
+    """
+    digest = hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
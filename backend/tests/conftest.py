@@ -0,0 +1,63 @@
+"""テスト共通のフィクスチャ"""
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+# 設定はsrcのインポート時に読み込まれるため、インポートより先にテスト用のSQLiteを指定する
+_DB_DIR = tempfile.mkdtemp(prefix="techblog-bot-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+from src.config.database import SessionLocal, init_db  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """テスト用のDBにテーブルを作成"""
+    init_db()
+
+
+@pytest.fixture
+def db():
+    """テストごとのDBセッション"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def app_server():
+    """
+    FastAPIアプリを別スレッドのuvicornで起動し、ベースURLを返す
+
+    ハブなど外部からのリクエストを受ける必要があるため、実際のHTTPサーバーとして起動する。
+    スケジューラーは起動しない（lifespan="off"、DBはdatabaseフィクスチャで初期化済み）。
+    """
+    import uvicorn
+    from src.main import app
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+
+    yield f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join(timeout=10)
+    sock.close()
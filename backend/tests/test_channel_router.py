@@ -0,0 +1,31 @@
+"""ChannelRouterのテスト"""
+import uuid
+from datetime import datetime, timedelta
+
+from src.models import ChannelNotifiedArticle, ChannelRoute, NotifiedArticle
+from src.services.channel_router import ChannelRouter
+from src.utils.url import url_hash
+
+
+def test_new_route_skips_articles_notified_before_it_was_created(db):
+    prefix = f"https://routed.example.com/{uuid.uuid4().hex}"
+    now = datetime.utcnow()
+    articles = [
+        {"article_url": f"{prefix}/{name}", "title": name, "source_id": None}
+        for name in ("before", "after", "new", "sent")
+    ]
+
+    # ルート作成前に既定のチャンネルへ通知した記事と、作成後に他のチャンネルへ通知した記事
+    db.add(NotifiedArticle(article_url=f"{prefix}/before", title="before", notified_at=now - timedelta(hours=1)))
+    db.add(NotifiedArticle(article_url=f"{prefix}/after", title="after", notified_at=now + timedelta(minutes=1)))
+    route = ChannelRoute(name="new team", channel_id=f"C{uuid.uuid4().hex[:10]}", created_at=now)
+    db.add(route)
+    db.flush()
+    db.add(ChannelNotifiedArticle(
+        channel_id=route.channel_id, url_hash=url_hash(f"{prefix}/sent"), article_url=f"{prefix}/sent"
+    ))
+    db.flush()
+
+    routed = ChannelRouter(db).route_articles([route], articles, {})
+
+    assert [article["title"] for article in routed[0].articles] == ["after", "new"]
@@ -0,0 +1,77 @@
+"""RSSServiceのサーキットブレーカー（取得失敗時の停止時間）のテスト"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.config.settings import settings
+from src.models import RSSSource
+from src.services.rss_service import RSSService
+
+
+@pytest.fixture
+def breaker_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_BASE_MINUTES", 60)
+    monkeypatch.setattr(settings, "CIRCUIT_BREAKER_MAX_MINUTES", 7 * 24 * 60)
+
+
+def _fail(service: RSSService, source: RSSSource, times: int) -> None:
+    for _ in range(times):
+        service.record_fetch_failure(source)
+
+
+def _skipped_daily_runs(source: RSSSource, failed_at: datetime) -> int:
+    """失敗した時刻から1日ごとの取得のうち、停止中で飛ばす回数"""
+    runs = 0
+    while failed_at + timedelta(days=runs + 1) < source.retry_after:
+        runs += 1
+    return runs
+
+
+def test_circuit_stays_closed_below_threshold(db, breaker_settings):
+    source = RSSSource(name="s", url="https://example.com/feed")
+    _fail(RSSService(db), source, 2)
+
+    assert source.consecutive_failures == 2
+    assert source.retry_after is None
+
+
+def test_daily_polling_skips_whole_runs(db, breaker_settings, monkeypatch):
+    monkeypatch.setattr(settings, "POLLING_MODE", "daily")
+    service = RSSService(db)
+    source = RSSSource(name="s", url="https://example.com/feed")
+
+    skipped = []
+    for _ in range(6):
+        failed_at = datetime.utcnow()
+        _fail(service, source, 1 if skipped else 3)
+        skipped.append(_skipped_daily_runs(source, failed_at))
+
+    # 1時間の停止では翌日の取得を飛ばさないため、1日単位で倍々にする（上限7日）
+    assert skipped == [1, 2, 4, 7, 7, 7]
+
+
+def test_adaptive_polling_scales_to_source_interval(db, breaker_settings, monkeypatch):
+    monkeypatch.setattr(settings, "POLLING_MODE", "adaptive")
+    service = RSSService(db)
+
+    frequent = RSSSource(name="frequent", url="https://example.com/a", poll_interval_minutes=30)
+    hourly = RSSSource(name="hourly", url="https://example.com/b", poll_interval_minutes=180)
+    before = datetime.utcnow()
+    _fail(service, frequent, 3)
+    _fail(service, hourly, 3)
+
+    # 巡回間隔がBASEより短ければBASE、長ければ巡回間隔を基準にする（間隔の半分の余裕を含む）
+    assert abs(frequent.retry_after - before - timedelta(minutes=60 + 15)) < timedelta(seconds=5)
+    assert abs(hourly.retry_after - before - timedelta(minutes=180 + 90)) < timedelta(seconds=5)
+
+
+def test_success_resets_circuit(db, breaker_settings):
+    service = RSSService(db)
+    source = RSSSource(name="s", url="https://example.com/feed")
+    _fail(service, source, 4)
+
+    service.record_fetch_success(source)
+
+    assert source.consecutive_failures == 0
+    assert source.retry_after is None
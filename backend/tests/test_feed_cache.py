@@ -0,0 +1,59 @@
+"""FeedCacheのテスト"""
+import logging
+import os
+
+import pytest
+
+from src.services.feed_cache import FeedCache
+from src.services.http_client import FeedResponse
+
+URL = "https://tech.example.com/feed"
+
+
+def _response(content: bytes, status_code: int = 200, etag: str = '"v1"') -> FeedResponse:
+    return FeedResponse(url=URL, status_code=status_code, headers={"etag": etag}, content=content)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FeedCache(str(tmp_path), max_bytes=10_000, max_age_seconds=3600)
+
+
+def test_eviction_runs_only_when_over_the_limit(cache, monkeypatch):
+    calls = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: calls.append(1) or evict())
+
+    # 起動後の最初の1回は実際のサイズを数えるために走査する
+    assert cache.maybe_evict()
+    cache.store(_response(b"small feed"))
+    assert not cache.maybe_evict()
+
+    # 上限を超える本文を保存したら削除する
+    cache.store(FeedResponse(url="https://other.example.com/feed", status_code=200, headers={},
+                             content=os.urandom(20_000)))
+    assert cache.maybe_evict()
+    assert cache.load("https://other.example.com/feed") is None
+    assert len(calls) == 2
+
+    # 一定時間ごとには期限切れの削除のために走査する
+    monkeypatch.setattr(FeedCache, "EVICT_INTERVAL_SECONDS", 0)
+    assert cache.maybe_evict()
+
+
+def test_not_modified_is_recorded(cache, caplog):
+    cache.store(_response(b"v1 body"))
+
+    with caplog.at_level(logging.WARNING):
+        cache.record_not_modified(URL, _response(b"", status_code=304))
+        assert cache.load(URL).content == b"v1 body"
+        assert not caplog.records
+
+        # サーバー側の最新版（v2）を保存していない
+        cache.record_not_modified(URL, _response(b"", status_code=304, etag='"v2"'))
+        assert cache.load(URL).content == b"v1 body"
+        assert "older than the last fetched version" in caplog.records[-1].getMessage()
+
+        # 本文を保存していないフィード
+        cache.record_not_modified("https://unknown.example.com/feed", _response(b"", status_code=304))
+        assert "not cached" in caplog.records[-1].getMessage()
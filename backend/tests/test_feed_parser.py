@@ -0,0 +1,147 @@
+"""高速パーサー（parse_fast）とfeedparser（parse_compact）の結果の一致のテスト"""
+from datetime import datetime
+
+import pytest
+
+from src.services.feed_parser import parse_compact, parse_fast
+
+RSS2 = """<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+<channel>
+  <title>Example Tech Blog</title>
+  <link>https://tech.example.com/</link>
+  <atom:link rel="hub" href="https://pubsubhubbub.appspot.com/"/>
+  <atom:link rel="self" href="https://tech.example.com/rss"/>
+  <item>
+    <title>Kubernetes &amp; Go の運用</title>
+    <link>https://tech.example.com/entry/1</link>
+    <guid isPermaLink="false">entry-1</guid>
+    <pubDate>Tue, 01 Oct 2024 09:00:00 +0900</pubDate>
+  </item>
+  <item>
+    <title><![CDATA[CDATAのタイトル]]></title>
+    <guid>https://tech.example.com/entry/2</guid>
+    <pubDate>Mon, 30 Sep 2024 12:00:00 GMT</pubDate>
+  </item>
+  <item>
+    <title>日付なし</title>
+    <link>https://tech.example.com/entry/3</link>
+  </item>
+</channel>
+</rss>""".encode("utf-8")
+
+RSS1 = """<?xml version="1.0" encoding="utf-8"?>
+<rdf:RDF xmlns="http://purl.org/rss/1.0/" xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+         xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <channel rdf:about="https://tech.example.com/">
+    <title>Example</title>
+    <link>https://tech.example.com/</link>
+  </channel>
+  <item rdf:about="https://tech.example.com/entry/1">
+    <title>RSS 1.0の記事</title>
+    <link>https://tech.example.com/entry/1</link>
+  </item>
+</rdf:RDF>""".encode("utf-8")
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Example</title>
+  <link rel="hub" href="https://hub.example.com/"/>
+  <link rel="self" href="https://tech.example.com/feed"/>
+  <id>https://tech.example.com/feed</id>
+  <updated>2024-10-01T00:00:00Z</updated>
+  <entry>
+    <title>Atomの記事</title>
+    <link rel="alternate" href="https://tech.example.com/entry/1"/>
+    <link rel="edit" href="https://tech.example.com/edit/1"/>
+    <id>tag:tech.example.com,2024:1</id>
+    <published>2024-10-01T09:00:00+09:00</published>
+    <updated>2024-10-02T09:00:00+09:00</updated>
+  </entry>
+  <entry>
+    <title>updatedのみ</title>
+    <link href="https://tech.example.com/entry/2"/>
+    <id>tag:tech.example.com,2024:2</id>
+    <updated>2024-09-30T00:00:00Z</updated>
+  </entry>
+</feed>""".encode("utf-8")
+
+
+@pytest.mark.parametrize("content", [RSS2, RSS1, ATOM], ids=["rss2", "rss1", "atom"])
+def test_fast_parser_matches_feedparser(content):
+    fast = parse_fast(content)
+    expected = parse_compact(content, {
+        "content-type": "application/xml; charset=utf-8",
+        "content-location": "https://tech.example.com/"
+    })
+
+    assert fast is not None
+    assert fast["entries"] == expected["entries"]
+    assert fast["hub"] == expected["hub"]
+    assert fast["self"] == expected["self"]
+    assert not expected["bozo"]
+
+
+@pytest.mark.parametrize("content", [
+    # 壊れたXML
+    RSS2.replace(b"</channel>", b""),
+    # 相対URL
+    RSS2.replace(b"https://tech.example.com/entry/1", b"/entry/1"),
+    # HTML形式のAtomタイトル
+    ATOM.replace("<title>Atom".encode("utf-8"), '<title type="html">Atom'.encode("utf-8")),
+    # xml:base
+    ATOM.replace(b"<feed ", b'<feed xml:base="https://tech.example.com/" '),
+    # Shift_JIS
+    RSS2.replace(b"utf-8", b"Shift_JIS").decode("utf-8").encode("shift_jis"),
+    # RSS / Atom以外
+    b"<html><body>not a feed</body></html>",
+], ids=["malformed", "relative-link", "html-title", "xml-base", "shift-jis", "html"])
+def test_fast_parser_falls_back_to_feedparser(content):
+    assert parse_fast(content) is None
+
+
+def test_fast_parser_stops_after_old_entries(monkeypatch):
+    from src.config.settings import settings
+    monkeypatch.setattr(settings, "FAST_PARSE_STOP_AFTER_OLD", 2)
+
+    items = "".join(
+        f"<item><title>{day}</title><link>https://tech.example.com/{day}</link>"
+        f"<pubDate>{day:02d} Sep 2024 00:00:00 GMT</pubDate></item>"
+        for day in range(30, 0, -1)
+    )
+    content = f'<rss version="2.0"><channel><title>t</title>{items}</channel></rss>'.encode("utf-8")
+
+    fast = parse_fast(content, cutoff=datetime(2024, 9, 25))
+
+    # 25日以降の6件と、期間外の2件で打ち切り
+    assert [entry[1] for entry in fast["entries"]] == [str(day) for day in range(30, 22, -1)]
+    assert len(parse_compact(content, {})["entries"]) == 30
+
+
+@pytest.mark.parametrize("date, fast_path", [
+    ("Tue, 01 Oct 2024 09:00:00 +0900", True),
+    ("01 Oct 2024 00:00:00 -0000", True),
+    ("Tue, 01 Oct 2024 09:00:00 PST", True),
+    ("Tue, 1 Oct 2024 09:00 +0000", True),
+    ("Tue, 01 Oct 24 09:00:00 GMT", True),
+    ("2024-10-01T09:00:00.123+09:00", True),
+    ("2024-10-01T00:00:00Z", True),
+    ("2024-10-01", True),
+    # 以下は高速パーサーでは解釈せず、feedparserに任せる
+    ("Tuesday, 01-Oct-2024 09:00:00 GMT", False),
+    ("20241001T090000Z", False),
+    ("2024-13-01", False),
+    ("garbage", False),
+])
+def test_published_date_matches_feedparser(date, fast_path):
+    content = (
+        '<rss version="2.0"><channel><title>t</title><item><title>a</title>'
+        f"<link>https://tech.example.com/a</link><pubDate>{date}</pubDate></item></channel></rss>"
+    ).encode("utf-8")
+
+    fast = parse_fast(content)
+
+    if fast_path:
+        assert fast["entries"] == parse_compact(content, {"content-type": "application/xml"})["entries"]
+    else:
+        assert fast is None
@@ -0,0 +1,105 @@
+"""FetchQueueService（作業キューによる取得の分散）のテスト"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.config.settings import settings
+from src.devtools.stub_feed_server import StubFeedServer
+from src.models import FetchTask, NotifiedArticle, RSSSource, StagedArticle
+from src.services.fetch_queue_service import FetchQueueService
+
+
+class NamedWorker(FetchQueueService):
+    """同じプロセス内で別のワーカーとして振る舞う"""
+
+    def __init__(self, db, name: str):
+        super().__init__(db)
+        self.name = name
+
+    @property
+    def worker_name(self) -> str:
+        return self.name
+
+
+@pytest.fixture
+def sources(db, monkeypatch):
+    """スタブフィードの情報源3件（キューと通知待ちは空にする）"""
+    monkeypatch.setattr(settings, "POLLING_MODE", "daily")
+    monkeypatch.setattr(settings, "DRY_RUN", False)
+
+    with StubFeedServer(feed_count=3, entries_per_feed=2) as server:
+        sources = [RSSSource(name=f"Queue {i}", url=server.feed_url(i), is_active=True) for i in range(3)]
+        db.add_all(sources)
+        db.query(FetchTask).delete(synchronize_session=False)
+        for model in (NotifiedArticle, StagedArticle):
+            db.query(model).filter(model.article_url.like("https://stub.example.com/%")).delete(
+                synchronize_session=False
+            )
+        db.commit()
+        yield sources
+
+    # 停止したスタブサーバーの情報源が他のテストで取得されないようにする
+    db.rollback()
+    for source in sources:
+        source.is_active = False
+    db.query(FetchTask).delete(synchronize_session=False)
+    db.query(StagedArticle).filter(StagedArticle.article_url.like("https://stub.example.com/%")).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+
+def _statuses(db, round_id: str) -> list:
+    db.expire_all()
+    return [
+        (task.status, task.worker, task.attempts)
+        for task in db.query(FetchTask).filter(FetchTask.round_id == round_id).order_by(FetchTask.id)
+    ]
+
+
+def test_claim_does_not_hand_out_a_task_twice(db, sources):
+    round_id = FetchQueueService(db).enqueue(sources)
+    a, b = NamedWorker(db, "a"), NamedWorker(db, "b")
+
+    assert [task.source_id for task in a.claim(db, limit=2)] == [s.id for s in sources[:2]]
+    assert [task.source_id for task in b.claim(db, limit=2)] == [sources[2].id]
+    assert a.claim(db) == []
+
+    assert _statuses(db, round_id) == [("claimed", "a", 1), ("claimed", "a", 1), ("claimed", "b", 1)]
+
+
+def test_stale_task_is_requeued_and_ignored_when_the_old_worker_finishes(db, sources, monkeypatch):
+    monkeypatch.setattr(FetchQueueService, "MAX_ATTEMPTS", 2)
+    round_id = FetchQueueService(db).enqueue(sources[:1])
+    a, b, c = NamedWorker(db, "a"), NamedWorker(db, "b"), NamedWorker(db, "c")
+
+    claimed = a.claim(db)
+    stale_at = datetime.utcnow() - timedelta(seconds=settings.FETCH_QUEUE_CLAIM_TIMEOUT_SECONDS + 1)
+    db.query(FetchTask).update({FetchTask.claimed_at: stale_at}, synchronize_session=False)
+    db.commit()
+
+    # 応答しなくなったワーカー（a）のタスクを取得待ちに戻して、bが取り出す
+    assert [task.id for task in b.claim(db)] == [task.id for task in claimed]
+    assert _statuses(db, round_id) == [("claimed", "b", 2)]
+
+    # 遅れて終わったaの結果では更新しない
+    a._finish(db, [(claimed[0].id, sources[0].id)], set(), {}, {sources[0].id: "late"}, datetime.utcnow())
+    assert _statuses(db, round_id) == [("claimed", "b", 2)]
+
+    # 試行回数の上限に達したタスクは失敗にする
+    db.query(FetchTask).update({FetchTask.claimed_at: stale_at}, synchronize_session=False)
+    db.commit()
+    assert c.claim(db) == []
+    assert _statuses(db, round_id)[0][0] == "failed"
+
+
+def test_coordinator_fetches_the_whole_round_alone(db, sources):
+    summary = FetchQueueService(db).run_round(sources, timeout=30)
+
+    assert summary["tasks"] == 3
+    assert summary["done"] == 3
+    assert summary["failed"] == 0
+    assert summary["workers"] == 1
+    assert db.query(StagedArticle).filter(
+        StagedArticle.source_id.in_([source.id for source in sources])
+    ).count() == 6
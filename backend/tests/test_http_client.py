@@ -0,0 +1,90 @@
+"""FeedHTTPClientのテスト（遅いサーバーでも取得全体が期限内に終わること）"""
+import gzip
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from src.services.http_client import FeedHTTPClient, FeedTooLargeError
+
+BODY = b"<rss version=\"2.0\"><channel><title>t</title></channel></rss>"
+
+
+class SlowServer:
+    """ヘッダー前に止まる・本文を1バイトずつ送るなど、遅い応答を返すHTTPサーバー"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.url = f"http://127.0.0.1:{self.sock.getsockname()[1]}/feed"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn:
+            try:
+                conn.recv(65536)
+                if self.mode == "stall_before_headers":
+                    time.sleep(5)
+                elif self.mode == "trickle":
+                    conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(BODY))
+                    for byte in BODY:
+                        time.sleep(0.1)
+                        conn.sendall(bytes([byte]))
+                elif self.mode == "gzip":
+                    body = gzip.compress(BODY)
+                    conn.sendall(
+                        b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\n"
+                        b"Transfer-Encoding: chunked\r\n\r\n"
+                        b"%x\r\n%s\r\n0\r\n\r\n" % (len(body), body)
+                    )
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+@pytest.fixture
+def slow_server(request):
+    server = SlowServer(request.param)
+    yield server
+    server.close()
+
+
+@pytest.mark.parametrize("slow_server", ["stall_before_headers", "trickle"], indirect=True)
+def test_slow_server_is_cut_off_at_the_deadline(slow_server):
+    client = FeedHTTPClient(timeout=1.0)
+
+    started = time.monotonic()
+    # ヘッダー前はrequestsのReadTimeout、本文の途中はFeedDeadlineExceededError
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get(slow_server.url)
+
+    assert time.monotonic() - started < 1.5
+    client.close()
+
+
+@pytest.mark.parametrize("slow_server", ["gzip"], indirect=True)
+def test_compressed_body_is_decoded(slow_server):
+    client = FeedHTTPClient(timeout=1.0)
+
+    response = client.get(slow_server.url)
+
+    assert response.status_code == 200
+    assert response.content == BODY
+
+    with pytest.raises(FeedTooLargeError):
+        FeedHTTPClient(timeout=1.0, max_bytes=len(BODY) - 1).get(slow_server.url)
+    client.close()
@@ -0,0 +1,59 @@
+"""KeywordMatcherのテスト"""
+from src.services.keyword_matcher import KeywordMatcher, normalize_text
+
+
+def test_normalize_text():
+    assert normalize_text("ＡＷＳ &amp; Ｐｙｔｈｏｎ") == "aws & python"
+    assert normalize_text("Rust&#038;Go") == "rust&go"
+
+
+def test_excluded_keyword_is_reported_as_configured():
+    matcher = KeywordMatcher(exclude_keywords=["Advent Calendar", "募集"])
+
+    result = matcher.match("ADVENT CALENDAR 2024 はじめます")
+    assert not result.allowed
+    assert result.excluded_keyword == "Advent Calendar"
+    assert matcher.find_excluded_keyword("エンジニア募集中") == "募集"
+    assert matcher.find_excluded_keyword("Kubernetesの運用") is None
+
+
+def test_everything_is_allowed_without_include_keywords():
+    matcher = KeywordMatcher(exclude_keywords=["採用"])
+
+    assert not matcher.has_include_keywords
+    assert matcher.is_allowed("Kubernetesの運用")
+    assert not matcher.is_allowed("採用情報")
+
+
+def test_include_keywords():
+    matcher = KeywordMatcher(exclude_keywords=["お知らせ"], include_keywords=["Python", "Go"])
+
+    assert matcher.has_include_keywords
+    result = matcher.match("ｐｙｔｈｏｎ 3.12の新機能")
+    assert result.allowed
+    assert result.included_keyword == "Python"
+    assert not matcher.is_allowed("Rustの所有権")
+    # 除外キーワードが優先
+    assert not matcher.is_allowed("Python勉強会のお知らせ")
+
+
+def test_longer_keyword_wins():
+    matcher = KeywordMatcher(include_keywords=["Go", "Google Cloud"])
+
+    assert matcher.match("Google Cloudで構築する").included_keyword == "Google Cloud"
+
+
+def test_blank_and_duplicate_keywords_are_ignored():
+    matcher = KeywordMatcher(exclude_keywords=["", "  ", "募集", "募集"], include_keywords=[" "])
+
+    assert not matcher.has_include_keywords
+    assert matcher.is_allowed("記事")
+    assert matcher.find_excluded_keyword("募集") == "募集"
+
+
+def test_regex_characters_are_matched_literally():
+    matcher = KeywordMatcher(include_keywords=["C++", "a.b"])
+
+    assert matcher.is_allowed("Modern C++")
+    assert not matcher.is_allowed("C")
+    assert not matcher.is_allowed("axb")
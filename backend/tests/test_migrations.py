@@ -0,0 +1,32 @@
+"""マイグレーションのテスト"""
+from sqlalchemy import create_engine, inspect, text
+
+from src.config.migrations import run_migrations
+from src.utils.url import url_hash
+
+
+def test_url_hash_migration_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE notified_articles ("
+            " id INTEGER PRIMARY KEY, article_url TEXT NOT NULL UNIQUE, title TEXT)"
+        ))
+        conn.execute(text("INSERT INTO notified_articles (article_url, title) VALUES (:url, :title)"), [
+            {"url": "https://example.com/a", "title": "a"},
+            {"url": "https://example.com/a?utm_source=rss", "title": "a (dup)"},
+            {"url": "https://example.com/b", "title": "b"},
+        ])
+
+    run_migrations(engine)
+    # 移行済みのスキーマでは何もしない
+    run_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT title, url_hash FROM notified_articles ORDER BY id")).fetchall()
+    assert [(row.title, row.url_hash) for row in rows] == [
+        ("a", url_hash("https://example.com/a")),
+        ("b", url_hash("https://example.com/b")),
+    ]
+    indexes = {ix["name"]: ix for ix in inspect(engine).get_indexes("notified_articles")}
+    assert indexes["ix_notified_articles_url_hash"]["unique"]
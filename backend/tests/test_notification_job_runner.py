@@ -0,0 +1,62 @@
+"""NotificationJobRunnerのジョブの登録・合流のテスト"""
+import uuid
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from src.config.settings import settings
+from src.models import NotificationJob
+from src.services.notification_job_runner import NotificationJobRunner
+
+
+@pytest.fixture
+def runner(db, monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_COOLDOWN_SECONDS", 0)
+    db.query(NotificationJob).delete()
+    db.commit()
+    yield NotificationJobRunner()
+    db.query(NotificationJob).delete()
+    db.commit()
+
+
+def test_second_request_coalesces_into_active_job(runner):
+    job, created = runner._acquire("manual")
+    coalesced, coalesced_created = runner._acquire("scheduled")
+
+    assert created
+    assert not coalesced_created
+    assert coalesced["job_id"] == job["job_id"]
+
+
+def test_concurrent_registration_retries_and_coalesces(db, runner):
+    # 実行中のジョブが無いと確認した直後に、別の呼び出しが登録した状況を再現する
+    other_id = str(uuid.uuid4())
+    Session = type(db)
+
+    class RacingSession(Session):
+        def add(self, instance, *args, **kwargs):
+            if isinstance(instance, NotificationJob) and not db.get(NotificationJob, other_id):
+                db.add(NotificationJob(
+                    id=other_id, trigger="scheduled", status="queued", active_key=runner.ACTIVE_KEY
+                ))
+                db.commit()
+            super().add(instance, *args, **kwargs)
+
+    runner.session_factory = lambda: RacingSession(bind=db.get_bind())
+    job, created = runner._acquire("manual")
+
+    assert not created
+    assert job["job_id"] == other_id
+    db.expire_all()
+    assert db.query(NotificationJob).count() == 1
+
+
+def test_other_integrity_errors_are_raised(db, runner, monkeypatch):
+    existing = NotificationJob(id=str(uuid.uuid4()), trigger="manual", status="succeeded")
+    db.add(existing)
+    db.commit()
+    # 主キーの重複はactive_keyの競合ではないため、やり直さずに送出する
+    monkeypatch.setattr(uuid, "uuid4", lambda: existing.id)
+
+    with pytest.raises(IntegrityError):
+        runner._acquire("manual")
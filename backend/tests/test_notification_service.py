@@ -0,0 +1,64 @@
+"""NotificationServiceの通知処理（取得から送信まで）のテスト"""
+import pytest
+
+from src.config.settings import settings
+from src.devtools.fake_slack import FakeSlackServer
+from src.devtools.stub_feed_server import StubFeedServer
+from src.models import NotifiedArticle, RSSSource, SlackOutboxMessage
+from src.services import NotificationService
+from src.services.rss_service import RSSService
+
+CHANNEL = "C0NOTIFY"
+
+
+@pytest.fixture
+def feed(db, monkeypatch):
+    """記事3件のフィードを唯一の情報源にする"""
+    monkeypatch.setattr(settings, "POLLING_MODE", "daily")
+    monkeypatch.setattr(settings, "FETCH_MODE", "local")
+    monkeypatch.setattr(settings, "DRY_RUN", False)
+    monkeypatch.setattr(settings, "SLACK_CHANNEL_ID", CHANNEL)
+
+    with StubFeedServer(feed_count=1, entries_per_feed=3) as server:
+        source = RSSSource(name="Stub", url=server.feed_url(0), is_active=True)
+        db.add(source)
+        db.commit()
+        monkeypatch.setattr(RSSService, "get_active_sources", lambda self: [source])
+        db.query(NotifiedArticle).filter(NotifiedArticle.article_url.like("https://stub.example.com/%")).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        yield source
+
+
+def _notified_urls(db) -> set:
+    db.expire_all()
+    return {
+        url for (url,) in db.query(NotifiedArticle.article_url).filter(
+            NotifiedArticle.article_url.like("https://stub.example.com/%")
+        )
+    }
+
+
+def test_unconfigured_slack_loses_no_articles(db, feed, monkeypatch):
+    monkeypatch.setattr(settings, "SLACK_BOT_TOKEN", None)
+    outbox_before = db.query(SlackOutboxMessage).count()
+
+    assert NotificationService(db).run() is False
+
+    # 通知済みにも、アウトボックスにも、取得状態にも何も保存しない
+    assert _notified_urls(db) == set()
+    assert db.query(SlackOutboxMessage).count() == outbox_before
+    assert db.get(RSSSource, feed.id).last_fetched_at is None
+
+    # 設定を直した次の実行で同じ記事を通知する
+    with FakeSlackServer() as slack:
+        monkeypatch.setattr(settings, "SLACK_BOT_TOKEN", "xoxb-test")
+        monkeypatch.setattr(settings, "SLACK_API_BASE_URL", slack.base_url)
+
+        assert NotificationService(db).run() is True
+
+        expected = {f"https://stub.example.com/0/posts/{n}" for n in range(3)}
+        assert _notified_urls(db) == expected
+        posted = " ".join(m.get("text", "") for m in slack.messages)
+        assert all(url in posted for url in expected)
@@ -0,0 +1,124 @@
+"""RSSServiceのテスト"""
+import uuid
+from datetime import datetime
+
+import feedparser
+import pytest
+
+from src.config.database import SessionLocal
+from src.config.settings import settings
+from src.models import NotifiedArticle, RSSSource
+from src.services import RSSService
+
+
+def _articles(prefix: str, names) -> list:
+    return [
+        {"article_url": f"{prefix}/{name}", "title": str(name), "source_id": None}
+        for name in names
+    ]
+
+
+def _notified_urls(db, prefix: str) -> set:
+    db.expire_all()
+    return {
+        url for (url,) in db.query(NotifiedArticle.article_url).filter(
+            NotifiedArticle.article_url.like(f"{prefix}/%")
+        )
+    }
+
+
+def test_overlapping_batches_are_marked_once(db, monkeypatch):
+    monkeypatch.setattr(RSSService, "INSERT_BATCH_SIZE", 2)
+    prefix = f"https://notified.example.com/{uuid.uuid4().hex}"
+
+    assert RSSService(db).mark_as_notified(_articles(prefix, [1, 2, 3])) == 3
+
+    # 別のセッション（手動実行など）から、通知済みの記事を含むバッチを保存する
+    other = SessionLocal()
+    try:
+        batch = _articles(prefix, [2, 3, 4, 5]) + [
+            # 正規化すると同じ記事
+            {"article_url": f"{prefix}/4?utm_source=rss", "title": "4", "source_id": None}
+        ]
+        assert RSSService(other).mark_as_notified(batch) == 2
+    finally:
+        other.close()
+
+    assert _notified_urls(db, prefix) == {f"{prefix}/{i}" for i in range(1, 6)}
+
+
+def test_uncommitted_batch_is_rolled_back_with_the_caller(db):
+    prefix = f"https://notified.example.com/{uuid.uuid4().hex}"
+    RSSService(db).mark_as_notified(_articles(prefix, [1]))
+
+    assert RSSService(db).mark_as_notified(_articles(prefix, [1, 2]), commit=False) == 1
+    db.rollback()
+
+    assert _notified_urls(db, prefix) == {f"{prefix}/1"}
+
+
+T0, T1, T2, T3 = (datetime(2024, 10, day) for day in (1, 2, 3, 4))
+
+
+def _feed(*entries) -> feedparser.FeedParserDict:
+    """(guid, 公開日時)のエントリからなるフィード"""
+    return feedparser.FeedParserDict(entries=[
+        feedparser.FeedParserDict(
+            id=guid,
+            link=f"https://watermark.example.com/{guid}",
+            title=guid,
+            **({"published_parsed": published.timetuple()} if published else {})
+        )
+        for guid, published in entries
+    ])
+
+
+def _guids(articles) -> list:
+    return [article["guid"] for article in articles]
+
+
+@pytest.fixture
+def watermark(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_FEED_WATERMARK", True)
+
+
+def test_parse_stops_at_watermark(db, watermark):
+    feed = _feed(("new2", T3), ("new1", T2), ("seen", T1), ("old", T0))
+    service = RSSService(db)
+
+    assert _guids(service.parse_articles(feed, 1, since_published_at=T1, since_guid="seen")) == ["new2", "new1"]
+    # 同時刻に公開された別の記事は打ち切らない
+    assert _guids(service.parse_articles(feed, 1, since_published_at=T1)) == ["new2", "new1", "seen"]
+    assert _guids(service.parse_articles(feed, 1, since_guid="new1")) == ["new2"]
+
+
+@pytest.mark.parametrize("entries", [
+    # 新しい順に並んでいない
+    [("a", T1), ("b", T3), ("c", T0)],
+    # 公開日時がない
+    [("a", T3), ("b", None), ("c", T0)],
+])
+def test_unsorted_feed_is_parsed_in_full(db, watermark, entries):
+    articles = RSSService(db).parse_articles(_feed(*entries), 1, since_published_at=T2, since_guid="c")
+
+    assert _guids(articles) == ["a", "b", "c"]
+
+
+def test_edited_entry_does_not_hide_newer_entries(db, watermark):
+    # 前回の最新記事（seen）が更新され、公開日時が新しくなって先頭に移動した
+    feed = _feed(("seen", T3), ("new", T2), ("old", T0))
+
+    articles = RSSService(db).parse_articles(feed, 1, since_published_at=T1, since_guid="seen")
+
+    assert _guids(articles) == ["seen", "new"]
+
+
+def test_update_watermark_never_moves_back(db):
+    source = RSSSource(name="watermark", url="https://watermark.example.com/feed")
+    service = RSSService(db)
+
+    service.update_watermark(source, _feed(("b", T1), ("c", T2), ("a", None)))
+    assert (source.watermark_published_at, source.watermark_guid) == (T2, "c")
+
+    service.update_watermark(source, _feed(("old", T0)))
+    assert (source.watermark_published_at, source.watermark_guid) == (T2, "c")
@@ -0,0 +1,222 @@
+"""FakeSlackServerを使ったSlackDispatcher・OutboxServiceのテスト"""
+import time
+from datetime import datetime
+
+import pytest
+
+from src.config.settings import settings
+from src.devtools.fake_slack import FakeSlackServer
+from src.models import SlackOutboxMessage
+from src.services import OutboxService, SlackService
+from src.services.slack_dispatcher import SlackDispatcher, TokenBucket
+
+CHANNEL = "C0TEST"
+TOKEN = "xoxb-test"
+
+
+@pytest.fixture
+def slack():
+    with FakeSlackServer(retry_after_seconds=1, timeout_seconds=1.0) as slack:
+        yield slack
+
+
+@pytest.fixture
+def slack_settings(slack, monkeypatch):
+    monkeypatch.setattr(settings, "SLACK_API_BASE_URL", slack.base_url)
+    monkeypatch.setattr(settings, "SLACK_BOT_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "SLACK_CHANNEL_ID", CHANNEL)
+    monkeypatch.setattr(settings, "DRY_RUN", False)
+
+
+def _post(dispatcher: SlackDispatcher, slack: FakeSlackServer, text: str, channel: str = CHANNEL):
+    return dispatcher.call("chat.postMessage", {"channel": channel, "text": text}, TOKEN, slack.base_url)
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate_per_second=20, burst=2)
+    waits = [bucket.acquire() for _ in range(5)]
+
+    # バースト分は待たず、以降は1/20秒ずつ間隔を空ける
+    assert waits[:2] == [0.0, 0.0]
+    assert sum(waits) == pytest.approx(0.15, abs=0.05)
+
+
+def test_retry_after_is_honored_on_429(slack):
+    dispatcher = SlackDispatcher(max_retries=3, post_message_per_second=100, post_message_burst=10)
+    slack.inject_fault("ratelimited", count=2, method="chat.postMessage")
+
+    started = time.monotonic()
+    result = _post(dispatcher, slack, "hello")
+
+    assert result.ok
+    assert result.attempts == 3
+    # Retry-After: 1 を2回受けたので、2秒以上待ってから送っている
+    assert time.monotonic() - started >= 2.0
+    assert result.throttled_seconds >= 1.9
+    assert [call["status"] for call in slack.calls] == [429, 429, 200]
+    assert len(slack.messages) == 1
+
+
+def test_gives_up_after_max_retries_on_429(slack):
+    dispatcher = SlackDispatcher(max_retries=1, post_message_per_second=100, post_message_burst=10)
+    slack.inject_fault("ratelimited", count=3, method="chat.postMessage")
+
+    result = _post(dispatcher, slack, "hello")
+
+    assert not result.ok
+    assert result.error == "ratelimited"
+    assert result.attempts == 2
+    assert slack.messages == []
+
+
+def test_post_message_is_paced_per_channel():
+    # サーバー側はチャンネルごとに1秒10件まで（超過は429）
+    with FakeSlackServer(post_message_per_second=10, post_message_burst=2) as slack:
+        dispatcher = SlackDispatcher(max_retries=0, post_message_per_second=10, post_message_burst=1)
+
+        started = time.monotonic()
+        results = [_post(dispatcher, slack, f"message {i}") for i in range(6)]
+        elapsed = time.monotonic() - started
+
+        assert all(result.ok for result in results)
+        assert slack.rate_limited_count == 0
+        assert elapsed >= 0.45
+
+        # チャンネルが異なれば別のバケットなので待たない
+        results = [_post(dispatcher, slack, "other", channel=f"C{i}") for i in range(5)]
+        assert all(result.ok and result.throttled_seconds == 0 for result in results)
+
+
+@pytest.mark.parametrize("kind, error, ambiguous", [
+    ("timeout", None, True),
+    ("lost_response", None, True),
+    ("server_error", None, True),
+    ("error", "internal_error", True),
+    ("error", "channel_not_found", False),
+])
+def test_failures_that_may_have_posted_are_ambiguous(slack, kind, error, ambiguous):
+    dispatcher = SlackDispatcher(max_retries=0, timeout=0.3, post_message_per_second=100, post_message_burst=10)
+    slack.inject_fault(kind, error=error)
+
+    result = _post(dispatcher, slack, "hello")
+
+    assert not result.ok
+    assert result.ambiguous is ambiguous
+
+
+def _enqueue(db, count: int) -> str:
+    messages = [{"kind": "main", "text": "parent", "blocks": None, "article_count": 0}] + [
+        {"kind": "article", "text": f"article {i}", "blocks": None, "article_count": 1} for i in range(count - 1)
+    ]
+    batch_id = OutboxService(db).enqueue(messages, channel_id=CHANNEL)
+    db.commit()
+    return batch_id
+
+
+def _batch(db, batch_id: str):
+    db.expire_all()
+    return db.query(SlackOutboxMessage).filter(
+        SlackOutboxMessage.batch_id == batch_id
+    ).order_by(SlackOutboxMessage.sequence).all()
+
+
+def _make_due(db, batch_id: str) -> None:
+    """再送待ちのメッセージをすぐに送信できるようにする"""
+    db.query(SlackOutboxMessage).filter(SlackOutboxMessage.batch_id == batch_id).update(
+        {SlackOutboxMessage.next_attempt_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
+
+
+def test_outbox_keeps_thread_order_when_a_message_fails(db, slack_settings, monkeypatch):
+    # サーバー側は1秒1件（バースト1）、送信側は待たずに送るので、2件目が429になる
+    with FakeSlackServer(post_message_per_second=1, post_message_burst=1) as slack:
+        monkeypatch.setattr(settings, "SLACK_API_BASE_URL", slack.base_url)
+        dispatcher = SlackDispatcher(max_retries=0, post_message_per_second=1000, post_message_burst=10)
+        outbox = OutboxService(db, SlackService(dispatcher=dispatcher))
+        batch_id = _enqueue(db, 4)
+
+        stats = outbox.deliver_pending(batch_id)
+
+        assert stats == {"sent": 1, "failed": 0, "pending": 3}
+        rows = _batch(db, batch_id)
+        assert [row.state for row in rows] == ["sent", "pending", "pending", "pending"]
+        assert rows[1].last_error == "ratelimited"
+        # 失敗したメッセージ以降は送っていない
+        assert [row.attempts for row in rows] == [1, 1, 0, 0]
+        assert len(slack.messages) == 1
+
+        # 再送はサーバーと同じ間隔で送り、429はRetry-Afterだけ待って再送するディスパッチャーで行う
+        _make_due(db, batch_id)
+        paced = SlackDispatcher(max_retries=3, post_message_per_second=1, post_message_burst=1)
+        outbox.slack_service = SlackService(dispatcher=paced)
+        stats = outbox.deliver_pending(batch_id)
+
+        assert stats == {"sent": 3, "failed": 0, "pending": 0}
+        rows = _batch(db, batch_id)
+        assert all(row.state == "sent" for row in rows)
+        parent_ts = rows[0].ts
+        assert [m["text"] for m in slack.get_channel_messages(CHANNEL)] == ["parent"]
+        assert [m["text"] for m in slack.get_thread(CHANNEL, parent_ts)] == [
+            "article 0", "article 1", "article 2"
+        ]
+
+
+def test_outbox_does_not_repost_a_message_whose_response_was_lost(db, slack, slack_settings):
+    dispatcher = SlackDispatcher(max_retries=0, timeout=0.3, post_message_per_second=1000, post_message_burst=10)
+    outbox = OutboxService(db, SlackService(dispatcher=dispatcher))
+    batch_id = _enqueue(db, 3)
+    # スレッド親は投稿されたが、応答がタイムアウトする
+    slack.inject_fault("lost_response", method="chat.postMessage")
+
+    stats = outbox.deliver_pending(batch_id)
+
+    assert stats["sent"] == 0
+    rows = _batch(db, batch_id)
+    assert rows[0].state == "pending"
+    assert rows[0].delivery_unknown
+    assert len(slack.messages) == 1
+
+    _make_due(db, batch_id)
+    stats = outbox.deliver_pending(batch_id)
+
+    assert stats == {"sent": 3, "failed": 0, "pending": 0}
+    rows = _batch(db, batch_id)
+    # 再送せず、Slack上で見つけた投稿のtsを記録している
+    assert rows[0].ts == slack.messages[0]["ts"]
+    assert len(slack.get_channel_messages(CHANNEL)) == 1
+    assert len(slack.get_thread(CHANNEL, rows[0].ts)) == 2
+    assert [call["method"] for call in slack.calls].count("conversations.history") == 1
+
+
+def test_outbox_keeps_retrying_after_max_attempts(db, slack, slack_settings, monkeypatch):
+    monkeypatch.setattr(settings, "SLACK_OUTBOX_MAX_ATTEMPTS", 2)
+    dispatcher = SlackDispatcher(max_retries=0, post_message_per_second=1000, post_message_burst=10)
+    outbox = OutboxService(db, SlackService(dispatcher=dispatcher))
+    batch_id = _enqueue(db, 2)
+    slack.inject_fault("error", count=3, method="chat.postMessage", error="ratelimited")
+
+    for _ in range(3):
+        outbox.deliver_pending(batch_id)
+        _make_due(db, batch_id)
+
+    # 上限を超えても失敗にはせず、再送を続ける
+    rows = _batch(db, batch_id)
+    assert [row.state for row in rows] == ["pending", "pending"]
+    assert rows[0].attempts == 3
+
+    stats = outbox.deliver_pending(batch_id)
+    assert stats == {"sent": 2, "failed": 0, "pending": 0}
+
+
+def test_outbox_retries_when_slack_is_not_configured(db, slack, slack_settings, monkeypatch):
+    monkeypatch.setattr(settings, "SLACK_BOT_TOKEN", None)
+    outbox = OutboxService(db, SlackService())
+    batch_id = _enqueue(db, 2)
+
+    stats = outbox.deliver_pending(batch_id)
+
+    assert stats == {"sent": 0, "failed": 0, "pending": 2}
+    rows = _batch(db, batch_id)
+    assert rows[0].state == "pending"
+    assert rows[0].last_error == "not_configured"
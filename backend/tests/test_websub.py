@@ -0,0 +1,134 @@
+"""StubWebSubHubを使ったWebSubの購読・配信のテスト"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from src.config.settings import settings
+from src.devtools.stub_websub_hub import StubWebSubHub
+from src.models import RSSSource, StagedArticle, WebSubSubscription
+from src.services import WebSubService
+
+
+def _atom_feed(topic_url: str, hub_url: str, article_urls: list) -> bytes:
+    """配信用のAtomフィード（公開日時は現在）"""
+    updated = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    entries = "".join(
+        f"""
+  <entry>
+    <title>WebSub article {index}</title>
+    <link href="{url}"/>
+    <id>{url}</id>
+    <updated>{updated}</updated>
+  </entry>"""
+        for index, url in enumerate(article_urls)
+    )
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>WebSub test feed</title>
+  <link rel="self" href="{topic_url}"/>
+  <link rel="hub" href="{hub_url}"/>
+  <id>{topic_url}</id>
+  <updated>{updated}</updated>{entries}
+</feed>""".encode("utf-8")
+
+
+@pytest.fixture
+def hub():
+    with StubWebSubHub() as hub:
+        yield hub
+
+
+@pytest.fixture
+def subscription(db, hub, app_server, monkeypatch):
+    """ハブを検出済みの情報源に購読を申し込み、確認が済むまで待つ"""
+    monkeypatch.setattr(settings, "WEBSUB_CALLBACK_BASE_URL", app_server)
+
+    topic_url = f"https://websub.example.com/{uuid.uuid4().hex}/feed"
+    source = RSSSource(name="WebSub test", url=topic_url, is_active=True)
+    db.add(source)
+    db.flush()
+    subscription = WebSubSubscription(
+        source_id=source.id, hub_url=hub.hub_url, topic_url=topic_url, state="discovered"
+    )
+    db.add(subscription)
+    db.commit()
+
+    assert WebSubService(db).subscribe(subscription)
+    assert hub.wait_for_subscriptions(1)
+    db.expire_all()
+    return subscription
+
+
+def _staged_urls(db, source_id: int) -> set:
+    db.expire_all()
+    return {
+        url for (url,) in db.query(StagedArticle.article_url).filter(StagedArticle.source_id == source_id)
+    }
+
+
+def test_subscription_is_verified_by_echoing_challenge(db, hub, subscription, app_server):
+    # ハブはchallengeがそのまま返された場合だけ購読を登録する
+    assert hub.verification_failures == 0
+    assert hub.requests[0]["hub.callback"] == f"{app_server}/websub/callback/{subscription.source_id}"
+    assert hub.requests[0]["hub.secret"] == subscription.secret
+    assert subscription.state == "subscribed"
+    assert subscription.lease_expires_at is not None
+
+    # 申し込んでいないトピックの確認は拒否する
+    response = requests.get(
+        f"{app_server}/websub/callback/{subscription.source_id}",
+        params={"hub.mode": "subscribe", "hub.topic": "https://other.example.com/feed", "hub.challenge": "abc"},
+        timeout=5
+    )
+    assert response.status_code == 404
+
+
+def test_content_with_bad_signature_is_discarded(db, subscription, app_server):
+    article_url = f"https://websub.example.com/{uuid.uuid4().hex}/forged"
+    body = _atom_feed(subscription.topic_url, subscription.hub_url, [article_url])
+
+    for signature in ("sha256=" + "0" * 64, "md5=abc", None):
+        headers = {"Content-Type": "application/atom+xml"}
+        if signature:
+            headers["X-Hub-Signature"] = signature
+        response = requests.post(
+            f"{app_server}/websub/callback/{subscription.source_id}", data=body, headers=headers, timeout=5
+        )
+        # 仕様どおり2xxを返しつつ内容は破棄する
+        assert response.status_code == 202
+
+    assert _staged_urls(db, subscription.source_id) == set()
+
+
+def test_published_entries_are_staged(db, hub, subscription):
+    article_urls = [f"https://websub.example.com/{uuid.uuid4().hex}/{i}" for i in range(3)]
+    body = _atom_feed(subscription.topic_url, subscription.hub_url, article_urls)
+
+    assert hub.publish(subscription.topic_url, body) == 1
+    assert hub.deliveries[-1]["status"] == 202
+    assert _staged_urls(db, subscription.source_id) == set(article_urls)
+
+    # 同じ内容が再配信されても重複して保存しない
+    assert hub.publish(subscription.topic_url, body) == 1
+    assert len(_staged_urls(db, subscription.source_id)) == 3
+
+
+def test_oversized_content_is_rejected_before_reading(db, subscription, app_server, monkeypatch):
+    monkeypatch.setattr(settings, "FETCH_MAX_BYTES", 1024)
+    article_url = f"https://websub.example.com/{uuid.uuid4().hex}/large"
+    body = _atom_feed(subscription.topic_url, subscription.hub_url, [article_url]) + b" " * 1024
+    url = f"{app_server}/websub/callback/{subscription.source_id}"
+    headers = {"Content-Type": "application/atom+xml"}
+
+    # Content-Lengthで判定
+    response = requests.post(url, data=body, headers=headers, timeout=5)
+    assert response.status_code == 413
+
+    # Content-Lengthがない（chunked）場合は読み込み中に打ち切る
+    chunks = (body[i:i + 256] for i in range(0, len(body), 256))
+    response = requests.post(url, data=chunks, headers=headers, timeout=5)
+    assert response.status_code == 413
+
+    assert _staged_urls(db, subscription.source_id) == set()